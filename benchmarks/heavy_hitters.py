@@ -0,0 +1,118 @@
+"""
+Heavy-hitter benchmark: exact `GroupTable` vs bounded `SpaceSavingTable`.
+
+Generates a high-cardinality log stream (Zipf-distributed signatures, default
+1M lines over ~200k distinct messages, a small share of them logging at both
+INFO and ERROR) and groups it with the exact table and with Space-Saving at
+several capacities.
+For each it reports:
+
+- peak traced memory (`tracemalloc`) and time,
+- top-K recall (share of the exact top K signatures also in the approximate top K),
+- max relative count error over the approximate top K,
+- whether every ERROR count matches the exact table, and whether every true
+  count lies inside the reported `[count - count_error, count]` interval.
+
+It also replays a fixed stream in which pinning frees summary slots after
+evictions, and checks that the bounds still hold. It exits with code 1 if any
+check fails.
+
+Usage:
+  python -m benchmarks.heavy_hitters
+  python -m benchmarks.heavy_hitters --lines 200000 --capacity 500 --capacity 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Callable, List
+
+from src.log_analysis.grouping import GroupTable
+from src.log_analysis.heavy_hitters import SpaceSavingTable
+
+
+def synthetic_lines(n_lines: int, distinct: int, seed: int = 7, skew: float = 1.1) -> List[str]:
+    rnd = random.Random(seed)
+    weights = [1.0 / (rank ** skew) for rank in range(1, distinct + 1)]
+    keys = rnd.choices(range(distinct), weights=weights, k=n_lines)
+    lines = []
+    for i, k in enumerate(keys):
+        # Error signatures also log at INFO: they can be evicted before their first ERROR
+        level = "ERROR" if k % 97 == 3 and rnd.random() < 0.5 else ("WARN" if k % 5 == 0 else "INFO")
+        ts = f"2025-08-20 {(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}"
+        lines.append(f"{ts} [{level}] component{k % 50} event{k} status changed")
+    return lines
+
+
+# capacity=2: `a` is evicted, then pinning `b` leaves the summary not full
+PIN_AFTER_EVICT = ["INFO a"] * 2 + ["INFO b"] * 2 + ["INFO c"] * 3 + ["ERROR b", "ERROR a"]
+
+
+def bounds_hold(approx: SpaceSavingTable, exact: GroupTable) -> bool:
+    unlisted = approx.unlisted_max()
+    return all(
+        (g["count"] - approx.count_error(s) <= exact.groups[s]["count"] <= g["count"])
+        for s, g in approx.groups.items()
+    ) and all(g["count"] <= unlisted for s, g in exact.groups.items() if s not in approx.groups)
+
+
+def fixed_stream_ok() -> bool:
+    lines = [f"2025-08-20 10:00:00 [{ev.split()[0]}] component event-{ev.split()[1]} status changed"
+             for ev in PIN_AFTER_EVICT]
+    return bounds_hold(SpaceSavingTable(capacity=2).add_all(lines), GroupTable().add_all(lines))
+
+
+def measure(build: Callable[[], GroupTable]):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    table = build()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return table, elapsed, peak
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Exact vs Space-Saving grouping: memory and accuracy")
+    ap.add_argument("--lines", type=int, default=1_000_000)
+    ap.add_argument("--distinct", type=int, default=200_000)
+    ap.add_argument("--top", type=int, default=20, help="K for top-K recall / error")
+    ap.add_argument("--capacity", type=int, action="append", help="Space-Saving capacity (repeatable)")
+    args = ap.parse_args(argv)
+    capacities = args.capacity or [1_000, 10_000]
+
+    t0 = time.perf_counter()
+    lines = synthetic_lines(args.lines, args.distinct)
+    print(f"generated {args.lines:,} lines in {time.perf_counter() - t0:.1f}s")
+
+    exact, t_exact, m_exact = measure(lambda: GroupTable().add_all(lines))
+    exact_top = [g["signature"] for g in exact.to_list()[: args.top]]
+    print(f"{'table':>16} {'groups':>8} {'peak MB':>8} {'time s':>7} {'recall':>7} {'max rel err':>11}  exact ERROR  bounds hold")
+    print(f"{'exact':>16} {len(exact.groups):8,} {m_exact / 1e6:8.1f} {t_exact:7.2f} {1.0:7.2f} {0.0:11.4f}  {'yes':>11}  {'yes':>11}")
+
+    ok = fixed_stream_ok()
+    print(f"pin after eviction (capacity 2): bounds {'hold' if ok else 'BROKEN'}")
+    for cap in capacities:
+        approx, t_approx, m_approx = measure(lambda: SpaceSavingTable(capacity=cap).add_all(lines))
+        top = [g["signature"] for g in approx.to_list()[: args.top]]
+        recall = len(set(top) & set(exact_top)) / max(1, len(exact_top))
+        rel_err = max(
+            (approx.groups[s]["count"] - exact.groups[s]["count"]) / exact.groups[s]["count"] for s in top
+        ) if top else 0.0
+        errors_exact = all(
+            approx.groups.get(s, {"levels": {"ERROR": 0}})["levels"]["ERROR"] == g["levels"]["ERROR"]
+            for s, g in exact.groups.items() if g["levels"]["ERROR"]
+        )
+        holds = bounds_hold(approx, exact)
+        ok = ok and errors_exact and holds
+        print(f"{'space-saving ' + str(cap):>16} {len(approx.groups):8,} {m_approx / 1e6:8.1f} {t_approx:7.2f} "
+              f"{recall:7.2f} {rel_err:11.4f}  {'yes' if errors_exact else 'NO':>11}  {'yes' if holds else 'NO':>11}")
+        print(f"{'':>16} bounds: {approx.bounds()}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""
+HTTP client benchmark: one connection per request vs the pooled sessions.
+
+Starts a local stub server (HTTP/1.1 keep-alive, gzip-compressed JSON replies,
+like a Jira/Slack/TestRail mock) on a free port and sends the same POST
+requests through:
+
+- `requests.post` — a fresh connection per call (the old `http_post_json`),
+- `http_session.post_json` — the origin's pooled `requests.Session`,
+- `http_session.apost_json` — the pooled `httpx.AsyncClient`, `--concurrency`
+  requests in flight.
+
+It reports requests/sec and the number of TCP connections the server
+accepted for each client.
+
+Usage:
+  python -m benchmarks.http_session
+  python -m benchmarks.http_session --requests 5000 --concurrency 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Tuple
+
+from src.core import http_session
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid the delayed-ACK stall
+    connections = 0
+    _lock = threading.Lock()
+
+    def setup(self) -> None:
+        super().setup()
+        with self._lock:
+            type(self).connections += 1
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        reply = json.dumps({"ok": True, "key": "QA-1", "echo": body}).encode("utf-8")
+        gzipped = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        if gzipped:
+            reply = gzip.compress(reply, compresslevel=1)
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+
+def timed(fn: Callable[[], object]) -> Tuple[object, float]:
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Requests/sec: new connection per call vs pooled sessions")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=8, help="In-flight requests for the async client")
+    args = ap.parse_args(argv)
+
+    import requests
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/rest/api/3/issue"
+    payload = {"fields": {"summary": "[Auto] db timeout (12 errors)", "description": "x" * 512}}
+
+    def fresh() -> None:
+        for _ in range(args.requests):
+            r = requests.post(url, json=payload, timeout=60)
+            r.raise_for_status()
+            r.json()
+
+    def pooled() -> None:
+        for _ in range(args.requests):
+            http_session.post_json(url, payload)
+
+    async def apooled() -> None:
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one() -> None:
+            async with sem:
+                await http_session.apost_json(url, payload)
+
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        await http_session.aclose_all()
+
+    print(f"{'client':>28} {'req/s':>10} {'connections':>12}")
+    try:
+        for name, run in (
+            ("requests.post (no pool)", fresh),
+            ("pooled Session", pooled),
+            (f"pooled AsyncClient x{args.concurrency}", lambda: asyncio.run(apooled())),
+        ):
+            _StubHandler.connections = 0
+            _, elapsed = timed(run)
+            print(f"{name:>28} {args.requests / elapsed:10,.0f} {_StubHandler.connections:12d}")
+    finally:
+        http_session.close_all()
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
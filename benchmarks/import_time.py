@@ -0,0 +1,84 @@
+"""
+Import-time budget check for the agent CLIs.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point, reads the cumulative import time of the target module from
+stderr, and fails (exit code 1) when:
+
+- the cumulative time exceeds the budget, or
+- a provider SDK that should load lazily (langchain, httpx, requests, ...)
+  shows up during import.
+
+Usage:
+  python -m benchmarks.import_time
+  python -m benchmarks.import_time --budget-ms 150 --modules src.agents.log_analyzer
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_MODULES = ["src.agents.log_analyzer", "src.agents.testcase_agent"]
+
+# Top-level packages that must not be imported just by loading a CLI module
+LAZY_PACKAGES = ("langchain", "langchain_core", "langchain_openai", "langchain_ollama", "httpx", "requests", "openai", "ollama")
+
+
+def measure(module: str) -> Tuple[float, List[str]]:
+    """Return (cumulative ms for `module`, lazily-expected packages that were imported)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(ROOT),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative_us: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        cumulative_us[parts[2].strip()] = int(parts[1])
+
+    eager = sorted({name for name in cumulative_us if name.split(".")[0] in LAZY_PACKAGES})
+    return cumulative_us.get(module, 0) / 1000.0, eager
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    ap.add_argument("--budget-ms", type=float, default=250.0, help="Max cumulative import time per module")
+    ap.add_argument("--runs", type=int, default=3, help="Best-of-N runs to smooth out noise")
+    args = ap.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        best = float("inf")
+        eager: List[str] = []
+        for _ in range(max(1, args.runs)):
+            ms, eager = measure(module)
+            best = min(best, ms)
+        status = "ok"
+        if best > args.budget_ms:
+            status = f"OVER BUDGET ({args.budget_ms:.0f} ms)"
+            failed = True
+        if eager:
+            status += f"; eager SDK imports: {', '.join(eager[:5])}"
+            failed = True
+        print(f"{module:<40} {best:8.1f} ms  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+"""
+Log grouping benchmark: text vs mmap scanner vs parallel.
+
+Generates a synthetic log file (default: 10M lines in the
+`YYYY-MM-DD HH:MM:SS [LEVEL] message` format) and groups it three ways:
+
+- text: the serial streaming pass (decode + str regex per line)
+- mmap: the serial bytes-level scanner (`src.log_analysis.scanner`)
+- parallel: `group_files_parallel` (mmap scanner per byte range)
+- gzip: the same file gzip-compressed, streamed through a background
+  decompression thread (`--no-gzip` skips it)
+
+It checks that all results are identical and prints lines/sec for each.
+
+Usage:
+  python -m benchmarks.log_grouping
+  python -m benchmarks.log_grouping --lines 1000000 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from src.log_analysis.grouping import GroupTable
+from src.log_analysis.ingest import iter_lines
+from src.log_analysis.parallel import group_files, group_files_parallel
+from src.log_analysis.scanner import scan_file
+
+TEMPLATES = [
+    ("INFO", "Worker-{n} processing job job_id={h}"),
+    ("INFO", "Health check passed: /health -> 200 in {n}ms"),
+    ("WARN", "Telemetry upload delayed: 503 Service Unavailable (attempt {n})"),
+    ("WARN", "Slow query on orders table took {n}ms"),
+    ("ERROR", "Payment processing failed: PaymentGatewayError: Declined card - code {n}"),
+    ("ERROR", "Timeout while calling /api/external/notify ({n}ms)"),
+    ("ERROR", "Database deadlock detected on conn id={n}"),
+    ("ERROR", "Failed to warm cache: redis://10.0.{n}.1:6379 - ConnectionRefusedError"),
+]
+
+
+def write_synthetic(path: Path, n_lines: int, seed: int = 7) -> None:
+    rnd = random.Random(seed)
+    with path.open("w", encoding="utf-8") as fh:
+        buf: List[str] = []
+        for i in range(n_lines):
+            level, tmpl = TEMPLATES[rnd.randrange(len(TEMPLATES))]
+            msg = tmpl.format(n=rnd.randrange(1000), h=f"{rnd.getrandbits(24):06x}")
+            ts = f"2025-08-20 {(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}"
+            buf.append(f"{ts} [{level}] {msg}\n")
+            if len(buf) >= 10_000:
+                fh.writelines(buf)
+                buf.clear()
+        fh.writelines(buf)
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Text vs mmap vs parallel log grouping")
+    ap.add_argument("--lines", type=int, default=10_000_000)
+    ap.add_argument("--workers", type=int, default=0, help="0 = one per CPU")
+    ap.add_argument("--file", help="Use an existing log file instead of generating one")
+    ap.add_argument("--no-gzip", action="store_true", help="Skip the compressed-input run")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.file) if args.file else Path(tmp) / "synthetic.log"
+        if not args.file:
+            t0 = time.perf_counter()
+            write_synthetic(path, args.lines)
+            print(f"generated {args.lines:,} lines in {time.perf_counter() - t0:.1f}s ({path.stat().st_size / 1e6:.0f} MB)")
+
+        t0 = time.perf_counter()
+        serial = GroupTable().add_all(iter_lines([path]))
+        t_serial = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scanned = scan_file(path, GroupTable())
+        t_scan = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        parallel = group_files_parallel([path], workers=args.workers or None, serial_threshold=0)
+        t_parallel = time.perf_counter() - t0
+
+        results = [scanned, parallel]
+        t_gzip = 0.0
+        if not args.no_gzip:
+            gz_path = Path(tmp) / "synthetic.log.gz"
+            with path.open("rb") as src, gzip.open(gz_path, "wb", compresslevel=1) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            t0 = time.perf_counter()
+            results.append(group_files([gz_path]))
+            t_gzip = time.perf_counter() - t0
+
+        n = serial.total_lines
+        print(f"text     {t_serial:8.2f}s  {n / t_serial:12,.0f} lines/s")
+        print(f"mmap     {t_scan:8.2f}s  {n / t_scan:12,.0f} lines/s  (x{t_serial / t_scan:.2f})")
+        print(f"parallel {t_parallel:8.2f}s  {n / t_parallel:12,.0f} lines/s  (x{t_serial / t_parallel:.2f})")
+        if t_gzip:
+            print(f"gzip     {t_gzip:8.2f}s  {n / t_gzip:12,.0f} lines/s  (x{t_serial / t_gzip:.2f})")
+        same = all(
+            t.to_list() == serial.to_list() and t.total_lines == serial.total_lines
+            for t in results
+        )
+        print(f"identical results: {same}")
+        return 0 if same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+"""
+Per-line parsing micro-benchmark: pattern strings vs the shared compiled layer.
+
+Times the three per-line steps of the agent on synthetic lines:
+
+- parse: `re.match(<pattern string>, line)` vs `patterns.LOG_LINE_RE.match`
+- signature: four chained `re.sub` calls vs `patterns.normalize_signature`
+- exceptions: `re.findall(<pattern string>)` on every example, twice (payload
+  and post-processing) vs `patterns.exceptions_in` (memoized per line)
+
+It checks that old and new give identical results and prints ns/line for each.
+
+Usage:
+  python -m benchmarks.log_parsing
+  python -m benchmarks.log_parsing --lines 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List
+
+from benchmarks.log_grouping import TEMPLATES
+from src.log_analysis.patterns import LOG_LINE_RE, exceptions_in, normalize_signature
+
+LINE_PATTERN = (
+    r"(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})"
+    r"\s+\[(?P<level>INFO|WARN|ERROR)\]\s+"
+    r"(?P<msg>.*)"
+)
+
+
+def legacy_parse(line: str):
+    m = re.match(LINE_PATTERN, line)
+    return (m.group("ts"), m.group("level"), m.group("msg").strip()) if m else None
+
+
+def compiled_parse(line: str):
+    m = LOG_LINE_RE.match(line)
+    return (m.group("ts"), m.group("level"), m.group("msg").strip()) if m else None
+
+
+def legacy_signature(msg: str, max_tokens: int = 4) -> str:
+    s = msg.lower()
+    s = re.sub(r"/[-\w./]+", " ", s)
+    s = re.sub(r"\d+", " ", s)
+    s = re.sub(r"[^a-z\s]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    tokens = s.split()
+    return " ".join(tokens[:max_tokens]) if tokens else msg[:32]
+
+
+def legacy_exceptions(lines: List[str]) -> List[str]:
+    exs: List[str] = []
+    for line in lines:
+        for f in re.findall(r"([A-Za-z_]+(?:Error|Exception))", line):
+            if f not in exs:
+                exs.append(f)
+    return exs
+
+
+def synthetic_lines(n_lines: int, seed: int = 7) -> List[str]:
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(n_lines):
+        level, tmpl = TEMPLATES[rnd.randrange(len(TEMPLATES))]
+        msg = tmpl.format(n=rnd.randrange(1000), h=f"{rnd.getrandbits(24):06x}")
+        lines.append(f"2025-08-20 10:{(i // 60) % 60:02d}:{i % 60:02d} [{level}] {msg}")
+    return lines
+
+
+def per_line_ns(fn: Callable[[], object], n: int) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1e9 / max(1, n)
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Pattern strings vs compiled shared patterns, per line")
+    ap.add_argument("--lines", type=int, default=200_000)
+    args = ap.parse_args(argv)
+    lines = synthetic_lines(args.lines)
+    msgs = [p[2] for p in map(compiled_parse, lines)]
+    # Examples repeat across the payload and post-processing passes
+    examples = [lines[i : i + 3] for i in range(0, len(lines), 3)]
+
+    rows = [
+        ("parse", lambda: [legacy_parse(x) for x in lines], lambda: [compiled_parse(x) for x in lines]),
+        ("signature", lambda: [legacy_signature(m) for m in msgs], lambda: [normalize_signature(m) for m in msgs]),
+        ("exceptions x2",
+         lambda: [(legacy_exceptions(e), legacy_exceptions(e)) for e in examples],
+         lambda: [(exceptions_in(e), exceptions_in(e)) for e in examples]),
+    ]
+    ok = True
+    print(f"{'step':>14} {'before ns/line':>15} {'after ns/line':>14} {'speedup':>8}  same")
+    for name, before, after in rows:
+        same = before() == after()
+        ok = ok and same
+        t_before = per_line_ns(before, args.lines)
+        t_after = per_line_ns(after, args.lines)
+        print(f"{name:>14} {t_before:15.0f} {t_after:14.0f} {t_before / t_after:7.2f}x  {same}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
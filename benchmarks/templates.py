@@ -0,0 +1,83 @@
+"""
+Template mining benchmark and clustering check.
+
+Groups synthetic logs (the `log_grouping` templates, default 200k lines) by
+`mask_message`, then mines templates with `TemplateMiner`. It reports
+lines/sec and the number of templates found (one per generator template is
+the expected result).
+
+It also runs fixed cases through a fresh miner:
+
+- messages that share a prefix but mean different things ("Failed to open
+  socket" / "Failed to parse config" / "Failed to write file") must stay
+  separate templates;
+- messages that differ in one variable word must merge into one.
+
+It exits with code 1 if any check fails.
+
+Usage:
+  python -m benchmarks.templates
+  python -m benchmarks.templates --lines 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmarks.log_grouping import TEMPLATES, write_synthetic
+from src.log_analysis.grouping import GroupTable
+from src.log_analysis.ingest import iter_lines
+from src.log_analysis.templates import TemplateMiner, mask_message, mine_groups
+
+MUST_SPLIT = [
+    ["Failed to open socket", "Failed to parse config", "Failed to write file"],
+    ["Cannot connect to database", "Cannot read from cache", "Cannot parse JSON body"],
+]
+MUST_MERGE = [
+    ["Connection reset by peer alpha", "Connection reset by peer beta", "Connection reset by peer gamma"],
+    ["Retry budget exhausted for orders", "Retry budget exhausted for payments"],
+]
+
+
+def templates_of(messages: List[str]) -> List[str]:
+    miner = TemplateMiner()
+    return [miner.add(mask_message(m)).id for m in messages]
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Template mining speed and clustering checks")
+    ap.add_argument("--lines", type=int, default=200_000)
+    args = ap.parse_args(argv)
+
+    ok = True
+    for case in MUST_SPLIT:
+        same = len(set(templates_of(case))) == len(case)
+        ok = ok and same
+        print(f"split {'ok' if same else 'MERGED':>6}  {case}")
+    for case in MUST_MERGE:
+        same = len(set(templates_of(case))) == 1
+        ok = ok and same
+        print(f"merge {'ok' if same else 'SPLIT':>6}  {case}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "synthetic.log"
+        write_synthetic(path, args.lines)
+        t0 = time.perf_counter()
+        table = GroupTable(signature_fn=mask_message).add_all(iter_lines([path]))
+        groups = mine_groups(table, TemplateMiner())
+        elapsed = time.perf_counter() - t0
+    found = len(groups) == len(TEMPLATES)
+    ok = ok and found
+    print(f"{args.lines / elapsed:,.0f} lines/s, {len(groups)} template(s) for {len(TEMPLATES)} generators"
+          f"  {'ok' if found else 'MISMATCH'}")
+    for g in groups:
+        print(f"  {g['count']:>8}  {g['signature']}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
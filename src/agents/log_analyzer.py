@@ -1,52 +1,47 @@
 from __future__ import annotations
 
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Iterable, Optional, Tuple
-import re
 import json
 import argparse
 
-from src.core import chat
+from src.core import chat, chat_many
 from src.core.utils import write_json
-from langchain.prompts import PromptTemplate
-from src.integrations.jira import create_issue, JIRA_BASE
-from src.integrations.slack import post_message
+from src.core.prompt_registry import get_prompt, prompt_version
+from src.log_analysis import packing
+from src.log_analysis.grouping import parse_line_stripped
+from src.log_analysis.ingest import CountingIterator, iter_lines
+from src.log_analysis.formats import FORMATS, group_logs
+from src.log_analysis.group_findings import analyze_error_groups, default_memo
+from src.log_analysis.patterns import LEVELS, LOG_LINE_RE, annotate_exceptions, exceptions_in, normalize_signature
+from src.log_analysis.templates import dedupe_key, group_by_template, mask_message, template_ids
+from src.integrations.jira import create_issues, JIRA_BASE
+from src.integrations.slack import notify
 try:
-    from src.integrations.dedupe import seen_today, mark_today
+    from src.integrations.dedupe import claim, holding, mark_many, release
 except Exception:
-    def seen_today(signature: str) -> bool: return False
-    def mark_today(signature: str, issue_key: str) -> None: pass
+    def claim(signature: str) -> bool: return True
+    def holding(signatures): return nullcontext()
+    def mark_many(items) -> None: pass
+    def release(signature: str) -> None: pass
 
 # ---------- Parsing & Grouping ----------
 
 def load_logs(paths: Iterable[Path]) -> Iterable[str]:
-    """Yield lines from given log file paths."""
-    for p in paths:
-        with p.open("r", encoding="utf-8") as fh:
-            for line in fh:
-                yield line.rstrip("\n")
+    """Yield lines from given log file paths (.gz/.zst/tar inputs are decompressed on the fly)."""
+    yield from iter_lines(paths)
 
 def parse_log_line(line: str) -> Optional[Tuple[str, str, str]]:
     """Parse 'YYYY-MM-DD HH:MM:SS [LEVEL] message' into (ts, level, msg)."""
-    pattern = (
-        r"(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})"
-        r"\s+\[(?P<level>INFO|WARN|ERROR)\]\s+"
-        r"(?P<msg>.*)"
-    )
-    m = re.match(pattern, line)
+    m = LOG_LINE_RE.match(line)
     if not m:
         return None
-    return m.group("ts"), m.group("level"), m.group("msg").strip()
+    return m.group("ts"), LEVELS[m.group("level")], m.group("msg").strip()
 
 def compute_signature(msg: str, max_tokens: int = 4) -> str:
-    """Very small normalization to form a short signature."""
-    s = msg.lower()
-    s = re.sub(r"/[-\w./]+", " ", s)    # strip paths
-    s = re.sub(r"\d+", " ", s)          # strip numbers
-    s = re.sub(r"[^a-z\s]", " ", s)     # strip punctuation
-    s = re.sub(r"\s+", " ", s).strip()
-    tokens = s.split()
-    return " ".join(tokens[:max_tokens]) if tokens else msg[:32]
+    """Very small normalization to form a short signature (paths, numbers, punctuation stripped)."""
+    return normalize_signature(msg, max_tokens)
 
 def group_events(lines: Iterable[str]) -> list[dict]:
     """Aggregate parsed log lines into groups keyed by signature."""
@@ -78,29 +73,43 @@ def group_events(lines: Iterable[str]) -> list[dict]:
 def build_llm_messages(groups: list, total_events: int, top_n: int = 3) -> list:
     """Construct system+user messages to send to the LLM (from prompt files)."""
 
-    # include top_n groups and add extracted exception tokens per group to help LLM
-    payload = groups[:top_n]
-    for g in payload:
-        exs = []
-        for ex_line in g.get("examples", []):
-            found = re.findall(r"([A-Za-z_]+(?:Error|Exception))", ex_line)
-            for f in found:
-                if f not in exs:
-                    exs.append(f)
-        if exs:
-            g["exceptions"] = exs
-
-    # Read prompts from files
-    ROOT = Path(__file__).resolve().parents[2]
-    PROMPTS_DIR = ROOT / "src" / "core" / "prompts"
-    system_text = (PROMPTS_DIR / "log_system.txt").read_text(encoding="utf-8")
-    user_template_str = (PROMPTS_DIR / "log_user.txt").read_text(encoding="utf-8")
-    user_template = PromptTemplate.from_template(user_template_str)
+    # include top_n groups (rate bursts first) and add extracted exception tokens per group to help LLM
+    payload = packing.prioritize(groups)[:top_n]
+    annotate_exceptions(payload)
 
+    # Prompts come from the shared registry (loaded and validated once)
     user_payload = json.dumps({"groups": payload, "total_events": total_events}, indent=2)
 
-    system = system_text
-    user = user_template.format(payload_json=user_payload)
+    system = get_prompt("log_system").text
+    user = get_prompt("log_user").render(payload_json=user_payload)
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def build_llm_batches(groups: list, total_events: int, budget_tokens: int, max_calls: int = 4) -> list:
+    """Pack as many (ERROR-weighted) groups as fit `budget_tokens` per call.
+
+    Returns one system+user message list per batch; see
+    `src.log_analysis.packing` for the packing rules.
+    """
+    annotate_exceptions(groups)
+    system = get_prompt("log_system").text
+    user_prompt = get_prompt("log_user")
+    overhead = packing.estimate_tokens(system) + packing.estimate_tokens(user_prompt.text)
+    batches = packing.pack_groups(groups, total_events, budget_tokens, overhead_tokens=overhead, max_batches=max_calls)
+    return [
+        [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user_prompt.render(payload_json=packing.payload_json(b, total_events))},
+        ]
+        for b in batches
+    ]
+
+
+def build_group_messages(group: dict, total_events: int = 0) -> list:
+    """System+user messages analyzing a single group (used by `--per-group`)."""
+    user_payload = packing.payload_json([packing.compact_group(group)], total_events)
+    system = get_prompt("log_system").text
+    user = get_prompt("log_user").render(payload_json=user_payload)
     return [{"role": "system", "content": system}, {"role": "user", "content": user}]
 
 
@@ -139,6 +148,53 @@ def main(argv: Optional[list] = None) -> None:
     parser.add_argument(
         "--llm-top", type=int, default=3, help="How many top groups to send to LLM"
     )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=0,
+        help="Pack groups into LLM calls of at most this many prompt tokens "
+        "(0 = send only --llm-top groups in one call)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for grouping large inputs (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--signature",
+        choices=["template", "prefix"],
+        default="template",
+        help="template: mined log templates (persisted IDs); prefix: first 4 normalized words",
+    )
+    parser.add_argument(
+        "--scanner",
+        choices=["mmap", "text"],
+        default="mmap",
+        help="mmap: bytes-level scanner (fast); text: decode and parse every line",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["auto", *FORMATS],
+        default="auto",
+        help="Log format (auto: sniffed per file from its first lines; stack traces join their event)",
+    )
+    parser.add_argument(
+        "--topk-capacity",
+        type=int,
+        default=0,
+        help="Keep at most this many non-ERROR signatures (Space-Saving, approximate counts); "
+        "ERROR signatures stay exact (0 = exact counts for all)",
+    )
+    parser.add_argument(
+        "--per-group",
+        action="store_true",
+        help="One concurrent LLM call per ERROR group; findings are memoized by "
+        "(template/signature, exceptions, prompt version), so recurring signatures skip the LLM",
+    )
+    parser.add_argument(
+        "--max-llm-calls", type=int, default=4, help="Max concurrent calls in --token-budget mode"
+    )
     args = parser.parse_args(argv)
 
     # Configure logging for the process (simple default; agents may override)
@@ -150,22 +206,82 @@ def main(argv: Optional[list] = None) -> None:
     logger = logging.getLogger(__name__)
 
     paths = [Path(p) for p in args.inputs]
-    lines = list(load_logs(paths))
-    logger.info("Read %d lines from inputs=%s", len(lines), paths)
-    logger.debug("First 3 lines: %s", lines[:3])
-    groups = group_events(lines)
+    template_mode = args.signature == "template"
+    count_bounds = None
+    legacy = args.format == "standard" and args.scanner == "text" and args.workers == 1
+    if not legacy or template_mode or args.topk_capacity > 0:
+        # Per-file format; standard files go through mmap'd byte ranges, grouped in
+        # parallel when --workers != 1 and merged in input order
+        table = group_logs(
+            paths,
+            signature_fn=mask_message if template_mode else compute_signature,
+            fmt=args.format,
+            workers=args.workers or None,
+            capacity=args.topk_capacity,
+            parse_fn=parse_line_stripped if args.scanner == "mmap" else parse_log_line,
+        )
+        # Template mode: masked messages are clustered into templates afterwards
+        groups = group_by_template(table) if template_mode else table.to_list()
+        logger.info("Read %d lines from inputs=%s", table.total_lines, paths)
+        if args.topk_capacity > 0:
+            count_bounds = table.bounds()
+            logger.info("Approximate counts: %s", count_bounds)
+        # Summed group counts overshoot in approximate mode; parsed lines are exact
+        total = table.parsed_lines
+    else:
+        # Stream lines straight into grouping; only the aggregated groups stay in memory
+        lines = CountingIterator(load_logs(paths))
+        groups = group_events(lines)
+        logger.info("Read %d lines from inputs=%s", lines.count, paths)
+        logger.debug("First 3 lines: %s", lines.head)
+        total = sum(g["count"] for g in groups)
     logger.info("Grouped into %d signatures", len(groups))
     logger.debug("Top signatures: %s", [g["signature"] for g in groups[:5]])
-    total = sum(g["count"] for g in groups)
 
-    messages = build_llm_messages(groups, total, top_n=args.llm_top)
-    logger.info("Calling LLM with top_n=%d (total_events=%d)", args.llm_top, total)
-    logger.debug(
-        "LLM payload size=%d chars",
-        len(json.dumps({"groups": groups[: args.llm_top], "total_events": total})),
-    )
-    raw = call_llm(messages, timeout=args.timeout)
-    findings = parse_llm_output(raw)
+    if args.per_group:
+        memo = default_memo()
+        try:
+            findings = analyze_error_groups(
+                groups,
+                total,
+                build_messages=lambda g: build_group_messages(g, total),
+                chat_many=lambda batches: chat_many(batches, timeout=args.timeout, return_exceptions=True),
+                prompt_version=prompt_version("log_system", "log_user"),
+                memo=memo,
+            )
+        finally:
+            memo.close()
+        logger.info("Per-group analysis made %d LLM call(s)", findings["summary"]["llm_calls"])
+    elif args.token_budget > 0 and not packing.has_errors(groups):
+        # Nothing to file (e.g. an empty log): no batches, no LLM call, empty findings
+        logger.info("No ERROR groups; skipping the LLM call(s).")
+        findings = packing.empty_findings(total)
+    elif args.token_budget > 0:
+        batches = build_llm_batches(groups, total, args.token_budget, max_calls=args.max_llm_calls)
+        logger.info(
+            "Calling LLM with %d packed call(s), budget=%d tokens (total_events=%d)",
+            len(batches), args.token_budget, total,
+        )
+        raws = chat_many(batches, timeout=args.timeout, return_exceptions=True)
+        parts = [packing.parse_findings(r) for r in raws if isinstance(r, str)]
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            # surface the usual error (and save the raw reply) when every call failed
+            first = next((r for r in raws if isinstance(r, str)), None)
+            if first is None:
+                detail = f": {raws[0]!r}" if raws else ""
+                raise RuntimeError(f"All {len(raws)} LLM calls failed{detail}")
+            parse_llm_output(first)
+        findings = packing.merge_findings(parts, groups, total)
+    else:
+        messages = build_llm_messages(groups, total, top_n=args.llm_top)
+        logger.info("Calling LLM with top_n=%d (total_events=%d)", args.llm_top, total)
+        logger.debug(
+            "LLM payload size=%d chars",
+            len(json.dumps({"groups": groups[: args.llm_top], "total_events": total})),
+        )
+        raw = call_llm(messages, timeout=args.timeout)
+        findings = parse_llm_output(raw)
 
     # Post-process: ensure `summary.total_events` and `summary.error_rate` are correct
     if "summary" not in findings or not isinstance(findings.get("summary"), dict):
@@ -178,18 +294,16 @@ def main(argv: Optional[list] = None) -> None:
     er = findings["summary"].get("error_rate")
     if not isinstance(er, (int, float)) or not (0 <= er <= 1):
         findings["summary"]["error_rate"] = computed_error_rate
+    if count_bounds:
+        findings["summary"]["count_bounds"] = count_bounds
 
     # Heuristic: if LLM left probable_root_cause empty, try to extract exception tokens
     for g in findings.get("groups", []):
         pr = g.get("probable_root_cause", "")
         rec = g.get("recommendation", "")
         if not pr:
-            exs = []
-            for ex_line in g.get("examples", []):
-                found = re.findall(r"([A-Za-z_]+(?:Error|Exception))", ex_line)
-                for f in found:
-                    if f not in exs:
-                        exs.append(f)
+            # memoized per example line: payload groups were already scanned
+            exs = exceptions_in(g.get("examples", []))
             if exs:
                 g["probable_root_cause"] = ", ".join(exs)
                 if not rec:
@@ -208,6 +322,8 @@ def main(argv: Optional[list] = None) -> None:
     logger.info("Wrote %s and %s", out_json, out_md)
 
         # --- Act: create ONE Jira per ERROR group, then ONE Slack summary ---
+    # Template text widens across runs; its ID does not, so dedupe on the ID
+    ids = template_ids(groups)
     groups = findings.get("groups") or []
     if not groups:
         logger.info("No groups to report; skipping Jira/Slack.")
@@ -217,6 +333,7 @@ def main(argv: Optional[list] = None) -> None:
     error_rate = findings.get("summary", {}).get("error_rate", 0.0)
 
     created: list[tuple[str, str, int]] = []  # (signature, issue_key, errors)
+    pending: list[tuple[str, str, int, dict]] = []  # claimed (dedupe key, signature, ...), not yet filed
 
     for g in groups:
         levels = g.get("levels", {}) or {}
@@ -226,9 +343,10 @@ def main(argv: Optional[list] = None) -> None:
 
         sig = g.get("signature", "unknown")
 
-        # Optional daily dedupe (skip if same signature already filed today)
-        if seen_today(sig):
-            logger.info("Signature %r already reported today; skipping Jira create.", sig)
+        # Optional dedupe (skip if the same template/signature was filed within the window)
+        ident = dedupe_key(g, ids)
+        if not claim(ident):
+            logger.info("Signature %r already reported in the dedupe window; skipping Jira create.", sig)
             created.append((sig, "ALREADY_REPORTED", errors))
             continue
 
@@ -252,14 +370,22 @@ def main(argv: Optional[list] = None) -> None:
             f"{{code}}\n{example_block}\n{{code}}"
         )
 
-        try:
-            jres = create_issue(summary=summary, description=description, issuetype="Bug")
-            issue_key = jres.get("key") or jres.get("id") or "UNKNOWN"
-            created.append((sig, str(issue_key), errors))
-            mark_today(sig, str(issue_key))
-            logger.info("Created Jira issue: %s for signature %r", issue_key, sig)
-        except Exception as e:
-            logger.error("Jira create failed for %r: %s", sig, e)
+        pending.append((ident, sig, errors, {"summary": summary, "description": description, "issuetype": "Bug"}))
+
+    # File every new issue in one concurrent batch (bulk endpoint when Jira has it)
+    filed: list[tuple[str, str]] = []
+    with holding([ident for ident, _, _, _ in pending]):  # a slow batch must not look abandoned
+        results = create_issues([item for _, _, _, item in pending])
+    for (ident, sig, errors, _), res in zip(pending, results):
+        if isinstance(res, Exception):
+            release(ident)
+            logger.error("Jira create failed for %r: %s", sig, res)
+            continue
+        issue_key = str(res.get("key") or res.get("id") or "UNKNOWN")
+        created.append((sig, issue_key, errors))
+        filed.append((ident, issue_key))
+        logger.info("Created Jira issue: %s for signature %r", issue_key, sig)
+    mark_many(filed)
 
     # If nothing had errors, stop here
     if not created:
@@ -291,10 +417,10 @@ def main(argv: Optional[list] = None) -> None:
                 lines.append(f"```{example_1}```")
 
         txt = "\n".join(lines)
-        _ = post_message(text=txt)
-        logger.info("Posted enriched Slack summary for %d issues.", len(created))
+        notify(txt)  # queued: coalesced with other reports and rate limited per channel
+        logger.info("Queued enriched Slack summary for %d issues.", len(created))
     except Exception as e:
-        logger.error("Slack post failed: %s", e)
+        logger.error("Slack enqueue failed: %s", e)
 
 
 # --- Run as script ---
@@ -14,15 +14,22 @@ import json
 from typing import List, Dict, Optional
 import argparse
 
-from src.core import chat, pick_requirement, parse_json_safely, to_rows, write_csv
-from langchain.prompts import PromptTemplate
+from src.core import (
+    CsvCaseWriter,
+    chat,
+    chat_stream,
+    iter_json_array,
+    pick_requirement,
+    parse_json_safely,
+)
 from src.integrations.testrail import map_case_to_testrail_payload, create_case, list_cases, add_result, get_stats
 import re
 
 # The functions imported from `src.core` are small, dependency-free helpers
 # used to keep this agent focused on orchestration (easy for students to read
 # and extend): `chat` (LLM call), `pick_requirement` (choose input file),
-# `parse_json_safely` (robust JSON parsing), `to_rows` and `write_csv`.
+# `parse_json_safely` (robust JSON parsing) and `CsvCaseWriter` (CSV rows
+# written as cases arrive).
 
 # Paths (easy-to-change constants for students)
 ROOT = Path(__file__).resolve().parents[2]
@@ -38,10 +45,12 @@ LAST_RAW_JSON = OUT_DIR / "last_raw.json"  # file where raw LLM text is saved
 PROMPTS_DIR = ROOT / "src" / "core" / "prompts"
 SYSTEM_PROMPT = (PROMPTS_DIR / "testcase_system.txt").read_text(encoding="utf-8")
 USER_TEMPLATE_STR = (PROMPTS_DIR / "testcase_user.txt").read_text(encoding="utf-8")
-USER_TEMPLATE = PromptTemplate.from_template(USER_TEMPLATE_STR)
+USER_TEMPLATE = USER_TEMPLATE_STR
 
 # `USER_TEMPLATE` wraps the requirement text so the model sees a clear input
-# block; we keep it simple for students to inspect and modify.
+# block; we keep it simple for students to inspect and modify. Plain
+# `str.format` fills it (same f-string syntax LangChain's PromptTemplate uses,
+# without importing langchain at startup).
 
 Message = Dict[str, str]
 """Type alias for message dicts sent to the `chat` helper.
@@ -63,6 +72,74 @@ def _norm(title: str | None) -> str:
     s = re.sub(r"\s+", " ", s).strip()
     return s
 
+def _parse_with_nudge(raw: str, logger) -> List[Dict]:
+    """Parse `raw` as a JSON list, retrying once with a format reminder."""
+    try:
+        cases = parse_json_safely(raw, LAST_RAW_JSON)
+    except Exception as e:
+        # gentle retry nudge — a pragmatic teaching technique: show how a
+        # small reminder can correct common model format mistakes.
+        logger.exception(
+            "Initial parse_json_safely failed; will nudge and retry. Raw saved at %s",
+            LAST_RAW_JSON,
+        )
+        nudge = (
+            raw + "\n\nREMINDER: Return a pure JSON array only, matching the schema."
+        )
+        try:
+            cases = parse_json_safely(nudge, LAST_RAW_JSON)
+        except Exception:
+            # Surface a clear runtime error with a pointer to the saved raw
+            # output so students can debug model responses during the session.
+            logger.error(
+                "Could not parse model output after nudge; see %s", LAST_RAW_JSON
+            )
+            raise RuntimeError(
+                f"Could not parse model output as JSON. See {LAST_RAW_JSON}.\nError: {e}"
+            )
+    return cases
+
+def _load_existing_titles(logger) -> set:
+    """Normalized titles already in TestRail (project-wide); empty if unreachable."""
+    try:
+        existing = list_cases()  # returns list[dict]
+        titles = { _norm(case.get("title")) for case in existing }
+    except Exception as e:
+        logger.warning("Could not fetch existing titles; proceeding without dedupe: %s", e)
+        titles = set()
+    logger.info("📚 Loaded %d existing titles from TestRail (project-wide)", len(titles))
+    return titles
+
+def _push_case(case: Dict, idx: int, existing_titles: set, logger) -> Optional[int]:
+    """Map, dedupe and create one case in TestRail; returns its id, or None if skipped/failed."""
+    try:
+        p = map_case_to_testrail_payload(case)
+    except Exception as e:
+        logger.warning("Skipping case %s (mapping error): %s", case.get("id") or idx, e)
+        return None
+
+    title_norm = _norm(p.get("title"))
+    # Skip if already exists (pre-existing or created earlier in this run)
+    if title_norm in existing_titles:
+        logger.info("↪️  Skipping existing case: %s", p.get("title"))
+        return None
+
+    try:
+        res = create_case(p)
+    except Exception as e:
+        logger.error("Create case failed for '%s': %s", p.get("title"), e)
+        return None
+    cid = res.get("id")
+    if cid is None:
+        logger.warning("Create case response missing 'id': %s", res)
+        return None
+    existing_titles.add(title_norm)      # prevent same-batch duplicates
+    try:
+        _ = add_result(int(cid), status_id=1, comment="Auto-passed by TestCase Agent")
+    except Exception as e:
+        logger.warning("Could not add result for case id %d: %s", int(cid), e)
+    return int(cid)
+
 def main(argv: Optional[list] = None) -> None:
     """Run the testcase agent end-to-end.
 
@@ -71,7 +148,8 @@ def main(argv: Optional[list] = None) -> None:
     2. Read the requirement text.
     3. Build a system + user message pair and call `chat(messages)`.
     4. Save raw model output to `outputs/last_raw.json` and parse it as JSON.
-    5. Convert parsed cases to CSV rows and write `outputs/test_cases.csv`.
+    5. For each parsed case (as it arrives with `--stream`): append its row to
+       `outputs/test_cases.csv` and push it to TestRail (deduped by title).
 
     Error handling and teaching hooks:
     - We save the raw model text to `LAST_RAW_JSON` so students can inspect
@@ -87,6 +165,11 @@ def main(argv: Optional[list] = None) -> None:
     # Parse CLI: accept `--input PATH` for clarity in teaching demos
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", help="Path to a requirement .txt file")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the model output and parse test cases as they arrive",
+    )
     args = parser.parse_args(argv)
 
     # Configure logging for the process (simple default; agents may override)
@@ -108,102 +191,44 @@ def main(argv: Optional[list] = None) -> None:
         },
     ]
 
+    # --- Day-4: Act step → push to TestRail mock ---
+    # Existing titles are loaded up front, so each case can be deduped and
+    # pushed the moment it is parsed (while the model is still streaming).
+    existing_titles = _load_existing_titles(logger)
+    created_ids: list[int] = []
+    skipped = 0
+
+    def handle(case: Dict, csv_out: CsvCaseWriter) -> None:
+        nonlocal skipped
+        csv_out.add(case)
+        cid = _push_case(case, csv_out.count, existing_titles, logger)
+        if cid is None:
+            skipped += 1
+        else:
+            created_ids.append(cid)
+
     # Call the LLM via the provider-agnostic `chat` function. The returned
     # `raw` is the assistant's text; for Day-1 we expect the model to return
     # a pure JSON array (see SYSTEM_PROMPT) so downstream parsing is simple.
     logger.debug("Calling chat: provider payload msgs=%d (sys=1,user=1)", len(messages))
-    raw = chat(messages)
-
-    try:
-        cases = parse_json_safely(raw, LAST_RAW_JSON)
-    except Exception as e:
-        # gentle retry nudge — a pragmatic teaching technique: show how a
-        # small reminder can correct common model format mistakes.
-        logger.exception(
-            "Initial parse_json_safely failed; will nudge and retry. Raw saved at %s",
-            LAST_RAW_JSON,
-        )
-        nudge = (
-            raw + "\n\nREMINDER: Return a pure JSON array only, matching the schema."
-        )
-        try:
-            cases = parse_json_safely(nudge, LAST_RAW_JSON)
-        except Exception:
-            # Surface a clear runtime error with a pointer to the saved raw
-            # output so students can debug model responses during the session.
-            logger.error(
-                "Could not parse model output after nudge; see %s", LAST_RAW_JSON
-            )
-            raise RuntimeError(
-                f"Could not parse model output as JSON. See {LAST_RAW_JSON}.\nError: {e}"
-            )
-
-    rows = to_rows(cases)
-    write_csv(rows, OUT_CSV)
-
-    logger.info("✅ Wrote %d test cases to: %s", len(rows), OUT_CSV.relative_to(ROOT))
+    with CsvCaseWriter(OUT_CSV) as csv_out:
+        if args.stream:
+            # Each case is parsed the moment its object closes and goes straight
+            # to the CSV and TestRail; a truncated reply still keeps every
+            # complete case before the cut.
+            for case in iter_json_array(chat_stream(messages), LAST_RAW_JSON):
+                logger.info("📥 Received case %d: %s", csv_out.count + 1, case.get("title", ""))
+                handle(case, csv_out)
+            if not csv_out.count:
+                raise RuntimeError(f"Streamed model output contained no test cases. See {LAST_RAW_JSON}.")
+        else:
+            raw = chat(messages)
+            for case in _parse_with_nudge(raw, logger):
+                handle(case, csv_out)
+
+    logger.info("✅ Wrote %d test cases to: %s", csv_out.count, OUT_CSV.relative_to(ROOT))
     logger.info("ℹ️  Raw model output saved at: %s", LAST_RAW_JSON.relative_to(ROOT))
-
-    # --- Day-4: Act step → push to TestRail mock ---
-    logger.info("ℹ️  Starting TestRail push step")
-
-    # Map once → collect payloads (so we dedupe on the exact titles we will POST)
-    payloads: list[dict] = []
-    for idx, c in enumerate(cases, start=1):
-        try:
-            p = map_case_to_testrail_payload(c)
-            payloads.append(p)
-        except Exception as e:
-            logger.warning("Skipping case %s (mapping error): %s", c.get("id") or idx, e)
-
-    # Build once: incoming titles from *mapped* payloads
-    incoming_titles = { _norm(p.get("title")) for p in payloads }
-
-    # Build once: existing titles from TestRail (project-wide)
-    try:
-        existing = list_cases()  # returns list[dict]
-        existing_titles = { _norm(case.get("title")) for case in existing }
-    except Exception as e:
-        logger.warning("Could not fetch existing titles; proceeding without dedupe: %s", e)
-        existing_titles = set()
-
-    logger.info("📚 Loaded %d existing titles from TestRail (project-wide)", len(existing_titles))
-
-    # One-shot duplicate report (informational)
-    dupes = incoming_titles & existing_titles
-    if dupes:
-        logger.info(
-            "🚧 Detected %d duplicate title(s) in this batch; they will be skipped: %s",
-            len(dupes), sorted(list(dupes))[:5]  # show first few only
-        )
-    else:
-        logger.info("✅ No duplicates detected for this batch")
-
-    created_ids: list[int] = []
-    for p in payloads:
-        title_norm = _norm(p.get("title"))
-
-        # Skip if already exists (pre-existing or created earlier in this run)
-        if title_norm in existing_titles:
-            logger.info("↪️  Skipping existing case: %s", p.get("title"))
-            continue
-
-        try:
-            res = create_case(p)
-            cid = res.get("id")
-            if cid is not None:
-                created_ids.append(int(cid))         # ✅ safe append
-                existing_titles.add(title_norm)      # prevent same-batch duplicates
-                try:
-                    _ = add_result(int(cid),status_id=1, comment="Auto-passed by TestCase Agent")
-                except Exception as e:
-                    logger.warning("Could not add result for case id %d: %s", int(cid), e)
-            else:
-                logger.warning("Create case response missing 'id': %s", res)
-        except Exception as e:
-            logger.error("Create case failed for '%s': %s", p.get("title"), e)
-
-    logger.info("📌 Created %d TestRail cases: %s", len(created_ids), created_ids)
+    logger.info("📌 Created %d TestRail cases: %s (%d skipped)", len(created_ids), created_ids, skipped)
 
     # Quick verification
     try:
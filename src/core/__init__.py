@@ -7,11 +7,42 @@ Keep this file small: its purpose is purely convenience for teaching and
 to keep example agent files short and readable.
 """
 
-from .llm_client import chat
-from .utils import pick_requirement, parse_json_safely, to_rows, write_csv, write_json
+from dotenv import load_dotenv
+
+from .utils import (
+    CsvCaseWriter,
+    iter_json_array,
+    pick_requirement,
+    parse_json_safely,
+    to_rows,
+    write_csv,
+    write_json,
+)
+
+# Load `.env` once for the whole package (integrations read their settings
+# from os.environ at import time).
+load_dotenv(override=True)
+
+# The LLM client is imported lazily (PEP 562) so `import src.core` stays cheap
+# for runs that never call the model; provider SDKs load on first request.
+_LAZY = {"achat", "chat", "chat_many", "chat_stream"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        from . import llm_client
+
+        return getattr(llm_client, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
+    "CsvCaseWriter",
+    "achat",
     "chat",
+    "chat_many",
+    "chat_stream",
+    "iter_json_array",
     "pick_requirement",
     "parse_json_safely",
     "to_rows",
@@ -0,0 +1,210 @@
+"""
+Shared HTTP sessions for the integrations (Jira, Slack, TestRail).
+
+Every call used to go through `requests.post/get`, which opens a new TCP
+connection per request. This module keeps one pooled client per origin
+(scheme + host + port), so calls to the same service reuse keep-alive
+connections:
+
+- `request_json` / `get_json` / `post_json` — sync, one `requests.Session` per
+  origin with an `HTTPAdapter` pool of `HTTP_POOL_SIZE` connections.
+- `arequest_json` / `aget_json` / `apost_json` — the asyncio twin, one
+  `httpx.AsyncClient` per origin and event loop.
+
+Both sides:
+- use separate connect and read timeouts (`timeout` may be a number (the
+  read budget) or a `(connect, read)` pair),
+- retry idempotent GETs on connection errors, 429 and 502/503/504, with
+  exponential backoff that honors `Retry-After`. POSTs are never retried
+  here: whether a create is safe to repeat is the caller's call (see
+  `src.integrations.jira`).
+- accept gzip/deflate responses, decoded transparently.
+
+`requests` and `httpx` are imported on first use, so `import src.core` stays cheap.
+`close_all()` / `aclose_all()` drop the pools (tests, or after a fork).
+
+Environment configuration:
+- `HTTP_CONNECT_TIMEOUT_S` — connect timeout in seconds (default 5).
+- `HTTP_READ_TIMEOUT_S` — read timeout in seconds (default 60).
+- `HTTP_POOL_SIZE` — keep-alive connections per origin (default 10).
+- `HTTP_GET_RETRIES` — transport retries for GET (default 3).
+- `HTTP_BACKOFF_S` — backoff factor for those retries (default 0.5).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S") or "5")
+READ_TIMEOUT_S = float(os.getenv("HTTP_READ_TIMEOUT_S") or "60")
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE") or "10")
+GET_RETRIES = int(os.getenv("HTTP_GET_RETRIES") or "3")
+BACKOFF_S = float(os.getenv("HTTP_BACKOFF_S") or "0.5")
+
+RETRY_STATUSES = (429, 502, 503, 504)
+MAX_RETRY_AFTER_S = 60.0
+DEFAULT_HEADERS = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+
+Timeout = Union[float, Tuple[float, float], None]
+
+_LOCK = threading.Lock()
+_SESSIONS: Dict[str, Any] = {}
+_ASYNC_CLIENTS: Dict[Tuple[str, int], Any] = {}
+
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def timeouts(timeout: Timeout = None) -> Tuple[float, float]:
+    """(connect, read) seconds; a single number sets the read budget only."""
+    if timeout is None:
+        return CONNECT_TIMEOUT_S, READ_TIMEOUT_S
+    if isinstance(timeout, (tuple, list)):
+        return float(timeout[0]), float(timeout[1])
+    return min(CONNECT_TIMEOUT_S, float(timeout)), float(timeout)
+
+
+def _new_session() -> Any:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=GET_RETRIES,
+        connect=GET_RETRIES,
+        read=GET_RETRIES,
+        status=GET_RETRIES,
+        backoff_factor=BACKOFF_S,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last response back, so raise_for_status reports it
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session(url: str) -> Any:
+    """The shared `requests.Session` for `url`'s origin (created on first use)."""
+    key = origin_of(url)
+    session = _SESSIONS.get(key)
+    if session is not None:
+        return session
+    with _LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = _new_session()
+            _SESSIONS[key] = session
+        return session
+
+
+def request_json(
+    method: str,
+    url: str,
+    payload: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    timeout: Timeout = None,
+) -> Any:
+    """Send one request on the origin's pooled session; return the decoded JSON body.
+
+    Raises `requests.HTTPError` for 4xx/5xx (the response is on `exc.response`).
+    """
+    r = get_session(url).request(method, url, json=payload, headers=headers or {}, timeout=timeouts(timeout))
+    r.raise_for_status()
+    return r.json()
+
+
+def get_json(url: str, headers: Optional[dict] = None, timeout: Timeout = None) -> Any:
+    return request_json("GET", url, headers=headers, timeout=timeout)
+
+
+def post_json(url: str, payload: dict, headers: Optional[dict] = None, timeout: Timeout = None) -> Any:
+    return request_json("POST", url, payload=payload, headers=headers, timeout=timeout)
+
+
+def close_all() -> None:
+    """Close every pooled sync session."""
+    with _LOCK:
+        sessions = list(_SESSIONS.values())
+        _SESSIONS.clear()
+    for s in sessions:
+        s.close()
+
+
+# --- asyncio twin (httpx) ---
+
+def get_async_client(url: str) -> Any:
+    """The shared `httpx.AsyncClient` for `url`'s origin on the running event loop."""
+    import httpx
+
+    key = (origin_of(url), id(asyncio.get_running_loop()))
+    client = _ASYNC_CLIENTS.get(key)
+    if client is None or client.is_closed:
+        connect, read = timeouts()
+        client = httpx.AsyncClient(
+            # transport retries cover connection failures; status retries are below
+            transport=httpx.AsyncHTTPTransport(retries=GET_RETRIES),
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            timeout=httpx.Timeout(read, connect=connect),
+            headers=DEFAULT_HEADERS,
+        )
+        _ASYNC_CLIENTS[key] = client
+    return client
+
+
+def _retry_after_s(headers: Any) -> Optional[float]:
+    value = headers.get("Retry-After") if headers is not None else None
+    try:
+        return min(MAX_RETRY_AFTER_S, max(0.0, float(value))) if value else None
+    except ValueError:
+        return None
+
+
+async def arequest_json(
+    method: str,
+    url: str,
+    payload: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    timeout: Timeout = None,
+) -> Any:
+    """Async `request_json`; raises `httpx.HTTPStatusError` for 4xx/5xx."""
+    import httpx
+
+    connect, read = timeouts(timeout)
+    client = get_async_client(url)
+    retries = GET_RETRIES if method.upper() in ("GET", "HEAD", "OPTIONS") else 0
+    for attempt in range(retries + 1):
+        r = await client.request(
+            method, url, json=payload, headers=headers or {}, timeout=httpx.Timeout(read, connect=connect)
+        )
+        if r.status_code not in RETRY_STATUSES or attempt >= retries:
+            break
+        delay = _retry_after_s(r.headers)
+        await asyncio.sleep(delay if delay is not None else BACKOFF_S * (2 ** attempt))
+    r.raise_for_status()
+    return r.json()
+
+
+async def aget_json(url: str, headers: Optional[dict] = None, timeout: Timeout = None) -> Any:
+    return await arequest_json("GET", url, headers=headers, timeout=timeout)
+
+
+async def apost_json(url: str, payload: dict, headers: Optional[dict] = None, timeout: Timeout = None) -> Any:
+    return await arequest_json("POST", url, payload=payload, headers=headers, timeout=timeout)
+
+
+async def aclose_all() -> None:
+    """Close the async clients that belong to the running event loop."""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _ASYNC_CLIENTS if k[1] == loop_id]:
+        await _ASYNC_CLIENTS.pop(key).aclose()
@@ -0,0 +1,221 @@
+"""
+Content-addressed response cache for `src.core.llm_client.chat`.
+
+Identical prompts are common in this repo: reruns over unchanged requirement
+files, log analyzer runs over the same groups, and retry loops. This module
+keeps assistant replies keyed by a SHA-256 of (provider, model, normalized
+messages) in two tiers:
+
+- an in-memory LRU (fast, per process)
+- a SQLite file (shared across runs, WAL mode like `src.memory.memory_store`)
+
+Entries expire after a TTL and the disk tier is trimmed to a maximum number of
+rows (least recently used first). Hit/miss counters are available through
+`ResponseCache.stats()`.
+
+Environment configuration:
+- `LLM_CACHE` (default: 0) — enable the cache for `chat()`.
+- `LLM_CACHE_PATH` — SQLite file (default: `outputs/llm_cache/responses.db`).
+- `LLM_CACHE_TTL_S` — entry lifetime in seconds (default: 7 days).
+- `LLM_CACHE_MEMORY_ENTRIES` — LRU size (default: 256).
+- `LLM_CACHE_MAX_ENTRIES` — disk rows kept after eviction (default: 5000).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_PATH = Path("outputs") / "llm_cache" / "responses.db"
+DEFAULT_TTL_S = 7 * 24 * 3600.0
+
+_ROLE_ALIASES = {"human": "user", "ai": "assistant"}
+
+
+def normalize_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Canonical form used for hashing: lowercase roles, aliases folded, content stripped."""
+    out = []
+    for m in messages:
+        role = (m.get("role") or "").strip().lower()
+        role = _ROLE_ALIASES.get(role, role)
+        out.append({"role": role, "content": (m.get("content") or "").strip()})
+    return out
+
+
+def cache_key(provider: str, model: str, messages: List[Dict[str, str]]) -> str:
+    """Stable hex digest for a request."""
+    blob = json.dumps(
+        {"provider": provider, "model": model, "messages": normalize_messages(messages)},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (LRU memory + SQLite) cache of assistant replies."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = DEFAULT_PATH,
+        ttl_s: float = DEFAULT_TTL_S,
+        memory_entries: int = 256,
+        max_entries: int = 5000,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.ttl_s = ttl_s
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self._mem: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    # ---- disk tier ----
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, created: float, value: str) -> None:
+        self._mem[key] = (created, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_entries:
+            self._mem.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    # ---- public API ----
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                created, value = hit
+                if now - created <= self.ttl_s:
+                    self._mem.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._mem[key]
+
+            db = self._db()
+            if db is not None:
+                row = db.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if now - created <= self.ttl_s:
+                        db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                        db.commit()
+                        self._remember(key, created, value)
+                        self._counters["disk_hits"] += 1
+                        return value
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    db.commit()
+                    self._counters["evictions"] += 1
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._counters["stores"] += 1
+            db = self._db()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict_disk(db, now)
+            db.commit()
+
+    def _evict_disk(self, db: sqlite3.Connection, now: float) -> None:
+        cur = db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_s,))
+        removed = cur.rowcount or 0
+        (count,) = db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = int(count) - self.max_entries
+        if overflow > 0:
+            cur = db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                (overflow,),
+            )
+            removed += cur.rowcount or 0
+        self._counters["evictions"] += removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            db = self._db()
+            if db is not None:
+                db.execute("DELETE FROM responses")
+                db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+        out["hits"] = out["memory_hits"] + out["disk_hits"]
+        out["memory_size"] = len(self._mem)
+        return out
+
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Process-wide cache instance, configured from env on first use."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResponseCache(
+                    path=Path(os.getenv("LLM_CACHE_PATH") or DEFAULT_PATH),
+                    ttl_s=float(os.getenv("LLM_CACHE_TTL_S") or DEFAULT_TTL_S),
+                    memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES") or "256"),
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES") or "5000"),
+                )
+    return _CACHE
+
+
+def reset_cache() -> None:
+    """Close and forget the process-wide cache (for tests)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is not None:
+            _CACHE.close()
+        _CACHE = None
@@ -20,6 +20,40 @@ Environment configuration (loaded via `python-dotenv`):
 - `OLLAMA_HOST` — base URL for local Ollama (default: `http://localhost:11434`).
 - `OPENAI_API_KEY` — required when `PROVIDER=openai`.
 - `LLM_TIMEOUT_S` — request timeout in seconds (default: 60).
+- `OPENAI_BASE_URL` — optional OpenAI-compatible endpoint (proxies, local stubs).
+- `LLM_PROVIDER_CHAIN` — optional ordered failover chain, e.g.
+  `ollama=mistral:latest,openai=gpt-4o-mini`. Defaults to just PROVIDER/MODEL.
+- `LLM_HEDGE_AFTER_S` — if > 0, a request still pending after this many
+  seconds (use the primary's p95) is raced against the next provider in the
+  chain; the loser is cancelled.
+
+Chat models are built once per process and reused: `get_llm()` keeps a small
+thread-safe registry keyed by (provider, model, host, timeout) so repeated
+`chat()` calls share one HTTP connection pool (keep-alive, TLS session).
+Each configuration keeps its own entry: a model that was handed out may still
+be serving a request in another thread, so nothing is closed while the
+process runs. The pools are closed at exit, or by `reset_clients()` (tests).
+
+Set `LLM_CACHE=1` to serve repeated prompts from the response cache in
+`src.core.llm_cache` (memory LRU + SQLite). Pass `bypass_cache=True` to force a
+fresh sample; the new reply still overwrites the cached one. Lookups use the
+primary (first) provider/model of the chain. A reply is stored under the
+provider/model that actually produced it, so a failover answer is never served
+or reported as the primary model's.
+
+`achat()` is the asyncio version (LangChain `ainvoke`), and `chat_many()` fans
+out a list of message lists concurrently, returning replies in input order.
+`chat_stream()` yields the reply incrementally through LangChain `.stream()`.
+
+Each provider request is recorded in `src.core.llm_metrics` (latency
+histogram, tokens, cost) under a `caller` label, inferred from the calling
+module when not passed explicitly.
+
+Every request passes through `src.core.rate_limit`: token buckets for
+`LLM_RPM`/`LLM_TPM`, one pair per provider/model (prompt tokens estimated
+from message length), and an AIMD
+controller that caps in-flight requests per provider at up to
+`LLM_MAX_CONCURRENCY` (default: 4), halving on 429/timeouts and ramping back.
 
 Usage (examples):
 
@@ -39,16 +73,22 @@ for parsing and cleanup).
 """
 
 from __future__ import annotations
+import asyncio
+import atexit
 import os
-from typing import List, Dict
-import httpx
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
-from langchain.schema import SystemMessage, HumanMessage, AIMessage
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, List, Dict, Iterator, Optional, Tuple
 import logging
 
-import logging
+# Provider SDKs (langchain_*, httpx) are imported on first use inside the
+# functions below, so CLIs that never reach the LLM start fast. `.env` is
+# loaded by `src/core/__init__.py` before this module runs.
+
+from .llm_cache import cache_key, get_cache
+from .llm_metrics import infer_caller, record_cache_hit, record_call, usage_from_response
+from .rate_limit import estimate_tokens, get_limiter
 
 # Visibility / logging flags (class-friendly defaults)
 LLM_LOG = os.getenv("LLM_LOG", "1").strip().lower() in ("1", "true", "yes")
@@ -57,13 +97,15 @@ LLM_DEBUG = os.getenv("LLM_DEBUG", "0").strip().lower() in ("1", "true", "yes")
 # module logger (agents should configure logging.basicConfig in their entrypoints)
 logger = logging.getLogger(__name__)
 
-load_dotenv(override=True)
-
 PROVIDER = (os.getenv("PROVIDER") or "ollama").strip().lower()
 MODEL = (os.getenv("MODEL") or "mistral:latest").strip()
 OLLAMA_HOST = (os.getenv("OLLAMA_HOST") or "http://localhost:11434").strip()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or ""
+OPENAI_BASE_URL = (os.getenv("OPENAI_BASE_URL") or "").strip()
+PROVIDER_CHAIN = (os.getenv("LLM_PROVIDER_CHAIN") or "").strip()
+HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S") or "0")
 TIMEOUT_S = int(os.getenv("LLM_TIMEOUT_S") or "60")
+LLM_CACHE = os.getenv("LLM_CACHE", "0").strip().lower() in ("1", "true", "yes")
 # No temperature handling for Day-1: keep payloads simple and compatible.
 LLM_TEMPERATURE = None
 
@@ -71,6 +113,8 @@ Message = Dict[str, str]
 
 def _to_lc_messages(messages: List[Message]):
     """Convert [{'role','content'}] into LangChain BaseMessages."""
+    from langchain.schema import SystemMessage, HumanMessage, AIMessage
+
     lc_msgs = []
     for m in messages:
         role = (m.get("role") or "").lower()
@@ -84,69 +128,472 @@ def _to_lc_messages(messages: List[Message]):
             lc_msgs.append(HumanMessage(content=content))
     return lc_msgs
 
-def _make_llm():
+ClientKey = Tuple[str, str, str, int]
+Provider = Tuple[str, str]  # (provider, model)
+
+# Process-wide registry: key -> (chat model, owned HTTP clients to close)
+_CLIENTS: Dict[ClientKey, Tuple[Any, List[Any]]] = {}
+_CLIENTS_LOCK = threading.Lock()
+_EXIT_HOOKED = False
+
+
+def provider_chain() -> List[Provider]:
+    """Ordered (provider, model) pairs to try.
+
+    `LLM_PROVIDER_CHAIN` is a comma-separated list of `provider=model` entries
+    (model optional), e.g. `ollama=mistral:latest,openai=gpt-4o-mini`. Without
+    it the chain is just (PROVIDER, MODEL).
+    """
+    if not PROVIDER_CHAIN:
+        return [(PROVIDER, MODEL)]
+    chain: List[Provider] = []
+    for item in PROVIDER_CHAIN.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, model = item.partition("=")
+        name = name.strip().lower()
+        chain.append((name, model.strip() or (MODEL if name == PROVIDER else "")))
+    return chain or [(PROVIDER, MODEL)]
+
+
+def _client_key(timeout: int, provider: str, model: str) -> ClientKey:
+    """Configuration that decides whether a cached model can be reused."""
+    host = OLLAMA_HOST if provider == "ollama" else OPENAI_BASE_URL
+    return (provider, model, host, int(timeout))
+
+
+def _make_llm(timeout: int = TIMEOUT_S, provider: str = "", model: str = "") -> Tuple[Any, List[Any]]:
     """
-    Create the LangChain chat model according to PROVIDER/MODEL envs.
+    Create the LangChain chat model for `provider`/`model` (default: PROVIDER/MODEL envs).
 
-    Note: We do NOT pass a `timeout` kwarg here for maximum compatibility
-    across LangChain versions/backends (e.g., ChatOllama often has no such arg).
+    Returns the model plus the HTTP clients we created for it, so the
+    registry can close them when the entry is replaced or reset.
     """
-    if PROVIDER == "ollama":
+    provider = provider or PROVIDER
+    model = model or MODEL
+    if provider == "ollama":
+        from langchain_ollama import ChatOllama
+
         # LangChain's Ollama wrapper reads OLLAMA_HOST from env.
         os.environ["OLLAMA_HOST"] = OLLAMA_HOST
-        return ChatOllama(model=MODEL)
-    elif PROVIDER == "openai":
+        # `client_kwargs` is forwarded to the ollama httpx client, which keeps
+        # its own keep-alive pool for the lifetime of the model.
+        return ChatOllama(model=model, base_url=OLLAMA_HOST, client_kwargs={"timeout": timeout}), []
+    elif provider == "openai":
         if not OPENAI_API_KEY:
-            raise RuntimeError("OPENAI_API_KEY is missing but PROVIDER=openai.")
+            raise RuntimeError("OPENAI_API_KEY is missing but provider 'openai' is configured.")
+        import httpx
+        from langchain_openai import ChatOpenAI
+
+        http_client = httpx.Client(timeout=timeout)
+        http_async_client = httpx.AsyncClient(timeout=timeout)
+        extra: Dict[str, Any] = {"base_url": OPENAI_BASE_URL} if OPENAI_BASE_URL else {}
         # Keep temperature=0 for deterministic teaching runs
-        return ChatOpenAI(model=MODEL, temperature=0)
+        llm = ChatOpenAI(
+            model=model,
+            temperature=0,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            **extra,
+        )
+        return llm, [http_client, http_async_client]
     else:
         raise NotImplementedError("Unsupported PROVIDER. Use 'ollama' or 'openai'.")
 
-def chat(messages: List[Message], timeout: int = TIMEOUT_S) -> str:
+
+def _close_handles(handles: List[Any]) -> None:
+    for h in handles:
+        try:
+            if hasattr(h, "aclose"):  # httpx.AsyncClient: close it on the loop that owns its pool
+                loop = _LOOP
+                if loop is None or loop.is_closed() or not loop.is_running():
+                    asyncio.run(h.aclose())  # never used on a loop, so no pooled connections
+                elif _running_loop() is loop:
+                    loop.create_task(h.aclose())
+                else:
+                    asyncio.run_coroutine_threadsafe(h.aclose(), loop).result(timeout=5)
+            else:
+                h.close()
+        except Exception:
+            logger.debug("[LLM] ignoring error while closing %r", h, exc_info=True)
+
+
+def get_llm(timeout: int = TIMEOUT_S, provider: str = "", model: str = "") -> Any:
+    """Return the shared chat model for a configuration (default: PROVIDER/MODEL).
+
+    The first call for a given (provider, model, host, timeout) builds the
+    model; later calls return the same instance. Entries for other timeouts
+    stay open (a caller may still be using them) until exit.
+    """
+    global _EXIT_HOOKED
+    key = _client_key(timeout, provider or PROVIDER, model or MODEL)
+    entry = _CLIENTS.get(key)
+    if entry is not None:
+        return entry[0]
+    with _CLIENTS_LOCK:
+        entry = _CLIENTS.get(key)
+        if entry is None:
+            if not _EXIT_HOOKED:
+                atexit.register(reset_clients)  # close the pools once, at shutdown
+                _EXIT_HOOKED = True
+            entry = _make_llm(timeout, key[0], key[1])
+            _CLIENTS[key] = entry
+            if LLM_DEBUG:
+                logger.debug("[LLM] built client for %s", key)
+        return entry[0]
+
+
+def reset_clients() -> None:
+    """Close every cached model's HTTP pool and empty the registry (at exit, and for tests).
+
+    Only call this when no request is in flight: models already handed out stop working.
+    """
+    with _CLIENTS_LOCK:
+        entries = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for _, handles in entries:
+        _close_handles(handles)
+
+
+def _validate(messages: List[Message]) -> None:
     if not isinstance(messages, list) or not messages:
         raise ValueError("messages must be a non-empty list of {'role','content'} dicts.")
 
-    # ---- progress: start
+
+def _cache_lookup(messages: List[Message], bypass_cache: bool, caller: str) -> Optional[str]:
+    """The primary provider/model's cached reply, or None (also when caching is off)."""
+    if not LLM_CACHE or bypass_cache:
+        return None
+    provider, model = provider_chain()[0]
+    cached = get_cache().get(cache_key(provider, model, messages))
+    if cached is not None:
+        record_cache_hit(caller, provider, model)
+        if LLM_LOG:
+            logger.info("[LLM] ✔ cache hit provider=%s model=%s", provider, model)
+    return cached
+
+
+def _log_start(messages: List[Message], provider: str, model: str) -> None:
+    if not LLM_LOG:
+        return
+    n_sys = sum(1 for m in messages if (m.get("role") or "").lower() == "system")
+    n_usr = sum(1 for m in messages if (m.get("role") or "").lower() in ("user", "human"))
+    n_ast = sum(1 for m in messages if (m.get("role") or "").lower() in ("assistant", "ai"))
+    msg_count = len(messages)
+
+    size_info = ""
+    if LLM_DEBUG:
+        lengths = [len(m.get("content") or "") for m in messages]
+        size_info = f" | chars={sum(lengths)} total, per_msg={lengths}"
+
+    logger.info(
+        "[LLM] ▶ start provider=%s model=%s msgs=%d (sys=%d, user=%d, asst=%d)%s",
+        provider,
+        model,
+        msg_count,
+        n_sys,
+        n_usr,
+        n_ast,
+        size_info,
+    )
+
+
+def _log_done(messages: List[Message], resp: Any, t0: float, served: Provider) -> str:
+    """Log a finished request and cache its reply under the provider/model that `served` it."""
+    out = getattr(resp, "content", "") or ""
+    dt = time.perf_counter() - t0
     if LLM_LOG:
-        n_sys = sum(1 for m in messages if (m.get("role") or "").lower() == "system")
-        n_usr = sum(1 for m in messages if (m.get("role") or "").lower() in ("user", "human"))
-        n_ast = sum(1 for m in messages if (m.get("role") or "").lower() in ("assistant", "ai"))
-        msg_count = len(messages)
-
-        size_info = ""
-        if LLM_DEBUG:
-            lengths = [len(m.get("content") or "") for m in messages]
-            size_info = f" | chars={sum(lengths)} total, per_msg={lengths}"
-
-        logger.info(
-            "[LLM] ▶ start provider=%s model=%s msgs=%d (sys=%d, user=%d, asst=%d)%s",
-            PROVIDER,
-            MODEL,
-            msg_count,
-            n_sys,
-            n_usr,
-            n_ast,
-            size_info,
-        )
+        logger.info("[LLM] ✔ done in %.2fs", dt)
+    if LLM_DEBUG:
+        logger.debug("[LLM] response length=%d", len(out))
+    if LLM_CACHE and out:
+        get_cache().put(cache_key(served[0], served[1], messages), out)
+    return out
 
-    # ---- call model
-    import time
-    t0 = time.perf_counter()
-    llm = _make_llm()
-    lc_msgs = _to_lc_messages(messages)
 
+def _record(caller: str, provider: str, model: str, messages: List[Message], resp: Any, t0: float) -> None:
+    """Telemetry for one request; `resp=None` marks a failure."""
+    dt = time.perf_counter() - t0
+    if resp is None:
+        record_call(caller, provider, model, dt, ok=False)
+        return
+    p_tok, c_tok = usage_from_response(resp)
+    estimated = p_tok is None
+    if estimated:
+        p_tok = estimate_tokens(messages)
+        c_tok = len(getattr(resp, "content", "") or "") // 4
+    record_call(caller, provider, model, dt, ok=True, prompt_tokens=p_tok or 0,
+                completion_tokens=c_tok or 0, estimated=estimated)
+
+
+def _invoke(messages: List[Message], timeout: int, provider: str, model: str, caller: str) -> Any:
+    """One blocking call to one provider, under its rate limits."""
+    _log_start(messages, provider, model)
+    limiter = get_limiter(provider, model)
+    limiter.acquire(estimate_tokens(messages))
+    t0 = time.perf_counter()
     try:
-        resp = llm.invoke(lc_msgs)
-        out = getattr(resp, "content", "") or ""
-        dt = time.perf_counter() - t0
-        if LLM_LOG:
-            logger.info("[LLM] ✔ done in %.2fs", dt)
-        if LLM_DEBUG:
-            logger.debug("[LLM] response length=%d", len(out))
-        return out
+        resp = get_llm(timeout, provider, model).invoke(_to_lc_messages(messages))
     except Exception as e:
+        limiter.release(e)
+        _record(caller, provider, model, messages, None, t0)
         dt = time.perf_counter() - t0
         # log exception with stacktrace
-        logger.exception("[LLM] ✖ error after %.2fs: %s", dt, type(e).__name__)
+        logger.exception("[LLM] ✖ %s error after %.2fs: %s", provider, dt, type(e).__name__)
         raise
+    limiter.release()
+    _record(caller, provider, model, messages, resp, t0)
+    return resp
+
+
+async def _ainvoke(messages: List[Message], timeout: int, provider: str, model: str, caller: str) -> Any:
+    """One async call to one provider, under its rate limits. Cancellation-safe."""
+    limiter = get_limiter(provider, model)
+    await limiter.aacquire(estimate_tokens(messages))
+    _log_start(messages, provider, model)
+    t0 = time.perf_counter()
+    try:
+        llm = get_llm(timeout, provider, model)
+        resp = await asyncio.wait_for(llm.ainvoke(_to_lc_messages(messages)), timeout=timeout)
+    except BaseException as e:
+        # BaseException: a cancelled hedge loser must still give back its slot
+        limiter.release(e if isinstance(e, Exception) else None)
+        if isinstance(e, Exception):
+            # cancelled hedge losers are not failures and are not recorded
+            _record(caller, provider, model, messages, None, t0)
+            dt = time.perf_counter() - t0
+            logger.exception("[LLM] ✖ %s error after %.2fs: %s", provider, dt, type(e).__name__)
+        raise
+    limiter.release()
+    _record(caller, provider, model, messages, resp, t0)
+    return resp
+
+
+async def _ainvoke_chain(messages: List[Message], timeout: int, caller: str) -> Tuple[Any, Provider]:
+    """Walk the provider chain with failover and optional hedging; returns (reply, provider that served it).
+
+    Each provider is tried in order; an error or timeout moves on to the
+    next one. With `LLM_HEDGE_AFTER_S > 0`, a request still pending after that
+    delay (set it to the primary's p95 latency) is raced against the next
+    provider. The first successful reply wins and the other tasks are
+    cancelled, which aborts their HTTP requests.
+    """
+    chain = provider_chain()
+    pending: Dict[Any, Provider] = {}
+    next_idx = 0
+    last_exc: Optional[BaseException] = None
+
+    def launch() -> None:
+        nonlocal next_idx
+        provider, model = chain[next_idx]
+        next_idx += 1
+        pending[asyncio.ensure_future(_ainvoke(messages, timeout, provider, model, caller))] = (provider, model)
+
+    launch()
+    try:
+        while pending:
+            more = next_idx < len(chain)
+            wait_s = HEDGE_AFTER_S if (more and HEDGE_AFTER_S > 0) else None
+            done, _ = await asyncio.wait(set(pending), timeout=wait_s, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info("[LLM] ⏱ no reply after %.2fs; hedging to %s", HEDGE_AFTER_S, chain[next_idx][0])
+                launch()
+                continue
+            for task in done:
+                served = pending.pop(task)
+                if task.exception() is None:
+                    return task.result(), served
+                last_exc = task.exception()
+            if not pending and next_idx < len(chain):
+                logger.warning("[LLM] ↪ failing over to %s after %s", chain[next_idx][0], type(last_exc).__name__)
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+    assert last_exc is not None
+    raise last_exc
+
+
+def chat(
+    messages: List[Message],
+    timeout: int = TIMEOUT_S,
+    bypass_cache: bool = False,
+    caller: Optional[str] = None,
+) -> str:
+    _validate(messages)
+    caller = caller or infer_caller()
+    cached = _cache_lookup(messages, bypass_cache, caller)
+    if cached is not None:
+        return cached
+
+    t0 = time.perf_counter()
+    chain = provider_chain()
+    if HEDGE_AFTER_S > 0 and len(chain) > 1:
+        # Hedging needs cancellable requests, so run the chain on the async loop.
+        fut = asyncio.run_coroutine_threadsafe(_ainvoke_chain(messages, timeout, caller), _background_loop())
+        resp, served = fut.result()
+        return _log_done(messages, resp, t0, served)
+
+    # ---- call model(s): sequential failover down the chain
+    last_exc: Optional[Exception] = None
+    for i, (provider, model) in enumerate(chain):
+        if i:
+            logger.warning("[LLM] ↪ failing over to %s after %s", provider, type(last_exc).__name__)
+        try:
+            resp = _invoke(messages, timeout, provider, model, caller)
+        except Exception as e:
+            last_exc = e
+            continue
+        return _log_done(messages, resp, t0, (provider, model))
+    assert last_exc is not None
+    raise last_exc
+
+
+def chat_stream(
+    messages: List[Message],
+    timeout: int = TIMEOUT_S,
+    bypass_cache: bool = False,
+    caller: Optional[str] = None,
+) -> Iterator[str]:
+    """Stream the assistant reply chunk by chunk via LangChain `.stream()`.
+
+    Pair with `src.core.utils.iter_json_array` to act on each JSON element as
+    soon as it closes. A cache hit is yielded as a single chunk; a completed
+    stream is stored in the cache like a `chat()` reply. Failover to the next
+    provider only happens before the first chunk has been yielded.
+    """
+    _validate(messages)
+    caller = caller or infer_caller()
+    cached = _cache_lookup(messages, bypass_cache, caller)
+    if cached is not None:
+        yield cached
+        return
+
+    chain = provider_chain()
+    t0 = time.perf_counter()
+    parts: List[str] = []
+    for i, (provider, model) in enumerate(chain):
+        _log_start(messages, provider, model)
+        limiter = get_limiter(provider, model)
+        limiter.acquire(estimate_tokens(messages))
+        t_attempt = time.perf_counter()
+        try:
+            llm = get_llm(timeout, provider, model)
+            for chunk in llm.stream(_to_lc_messages(messages)):
+                text = getattr(chunk, "content", "") or ""
+                if text:
+                    parts.append(text)
+                    yield text
+        except BaseException as e:
+            # BaseException: a consumer closing the generator early must still release
+            limiter.release(e if isinstance(e, Exception) else None)
+            if not isinstance(e, Exception):
+                raise
+            _record(caller, provider, model, messages, None, t_attempt)
+            dt = time.perf_counter() - t0
+            logger.exception("[LLM] ✖ stream error after %.2fs (%d chunks): %s", dt, len(parts), type(e).__name__)
+            if parts or i == len(chain) - 1:
+                raise
+            continue
+        limiter.release()
+        _record(caller, provider, model, messages, SimpleNamespace(content="".join(parts)), t_attempt)
+        break
+    _log_done(messages, SimpleNamespace(content="".join(parts)), t0, (provider, model))
+
+
+# ---------- Async API ----------
+#
+# `achat()` mirrors `chat()` on top of LangChain's `ainvoke`. In-flight requests
+# per provider are capped by the same adaptive controller as `chat()` (see
+# `src.core.rate_limit`), so a fan-out does not flood a single local Ollama or
+# trip OpenAI rate limits. `chat_many()` is the sync entry point for node code:
+# it runs the fan-out on one long-lived background loop. `achat()` itself also
+# runs on that loop whichever loop awaits it (e.g. repeated `asyncio.run`), so
+# the async HTTP pools in the client registry stay bound to a single live loop.
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+
+async def achat(
+    messages: List[Message],
+    timeout: int = TIMEOUT_S,
+    bypass_cache: bool = False,
+    caller: Optional[str] = None,
+) -> str:
+    """Async twin of `chat()`, sharing its rate limits, failover and hedging.
+
+    Safe from any event loop: the request runs on the background loop that owns
+    the cached async HTTP clients, and cancelling the awaiting task cancels it.
+    """
+    _validate(messages)
+    caller = caller or infer_caller()
+    loop = _background_loop()
+    if _running_loop() is not loop:
+        fut = asyncio.run_coroutine_threadsafe(_achat(messages, timeout, bypass_cache, caller), loop)
+        return await asyncio.wrap_future(fut)
+    return await _achat(messages, timeout, bypass_cache, caller)
+
+
+async def _achat(messages: List[Message], timeout: int, bypass_cache: bool, caller: str) -> str:
+    cached = _cache_lookup(messages, bypass_cache, caller)
+    if cached is not None:
+        return cached
+
+    t0 = time.perf_counter()
+    resp, served = await _ainvoke_chain(messages, timeout, caller)
+    return _log_done(messages, resp, t0, served)
+
+
+async def achat_many(
+    batches: List[List[Message]],
+    timeout: int = TIMEOUT_S,
+    return_exceptions: bool = False,
+    caller: Optional[str] = None,
+) -> List[Any]:
+    """Run `achat()` over many message lists; results keep input order."""
+    caller = caller or infer_caller()
+    return list(
+        await asyncio.gather(
+            *(achat(m, timeout=timeout, caller=caller) for m in batches),
+            return_exceptions=return_exceptions,
+        )
+    )
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-async", daemon=True).start()
+            _LOOP = loop
+        return _LOOP
+
+
+def chat_many(
+    batches: List[List[Message]],
+    timeout: int = TIMEOUT_S,
+    return_exceptions: bool = False,
+    caller: Optional[str] = None,
+) -> List[Any]:
+    """Fan out several chats concurrently from sync code; results keep input order.
+
+    With `return_exceptions=True`, failed calls appear as exception objects in
+    their slot instead of aborting the whole batch.
+    """
+    if not batches:
+        return []
+    fut = asyncio.run_coroutine_threadsafe(
+        achat_many(batches, timeout=timeout, return_exceptions=return_exceptions, caller=caller or infer_caller()),
+        _background_loop(),
+    )
+    return fut.result()
@@ -0,0 +1,291 @@
+"""
+In-process telemetry for LLM calls.
+
+`src.core.llm_client` records one observation per provider request: latency,
+outcome, and prompt/completion tokens. Token counts come from the response
+metadata when the provider reports them (LangChain `usage_metadata`, OpenAI
+`token_usage`, Ollama `prompt_eval_count`/`eval_count`) and are estimated from
+text length otherwise. Every series is labelled by (caller, provider, model),
+where caller is the node/agent module that issued the request.
+
+Latency is kept in an HDR-style histogram: log-linear buckets with ~1.6%
+relative error, so p95/p99 stay accurate without storing every sample.
+
+Exports:
+- `prometheus_text()` — Prometheus text exposition format.
+- `snapshot()` / `dump_json(path)` — JSON with counts, p50/p95/p99, tokens and cost.
+- `enable_exit_dump(path)` — write the JSON dump at process exit (drivers use
+  this to save `llm_metrics.json` next to their reports).
+
+Cost uses `LLM_PRICES`, a comma-separated list of `model=input/output` USD
+prices per 1M tokens (e.g. `gpt-4o-mini=0.15/0.60`). Unknown models cost 0.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+Labels = Tuple[str, str, str]  # (caller, provider, model)
+
+_SUB_BITS = 7  # 128 sub-buckets per power of two -> <1/64 relative error
+_HALF = 1 << (_SUB_BITS - 1)
+
+# Coarse bucket bounds (seconds) for the Prometheus histogram export
+PROM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class LatencyHistogram:
+    """Sparse log-linear histogram of durations, recorded in microseconds."""
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_s = 0.0
+        self.min_s = float("inf")
+        self.max_s = 0.0
+
+    @staticmethod
+    def _index(us: int) -> int:
+        shift = max(0, us.bit_length() - _SUB_BITS)
+        return shift * _HALF + (us >> shift)
+
+    @staticmethod
+    def _lower_bound(idx: int) -> int:
+        if idx < 2 * _HALF:
+            return idx
+        shift = idx // _HALF - 1
+        return (idx - shift * _HALF) << shift
+
+    def record(self, seconds: float) -> None:
+        us = max(0, int(seconds * 1_000_000))
+        idx = self._index(us)
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.total += 1
+        self.sum_s += seconds
+        self.min_s = min(self.min_s, seconds)
+        self.max_s = max(self.max_s, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Value (seconds) at quantile `q` in [0, 100]."""
+        if not self.total:
+            return 0.0
+        rank = max(1, int(round(q / 100.0 * self.total)))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                return min(self.max_s, self._lower_bound(idx) / 1_000_000)
+        return self.max_s
+
+    def cumulative(self, bounds: Tuple[float, ...]) -> List[int]:
+        """Counts of samples <= each bound (for Prometheus `le` buckets)."""
+        out = []
+        items = sorted(self.counts.items())
+        for b in bounds:
+            limit = int(b * 1_000_000)
+            out.append(sum(c for idx, c in items if self._lower_bound(idx) <= limit))
+        return out
+
+
+class _Series:
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.ok = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_tokens = 0  # how many of the token figures were estimates
+        self.cost_usd = 0.0
+
+
+_SERIES: Dict[Labels, _Series] = {}
+_LOCK = threading.Lock()
+
+
+def _prices() -> Dict[str, Tuple[float, float]]:
+    out: Dict[str, Tuple[float, float]] = {}
+    for item in (os.getenv("LLM_PRICES") or "").split(","):
+        model, _, price = item.strip().rpartition("=")
+        if not model or "/" not in price:
+            continue
+        try:
+            p_in, p_out = (float(x) for x in price.split("/", 1))
+        except ValueError:
+            continue
+        out[model] = (p_in, p_out)
+    return out
+
+
+# `src.core` loads `.env` before importing this module
+PRICES = _prices()
+
+
+def _price(model: str) -> Tuple[float, float]:
+    return PRICES.get(model, (0.0, 0.0))
+
+
+def infer_caller(skip_prefixes: Tuple[str, ...] = ("src.core", "asyncio", "concurrent", "threading")) -> str:
+    """Name of the first calling module outside the LLM client internals."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        mod = frame.f_globals.get("__name__", "")
+        if mod and not mod.startswith(skip_prefixes):
+            func = frame.f_code.co_name
+            return f"{mod}.{func}" if func != "<module>" else mod
+        frame = frame.f_back
+    return "unknown"
+
+
+def usage_from_response(resp: Any) -> Tuple[Optional[int], Optional[int]]:
+    """(prompt_tokens, completion_tokens) reported by the provider, if any."""
+    usage = getattr(resp, "usage_metadata", None) or {}
+    if usage.get("input_tokens") is not None:
+        return int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0)
+    meta = getattr(resp, "response_metadata", None) or {}
+    tok = meta.get("token_usage") or meta.get("usage") or {}
+    if tok.get("prompt_tokens") is not None:
+        return int(tok.get("prompt_tokens") or 0), int(tok.get("completion_tokens") or 0)
+    if meta.get("prompt_eval_count") is not None:
+        return int(meta.get("prompt_eval_count") or 0), int(meta.get("eval_count") or 0)
+    return None, None
+
+
+def record_call(
+    caller: str,
+    provider: str,
+    model: str,
+    seconds: float,
+    ok: bool,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    estimated: bool = False,
+) -> None:
+    labels = (caller, provider, model)
+    with _LOCK:
+        s = _SERIES.get(labels)
+        if s is None:
+            s = _SERIES[labels] = _Series()
+        s.latency.record(seconds)
+        if ok:
+            s.ok += 1
+        else:
+            s.errors += 1
+        s.prompt_tokens += prompt_tokens
+        s.completion_tokens += completion_tokens
+        if estimated:
+            s.estimated_tokens += 1
+        p_in, p_out = _price(model)
+        s.cost_usd += (prompt_tokens * p_in + completion_tokens * p_out) / 1_000_000
+
+
+def record_cache_hit(caller: str, provider: str, model: str) -> None:
+    with _LOCK:
+        s = _SERIES.get((caller, provider, model))
+        if s is None:
+            s = _SERIES[(caller, provider, model)] = _Series()
+        s.cache_hits += 1
+
+
+def snapshot() -> Dict[str, Any]:
+    """JSON-friendly view of every series."""
+    with _LOCK:
+        series = []
+        for (caller, provider, model), s in sorted(_SERIES.items()):
+            h = s.latency
+            series.append(
+                {
+                    "caller": caller,
+                    "provider": provider,
+                    "model": model,
+                    "requests": {"ok": s.ok, "error": s.errors, "cache_hits": s.cache_hits},
+                    "latency_s": {
+                        "count": h.total,
+                        "mean": round(h.sum_s / h.total, 4) if h.total else 0.0,
+                        "min": round(h.min_s, 4) if h.total else 0.0,
+                        "p50": round(h.percentile(50), 4),
+                        "p95": round(h.percentile(95), 4),
+                        "p99": round(h.percentile(99), 4),
+                        "max": round(h.max_s, 4),
+                    },
+                    "tokens": {
+                        "prompt": s.prompt_tokens,
+                        "completion": s.completion_tokens,
+                        "estimated_calls": s.estimated_tokens,
+                    },
+                    "cost_usd": round(s.cost_usd, 6),
+                }
+            )
+    return {"series": series}
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Render all series in the Prometheus text exposition format."""
+    lines = [
+        "# HELP llm_request_duration_seconds LLM request latency.",
+        "# TYPE llm_request_duration_seconds histogram",
+    ]
+    rest: Dict[str, List[str]] = {
+        "llm_requests_total": ["# HELP llm_requests_total LLM requests by outcome.", "# TYPE llm_requests_total counter"],
+        "llm_tokens_total": ["# HELP llm_tokens_total Prompt/completion tokens.", "# TYPE llm_tokens_total counter"],
+        "llm_cost_usd_total": ["# HELP llm_cost_usd_total Estimated spend in USD.", "# TYPE llm_cost_usd_total counter"],
+    }
+    with _LOCK:
+        for (caller, provider, model), s in sorted(_SERIES.items()):
+            lbl = f'caller="{_esc(caller)}",provider="{_esc(provider)}",model="{_esc(model)}"'
+            for bound, count in zip(PROM_BUCKETS, s.latency.cumulative(PROM_BUCKETS)):
+                lines.append(f'llm_request_duration_seconds_bucket{{{lbl},le="{bound}"}} {count}')
+            lines.append(f'llm_request_duration_seconds_bucket{{{lbl},le="+Inf"}} {s.latency.total}')
+            lines.append(f"llm_request_duration_seconds_sum{{{lbl}}} {s.latency.sum_s:.6f}")
+            lines.append(f"llm_request_duration_seconds_count{{{lbl}}} {s.latency.total}")
+            for outcome, n in (("ok", s.ok), ("error", s.errors), ("cache_hit", s.cache_hits)):
+                rest["llm_requests_total"].append(f'llm_requests_total{{{lbl},outcome="{outcome}"}} {n}')
+            for kind, n in (("prompt", s.prompt_tokens), ("completion", s.completion_tokens)):
+                rest["llm_tokens_total"].append(f'llm_tokens_total{{{lbl},kind="{kind}"}} {n}')
+            rest["llm_cost_usd_total"].append(f"llm_cost_usd_total{{{lbl}}} {s.cost_usd:.6f}")
+    for block in rest.values():
+        lines.extend(block)
+    return "\n".join(lines) + "\n"
+
+
+def dump_json(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(snapshot(), indent=2), encoding="utf-8")
+
+
+_EXIT_PATHS: List[Path] = []
+
+
+def _dump_at_exit() -> None:
+    with _LOCK:
+        empty = not _SERIES
+    if empty:
+        return
+    for p in _EXIT_PATHS:
+        try:
+            dump_json(p)
+        except Exception:
+            pass
+
+
+def enable_exit_dump(path: Path) -> None:
+    """Write `snapshot()` to `path` when the process exits (only if any call was recorded)."""
+    if not _EXIT_PATHS:
+        atexit.register(_dump_at_exit)
+    _EXIT_PATHS.append(Path(path))
+
+
+def reset_metrics() -> None:
+    """Drop all recorded series (for tests)."""
+    with _LOCK:
+        _SERIES.clear()
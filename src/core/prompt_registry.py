@@ -0,0 +1,159 @@
+"""
+Prompt registry over `src/core/prompts`.
+
+Nodes used to re-read their prompt files from disk on every call. This module
+loads each `<name>.txt` once, pre-splits it around its placeholders, and hands
+out `Prompt` objects that render with a simple join.
+
+- Placeholders are validated at load time: every expected `{field}` must be
+  present, and no unknown `{identifier}` may appear (catches typos early).
+  JSON braces inside a template (e.g. `ui_exec_user.txt`) are left alone,
+  because only declared fields are substituted.
+- `Prompt.version` is a short SHA-256 of the template text, so response
+  caches and memo stores can key on the exact prompt version.
+- With `PROMPTS_DEV=1`, a prompt is reloaded when its file's mtime changes
+  (edit prompts without restarting long-running processes). A reload that
+  fails (bad placeholder, unreadable file) is logged once per edit and the
+  last good version keeps being served until the file loads again.
+
+Usage:
+
+```py
+from src.core.prompt_registry import get_prompt
+
+system = get_prompt("log_system").text
+user = get_prompt("log_user").render(payload_json=payload)
+```
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
+
+# Expected placeholders per known prompt; other files are scanned for `{identifier}`.
+PLACEHOLDERS: Dict[str, Tuple[str, ...]] = {
+    "log_system": (),
+    "log_user": ("payload_json",),
+    "testcase_system": (),
+    "testcase_user": ("requirement_text",),
+    "ui_exec_system": (),
+    "ui_exec_user": ("payload",),
+}
+
+_FIELD_RE = re.compile(r"\{([A-Za-z_]\w*)\}")
+
+logger = logging.getLogger(__name__)
+
+
+class Prompt:
+    """A loaded, pre-parsed prompt template."""
+
+    __slots__ = ("name", "path", "text", "placeholders", "version", "mtime", "_segments")
+
+    def __init__(self, name: str, path: Path, text: str, placeholders: Tuple[str, ...], mtime: float) -> None:
+        self.name = name
+        self.path = path
+        self.text = text
+        self.placeholders = placeholders
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        self.mtime = mtime
+        if placeholders:
+            pattern = "|".join(re.escape(p) for p in placeholders)
+            self._segments = tuple(re.split(r"\{(" + pattern + r")\}", text))
+        else:
+            self._segments = (text,)
+
+    def render(self, **values: object) -> str:
+        """Fill placeholders; raises KeyError for a missing value (like `str.format`)."""
+        if len(self._segments) == 1:
+            return self.text
+        parts = list(self._segments)
+        for i in range(1, len(parts), 2):
+            parts[i] = str(values[parts[i]])
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"Prompt({self.name!r}, version={self.version}, placeholders={self.placeholders})"
+
+
+_PROMPTS: Dict[str, Prompt] = {}
+_FAILED_MTIME: Dict[str, float] = {}  # dev mode: mtime of the last reload that failed
+_LOCK = threading.Lock()
+
+
+def _dev_mode() -> bool:
+    return os.getenv("PROMPTS_DEV", "0").strip().lower() in ("1", "true", "yes")
+
+
+def _load(name: str, prompts_dir: Path) -> Prompt:
+    path = prompts_dir / f"{name}.txt"
+    text = path.read_text(encoding="utf-8")
+    found = set(_FIELD_RE.findall(text))
+    expected = PLACEHOLDERS.get(name)
+    if expected is None:
+        expected = tuple(sorted(found))
+    missing = [p for p in expected if p not in found]
+    unknown = sorted(found - set(expected))
+    if missing or unknown:
+        raise ValueError(
+            f"Prompt {path.name}: missing placeholders {missing}, unknown placeholders {unknown}"
+        )
+    return Prompt(name, path, text, tuple(expected), path.stat().st_mtime)
+
+
+def get_prompt(name: str, prompts_dir: Optional[Path] = None) -> Prompt:
+    """Return the cached prompt `name` (file `<name>.txt`), loading it on first use."""
+    directory = prompts_dir or PROMPTS_DIR
+    key = str(directory / name)
+    prompt = _PROMPTS.get(key)
+    if prompt is not None and not _dev_mode():
+        return prompt
+    with _LOCK:
+        prompt = _PROMPTS.get(key)
+        if prompt is not None and _dev_mode():
+            try:
+                mtime = prompt.path.stat().st_mtime
+            except OSError:
+                return prompt  # file vanished: keep serving the last good version
+            if mtime == prompt.mtime or mtime == _FAILED_MTIME.get(key):
+                return prompt
+            try:
+                prompt = _load(name, directory)
+            except (OSError, ValueError) as e:
+                _FAILED_MTIME[key] = mtime
+                logger.error("Prompt %s failed to reload, serving version %s: %s", name, prompt.version, e)
+                return prompt
+            _FAILED_MTIME.pop(key, None)
+            _PROMPTS[key] = prompt
+            return prompt
+        if prompt is None:
+            prompt = _load(name, directory)  # a first load still fails fast
+            _PROMPTS[key] = prompt
+        return prompt
+
+
+def prompt_version(*names: str) -> str:
+    """Combined version hash of several prompts (e.g. a system+user pair)."""
+    joined = "|".join(get_prompt(n).version for n in names)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:12]
+
+
+def load_all(prompts_dir: Optional[Path] = None) -> Dict[str, Prompt]:
+    """Load and validate every `*.txt` prompt (fails fast on a broken template)."""
+    directory = prompts_dir or PROMPTS_DIR
+    return {p.stem: get_prompt(p.stem, directory) for p in sorted(directory.glob("*.txt"))}
+
+
+def reset_prompts() -> None:
+    """Forget loaded prompts (for tests)."""
+    with _LOCK:
+        _PROMPTS.clear()
+        _FAILED_MTIME.clear()
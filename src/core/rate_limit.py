@@ -0,0 +1,197 @@
+"""
+Client-side rate limiting for LLM calls.
+
+Two small pieces, shared by every thread in the process:
+
+- `TokenBucket` — requests-per-minute and tokens-per-minute budgets per
+  (provider, model). Token cost is estimated from message length
+  (`estimate_tokens`), so no tokenizer dependency is needed.
+- `AimdController` — adaptive concurrency per provider. Each success grows the
+  in-flight limit additively (+1 per "window" of successes); a 429 or timeout
+  halves it. This backs off quickly when OpenAI starts throttling or a local
+  Ollama is saturated, then ramps up again.
+
+`src.core.llm_client` calls `get_limiter(provider, model)` around every request.
+
+Environment configuration (0 = unlimited):
+- `LLM_RPM` — default requests per minute, applied to each provider/model
+  bucket separately (including failover providers).
+- `LLM_TPM` — default prompt tokens per minute, per provider/model bucket.
+- `LLM_MAX_CONCURRENCY` — upper bound for the adaptive concurrency limit.
+
+`configure_limits()` overrides the defaults for one provider/model pair.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size: ~4 chars per token plus a few tokens per message."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + 4 * len(messages) + 1
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute / 60` per second.
+
+    `reserve(n)` takes the tokens immediately (the balance may go negative)
+    and returns how long the caller must wait before proceeding. That keeps
+    the bucket usable from both sync (`time.sleep`) and async code.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n: float = 1.0) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        n = min(float(n), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= n
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class AimdController:
+    """Additive-increase / multiplicative-decrease limit on in-flight calls."""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, decrease: float = 0.5, cooldown_s: float = 1.0) -> None:
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.decrease = decrease
+        self.cooldown_s = cooldown_s
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def aacquire(self, poll_s: float = 0.05) -> None:
+        # Polling keeps the controller loop-agnostic (it is shared with threads).
+        while not self.try_acquire():
+            await asyncio.sleep(poll_s)
+
+    def release(self, overloaded: bool = False) -> None:
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            now = time.monotonic()
+            if overloaded:
+                # One decrease per cooldown: a burst of 429s from the same
+                # window should not collapse the limit to the floor.
+                if now - self._last_decrease >= self.cooldown_s:
+                    self.limit = max(float(self.min_limit), self.limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / max(1.0, self.limit))
+            self._cond.notify_all()
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """True for errors that mean "slow down": HTTP 429 or a timeout."""
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    # Only the status code and exception type count: "429" in a message can be an ID, port or token count
+    status = (
+        getattr(exc, "status_code", None)
+        or getattr(exc, "http_status", None)
+        or getattr(getattr(exc, "response", None), "status_code", None)
+    )
+    if status == 429:
+        return True
+    name = type(exc).__name__.lower()
+    return "timeout" in name or "ratelimit" in name
+
+
+class ProviderLimiter:
+    """Request/token buckets for one provider+model plus the provider's AIMD controller."""
+
+    def __init__(self, rpm: float, tpm: float, controller: AimdController) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.controller = controller
+
+    def _delay(self, n_tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(n_tokens))
+
+    def acquire(self, n_tokens: int) -> None:
+        delay = self._delay(n_tokens)
+        if delay > 0:
+            time.sleep(delay)
+        self.controller.acquire()
+
+    async def aacquire(self, n_tokens: int) -> None:
+        delay = self._delay(n_tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.controller.aacquire()
+
+    def release(self, exc: Optional[BaseException] = None) -> None:
+        self.controller.release(overloaded=exc is not None and is_overload_error(exc))
+
+
+_LIMITS: Dict[Tuple[str, str], Tuple[float, float]] = {}
+_CONTROLLERS: Dict[str, AimdController] = {}
+_LIMITERS: Dict[Tuple[str, str], ProviderLimiter] = {}
+_LOCK = threading.Lock()
+
+
+def configure_limits(provider: str, model: str, rpm: float = 0, tpm: float = 0) -> None:
+    """Set per-minute budgets for a provider/model (0 = unlimited); replaces any live limiter."""
+    with _LOCK:
+        _LIMITS[(provider, model)] = (float(rpm), float(tpm))
+        _LIMITERS.pop((provider, model), None)
+
+
+def get_limiter(provider: str, model: str) -> ProviderLimiter:
+    key = (provider, model)
+    limiter = _LIMITERS.get(key)
+    if limiter is not None:
+        return limiter
+    with _LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            rpm, tpm = _LIMITS.get(
+                key,
+                (float(os.getenv("LLM_RPM") or 0), float(os.getenv("LLM_TPM") or 0)),
+            )
+            controller = _CONTROLLERS.get(provider)
+            if controller is None:
+                controller = AimdController(int(os.getenv("LLM_MAX_CONCURRENCY") or "4"))
+                _CONTROLLERS[provider] = controller
+            limiter = ProviderLimiter(rpm, tpm, controller)
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+def reset_limiters() -> None:
+    """Forget every bucket and controller (for tests)."""
+    with _LOCK:
+        _LIMITS.clear()
+        _CONTROLLERS.clear()
+        _LIMITERS.clear()
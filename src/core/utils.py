@@ -8,8 +8,12 @@ This module contains small, dependency-free helpers used by agents:
 - `parse_json_safely(text, raw_path)` — robustly parse LLM text into JSON
   (tries a minimal cleanup if the model wraps JSON in fences) and saves the
   raw output to `raw_path` for debugging.
+- `iter_json_array(chunks, raw_path)` — incremental variant for streamed LLM
+  output: yields each top-level object as soon as it closes.
 - `to_rows(cases)` — convert a list of JSON case dicts into CSV rows.
 - `write_csv(rows, path)` — write rows to a CSV file without external libs.
+- `CsvCaseWriter(path)` — the incremental variant: one row per `add(case)`, so
+  streamed cases land in the CSV as they arrive.
 
 These are intentionally small helpers designed for teaching. They avoid
 heavyweight dependencies and provide clear points where students can
@@ -20,8 +24,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import List, Dict
-import requests
+from typing import Dict, Iterable, Iterator, List, Optional
 
 
 def pick_requirement(path_arg: str | None, req_dir: Path) -> Path:
@@ -97,6 +100,71 @@ def parse_json_safely(text: str, raw_path: Path) -> List[Dict]:
         return data
 
 
+def iter_json_array(chunks: Iterable[str], raw_path: Optional[Path] = None) -> Iterator[Dict]:
+    """Incrementally parse a streamed JSON array, yielding each element as it closes.
+
+    The scanner skips everything before the first `[` (so Markdown fences or a
+    short preamble are tolerated), tracks nesting depth and string/escape state
+    across chunk boundaries, and hands every complete top-level object or array
+    to `json.loads`. Top-level scalars are ignored. If the stream stops early
+    (truncated response) the generator simply ends, so callers keep the complete
+    prefix.
+
+    Args:
+        chunks: Iterable of text fragments, e.g. from `chat_stream()`.
+        raw_path: Optional path; the full raw text is written there once the
+            stream ends (or the consumer stops early), like `parse_json_safely`.
+
+    Yields:
+        Dict: Each parsed top-level element.
+
+    Raises:
+        json.JSONDecodeError: If a closed element is not valid JSON.
+    """
+    raw_parts: List[str] = []
+    buf: List[str] = []
+    depth = 0
+    started = False
+    in_str = False
+    esc = False
+    try:
+        for chunk in chunks:
+            raw_parts.append(chunk)
+            for ch in chunk:
+                if not started:
+                    if ch == "[":
+                        started = True
+                        depth = 1
+                    continue
+                if depth == 0:
+                    break  # array closed; ignore any trailing text
+                if depth >= 2:
+                    buf.append(ch)
+                if in_str:
+                    if esc:
+                        esc = False
+                    elif ch == "\\":
+                        esc = True
+                    elif ch == '"':
+                        in_str = False
+                    continue
+                if ch == '"':
+                    in_str = True
+                elif ch in "{[":
+                    if depth == 1:
+                        buf = [ch]
+                    depth += 1
+                elif ch in "}]":
+                    depth -= 1
+                    if depth == 1:
+                        yield json.loads("".join(buf))
+                        buf = []
+    finally:
+        if raw_path is not None:
+            raw_path.parent.mkdir(parents=True, exist_ok=True)
+            raw_path.write_text("".join(raw_parts), encoding="utf-8")
+
+
 def to_rows(cases: List[Dict]) -> List[List[str]]:
     """Convert parsed case dictionaries into CSV-safe rows.
 
@@ -117,18 +185,20 @@ def to_rows(cases: List[Dict]) -> List[List[str]]:
     Returns:
         List[List[str]]: Rows ready for CSV writing.
     """
-    rows: List[List[str]] = []
-    for i, c in enumerate(cases, start=1):
-        tid = str(c.get("id") or f"TC-{i:03d}")
-        title = str(c.get("title") or "").strip()
-        steps_list = c.get("steps") or []
-        if not isinstance(steps_list, list):
-            steps_list = [str(steps_list)]
-        steps = " | ".join(str(s).strip() for s in steps_list if str(s).strip())
-        expected = str(c.get("expected") or "").strip()
-        priority = str(c.get("priority") or "Medium").strip()
-        rows.append([tid, title, steps, expected, priority])
-    return rows
+    return [case_row(c, i) for i, c in enumerate(cases, start=1)]
+
+
+def case_row(c: Dict, i: int) -> List[str]:
+    """One `to_rows` row; `i` (1-based) numbers cases without an `id`."""
+    tid = str(c.get("id") or f"TC-{i:03d}")
+    title = str(c.get("title") or "").strip()
+    steps_list = c.get("steps") or []
+    if not isinstance(steps_list, list):
+        steps_list = [str(steps_list)]
+    steps = " | ".join(str(s).strip() for s in steps_list if str(s).strip())
+    expected = str(c.get("expected") or "").strip()
+    priority = str(c.get("priority") or "Medium").strip()
+    return [tid, title, steps, expected, priority]
 
 
 def write_csv(rows: List[List[str]], path: Path) -> None:
@@ -147,14 +217,50 @@ def write_csv(rows: List[List[str]], path: Path) -> None:
         None
     """
     path.parent.mkdir(parents=True, exist_ok=True)
-    header = ["TestID", "Title", "Steps", "Expected", "Priority"]
-    lines = [",".join(header)]
+    lines = [",".join(CSV_HEADER)]
     for r in rows:
         escaped = [field.replace(",", ";") for field in r]
         lines.append(",".join(escaped))
     path.write_text("\n".join(lines), encoding="utf-8")
 
 
+CSV_HEADER = ["TestID", "Title", "Steps", "Expected", "Priority"]
+
+
+class CsvCaseWriter:
+    """Incremental `write_csv(to_rows(cases), path)`: each `add(case)` writes and flushes one row.
+
+    The file is created on the first `add`, so a run that produces no cases
+    leaves an existing CSV untouched. The finished file matches `write_csv`.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.count = 0
+        self._fh = None
+
+    def add(self, case: Dict) -> None:
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "w", encoding="utf-8")
+            self._fh.write(",".join(CSV_HEADER))
+        self.count += 1
+        row = case_row(case, self.count)
+        self._fh.write("\n" + ",".join(field.replace(",", ";") for field in row))
+        self._fh.flush()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self) -> "CsvCaseWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
 def write_json(obj: object, path: Path) -> None:
     """Write an object as pretty JSON to `path`, creating parent dirs.
 
@@ -164,13 +270,15 @@ def write_json(obj: object, path: Path) -> None:
     path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
 
 # --- HTTP helpers (generic JSON) ---
+# Thin wrappers over the pooled sessions in `src.core.http_session` (keep-alive
+# per host, separate connect/read timeouts, GET retries).
+
+def http_post_json(url: str, payload: dict, headers: dict | None = None, timeout: float | None = None) -> dict:
+    from .http_session import post_json  # requests is imported on first use: keeps `import src.core` fast
+
+    return post_json(url, payload, headers=headers, timeout=timeout)
 
-def http_post_json(url: str, payload: dict, headers: dict | None = None, timeout: int = 60) -> dict:
-    r = requests.post(url, json=payload, headers=headers or {}, timeout=timeout)
-    r.raise_for_status()
-    return r.json()
+def http_get_json(url: str, headers: dict | None = None, timeout: float | None = None) -> dict:
+    from .http_session import get_json
 
-def http_get_json(url: str, headers: dict | None = None, timeout: int = 60) -> dict:
-    r = requests.get(url, headers=headers or {}, timeout=timeout)
-    r.raise_for_status()
-    return r.json()
\ No newline at end of file
+    return get_json(url, headers=headers, timeout=timeout)
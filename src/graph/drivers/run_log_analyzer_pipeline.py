@@ -6,20 +6,91 @@ This script runs the LangGraph Log Analyzer pipeline.
 Usage:
   python -m src.graph.drivers.run_log_analyzer_pipeline --inputs data/logs/runtime_errors.log
   python -m src.graph.drivers.run_log_analyzer_pipeline --inputs data/logs/runtime_errors.log data/logs/app_startup_short.log
+
+Follow mode (long-lived sidecar): only appended bytes are read, and findings
+are re-emitted every --emit-interval seconds or every --emit-lines new lines.
+Offsets and rolling groups are checkpointed every --checkpoint-interval
+seconds and at shutdown, so a restart resumes in place (after a crash, at
+most that many seconds of input are read again).
+  python -m src.graph.drivers.run_log_analyzer_pipeline --inputs /var/log/app.log --follow --emit-interval 300
 """
 
 import logging
 import argparse
+import time
+from pathlib import Path
 from pprint import pprint
 
-from src.graph.log_analyzer.graph import build_graph
+from src.graph.log_analyzer.graph import build_analysis_graph, build_graph
+from src.graph.log_analyzer.nodes import (
+    LOG_FORMAT,
+    OUT_DIR,
+    SIGNATURE_MODE,
+    TOPK_CAPACITY,
+    groups_from_table,
+    signature_fn,
+)
 from src.graph.log_analyzer.state import LogAnalyzerState
+from src.log_analysis.follow import Follower, follow_paths
+from src.core import llm_metrics
 
 # Configure logger
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
 logger = logging.getLogger(__name__)
 
 
+def follow(args) -> None:
+    """Poll the inputs forever, re-running the analysis when a trigger fires."""
+    app = build_analysis_graph()
+    follower = Follower(
+        follow_paths(args.inputs),
+        checkpoint_path=args.checkpoint,
+        signature_fn=signature_fn(SIGNATURE_MODE),
+        mode=SIGNATURE_MODE,
+        fmt=LOG_FORMAT,
+        capacity=TOPK_CAPACITY,
+    )
+    logger.info(f"👀 Following {len(follower.paths)} file(s), checkpoint={args.checkpoint}")
+    pending = 0
+    unsaved = False
+    last_emit = last_save = time.monotonic()
+    try:
+        while True:
+            new_lines = follower.poll()
+            if new_lines:
+                pending += new_lines
+                unsaved = True
+            if unsaved and time.monotonic() - last_save >= args.checkpoint_interval:
+                follower.save()
+                unsaved = False
+                last_save = time.monotonic()
+            due = args.emit_lines > 0 and pending >= args.emit_lines
+            due = due or (pending > 0 and time.monotonic() - last_emit >= args.emit_interval)
+            if due:
+                table = follower.table()
+                logger.info(f"📄 {pending} new line(s), {table.total_lines} total; emitting findings")
+                state: LogAnalyzerState = {
+                    "groups": groups_from_table(table, SIGNATURE_MODE),
+                    "total_lines": table.total_lines,
+                    "total_events": table.parsed_lines,
+                    "count_bounds": table.bounds(),
+                }
+                if args.token_budget is not None:
+                    state["llm_token_budget"] = args.token_budget
+                if args.per_group:
+                    state["llm_per_group"] = True
+                final_state = app.invoke(state)
+                logger.info(f"✅ Emitted: {len(final_state.get('jira_issues', []))} Jira issue(s) created")
+                pending = 0
+                last_emit = time.monotonic()
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        logger.info("🛑 Stopping follow mode")
+    finally:
+        follower.save()
+        follower.close()
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -28,9 +99,43 @@ def main():
         help="One or more log file paths",
         default=None,
     )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=None,
+        help="Prompt tokens per LLM call; packs groups across concurrent calls",
+    )
+    parser.add_argument(
+        "--per-group",
+        action="store_true",
+        help="One concurrent LLM call per ERROR group; findings are memoized, so recurring signatures skip the LLM",
+    )
+    parser.add_argument("--follow", action="store_true", help="Keep running and analyze only appended lines")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between file polls (--follow)")
+    parser.add_argument("--emit-interval", type=float, default=60.0, help="Re-emit findings at most this often (--follow)")
+    parser.add_argument("--emit-lines", type=int, default=0, help="Also re-emit after this many new lines (--follow, 0 = off)")
+    parser.add_argument(
+        "--checkpoint",
+        default=str(OUT_DIR / "follow_state.json"),
+        help="Per-file offsets and rolling groups (--follow)",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=30.0,
+        help="Write the checkpoint at most this often; always at shutdown (--follow)",
+    )
     args = parser.parse_args()
 
     logger.info("🚀 Starting Log Analyzer pipeline...")
+    # LLM latency/token/cost metrics are written next to the findings at exit
+    llm_metrics.enable_exit_dump(Path("outputs") / "log_analyzer" / "llm_metrics.json")
+
+    if args.follow:
+        if not args.inputs:
+            parser.error("--follow needs --inputs")
+        follow(args)
+        return
 
     # Build pipeline graph
     app = build_graph()
@@ -39,6 +144,10 @@ def main():
     init_state: LogAnalyzerState = {}
     if args.inputs:
         init_state["log_paths"] = args.inputs
+    if args.token_budget is not None:
+        init_state["llm_token_budget"] = args.token_budget
+    if args.per_group:
+        init_state["llm_per_group"] = True
 
     # Run pipeline
     final_state = app.invoke(init_state)
@@ -48,7 +157,7 @@ def main():
     slack = final_state.get("slack_notifications", [])
     logger.info(
         f"✅ Finished: {len(final_state.get('groups', []))} groups analyzed, "
-        f"{len(issues)} Jira issues created, Slack sent={bool(slack)}"
+        f"{len(issues)} Jira issues created, Slack queued={bool(slack)}"
     )
 
     # Debugging/teaching: print full state
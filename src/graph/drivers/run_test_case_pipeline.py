@@ -1,9 +1,11 @@
 import logging
 from pprint import pprint
 import argparse
+from pathlib import Path
 
 from src.graph.test_case_generator.graph import build_graph
 from src.graph.test_case_generator.state import TestCaseState
+from src.core import llm_metrics
 
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
 logger = logging.getLogger(__name__)
@@ -19,6 +21,8 @@ def main():
     args = parser.parse_args()
 
     logger.info("🚀 Starting Test Case Generator pipeline...")
+    # LLM latency/token/cost metrics are written next to the CSV at exit
+    llm_metrics.enable_exit_dump(Path("outputs") / "testcase_generated" / "llm_metrics.json")
 
     app = build_graph()
 
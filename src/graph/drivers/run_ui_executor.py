@@ -7,6 +7,7 @@ from typing import Dict, cast
 
 from src.graph.ui_executor.graph import build_ui_app
 from src.graph.ui_executor.state import UIExecState
+from src.core import llm_metrics
 
 
 def _parse_env_kv(items: list[str]) -> Dict[str, str]:
@@ -44,6 +45,8 @@ def main():
     args = ap.parse_args()
 
     env_overrides = _parse_env_kv(args.env)
+    # LLM latency/token/cost metrics are written next to the report at exit
+    llm_metrics.enable_exit_dump(Path("outputs") / "ui" / "llm_metrics.json")
 
     print("🔹 ✅ UI Executor graph built successfully")
     app = build_ui_app()
@@ -4,11 +4,14 @@ Day 5 - Log Analyzer (LangGraph)
 This file assembles the pipeline graph using LangGraph.
 
 Flow:
-  1. read_logs 
-  2. group_events 
+  1. read_logs      (resolve input files)
+  2. group_events   (stream lines -> aggregated groups)
   3. analyze_with_llm 
   4. create_jira_tickets 
   5. send_slack_summary
+
+`build_analysis_graph()` is the same pipeline from step 3 on, for callers
+that already have groups (the driver's --follow mode).
 """
 
 import logging
@@ -53,3 +56,20 @@ def build_graph():
     app = workflow.compile()
     logger.info("✅ Log Analyzer pipeline built successfully")
     return app
+
+
+def build_analysis_graph():
+    """Pipeline from already-grouped events: analyze -> Jira -> Slack."""
+
+    workflow = StateGraph(LogAnalyzerState)
+
+    workflow.add_node("analyze_with_llm", analyze_with_llm)
+    workflow.add_node("create_jira_tickets", create_jira_tickets)
+    workflow.add_node("send_slack_summary", send_slack_summary)
+
+    workflow.set_entry_point("analyze_with_llm")
+    workflow.add_edge("analyze_with_llm", "create_jira_tickets")
+    workflow.add_edge("create_jira_tickets", "send_slack_summary")
+    workflow.add_edge("send_slack_summary", END)
+
+    return workflow.compile()
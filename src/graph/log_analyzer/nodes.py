@@ -7,15 +7,23 @@ Each node updates the shared LogAnalyzerState.
 
 import logging
 import json
-import re
+import os
 from pathlib import Path
 from typing import List
 
 from .state import LogAnalyzerState
-from src.core import chat, write_json
-from src.integrations.jira import create_issue, JIRA_BASE
-from src.integrations.slack import post_message
-from src.integrations.dedupe import seen_today, mark_today
+from src.core import chat, chat_many, write_json
+from src.core.prompt_registry import get_prompt, prompt_version
+from src.log_analysis import packing
+from src.log_analysis.grouping import GroupTable, prefix_signature
+from src.log_analysis.ingest import existing_paths
+from src.log_analysis.formats import group_logs
+from src.log_analysis.group_findings import analyze_error_groups, default_memo
+from src.log_analysis.patterns import annotate_exceptions
+from src.log_analysis.templates import dedupe_key, group_by_template, mask_message, template_ids
+from src.integrations.jira import create_issues, JIRA_BASE
+from src.integrations.slack import notify
+from src.integrations.dedupe import claim, holding, mark_many, release
 
 # Configure logger
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
@@ -29,42 +37,65 @@ OUT_DIR.mkdir(parents=True, exist_ok=True)
 OUT_JSON = OUT_DIR / "log_findings.json"
 OUT_MD = OUT_DIR / "log_summary.md"
 
+# Prompt-token budget per LLM call; 0 keeps the single call over the top 3 groups
+LLM_TOKEN_BUDGET = int(os.getenv("LOG_LLM_TOKEN_BUDGET") or "0")
+# 1 = one concurrent LLM call per ERROR group, with findings memoized across runs
+LLM_PER_GROUP = os.getenv("LOG_LLM_PER_GROUP", "0").strip().lower() in ("1", "true", "yes")
+# Grouping worker processes; 0 = one per CPU
+GROUP_WORKERS = int(os.getenv("LOG_GROUP_WORKERS") or "0")
+# "template" (mined templates, IDs persisted across runs) or "prefix" (first 4 words)
+SIGNATURE_MODE = os.getenv("LOG_SIGNATURE", "template").strip().lower()
+TEMPLATES_PATH = Path(os.getenv("LOG_TEMPLATES_PATH") or OUT_DIR / "templates.json")
+# Log format: auto (sniffed per file), standard, jsonl or logfmt
+LOG_FORMAT = os.getenv("LOG_FORMAT", "auto").strip().lower()
+# Max approximate (non-ERROR) signatures kept while grouping; 0 = exact counts for all
+TOPK_CAPACITY = int(os.getenv("LOG_TOPK_CAPACITY") or "0")
+
 
 def read_logs(state: LogAnalyzerState) -> LogAnalyzerState:
-    """Read log files into state.logs"""
+    """Resolve the log files to read (lines are streamed later, not stored in state)"""
     paths = state.get("log_paths") or [str(LOG_DIR / "app_startup_short.log")]
-    lines: List[str] = []
-    for p in paths:
-        path = Path(p)
-        if not path.exists():
-            logger.warning(f"⚠️ Log file not found: {path}")
-            continue
-        lines.extend(path.read_text(encoding="utf-8").splitlines())
-    logger.info(f"📄 Read {len(lines)} log lines from {len(paths)} file(s)")
-    state["logs"] = lines
+    found = existing_paths(paths)
+    logger.info(f"📄 Found {len(found)} of {len(paths)} log file(s)")
+    state["log_paths"] = [str(p) for p in found]
     return state
 
 
+def signature_fn(mode: str):
+    """Grouping key for a signature mode (template mode groups by masked message first)."""
+    return mask_message if mode == "template" else prefix_signature
+
+
+def groups_from_table(table: GroupTable, mode: str) -> List[dict]:
+    """Sorted groups of a table built with `signature_fn(mode)`."""
+    if mode == "template":
+        return group_by_template(table, TEMPLATES_PATH)
+    return table.to_list()
+
+
 def group_events(state: LogAnalyzerState) -> LogAnalyzerState:
-    """Group log lines into signatures"""
-    groups: dict = {}
-    for line in state.get("logs", []):
-        m = re.match(r"(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+\[(?P<level>INFO|WARN|ERROR)\]\s+(?P<msg>.*)", line)
-        if not m:
-            continue
-        _, level, msg = m.group("ts"), m.group("level"), m.group("msg")
-        sig = msg.lower().split()[:4]
-        sig = " ".join(sig) if sig else msg[:32]
-        g = groups.get(sig)
-        if not g:
-            g = {"signature": sig, "count": 0, "levels": {"INFO": 0, "WARN": 0, "ERROR": 0}, "examples": []}
-            groups[sig] = g
-        g["count"] += 1
-        g["levels"][level] = g["levels"].get(level, 0) + 1
-        if len(g["examples"]) < 3:
-            g["examples"].append(line)
-    sorted_groups = sorted(groups.values(), key=lambda x: x["count"], reverse=True)
+    """Stream log lines into signature groups (constant memory per signature, multi-core)"""
+    # Large inputs are split across processes; small ones stay on the serial path
+    workers = int(state.get("group_workers") or GROUP_WORKERS) or None
+    mode = state.get("signature_mode") or SIGNATURE_MODE
+    capacity = int(state.get("topk_capacity") or TOPK_CAPACITY)
+    # Each file's format is sniffed from its first lines; stack traces join their event
+    table = group_logs(
+        state.get("log_paths", []),
+        signature_fn=signature_fn(mode),
+        fmt=state.get("log_format") or LOG_FORMAT,
+        workers=workers,
+        capacity=capacity,
+    )
+    sorted_groups = groups_from_table(table, mode)
+    logger.info(f"📄 Read {table.total_lines} log lines")
     logger.info(f"🔎 Grouped into {len(sorted_groups)} signatures")
+    if capacity > 0:
+        logger.info(f"📏 Approximate counts: {table.bounds()}")
+    state["total_lines"] = table.total_lines
+    # Summed group counts overshoot in approximate mode; parsed lines are exact
+    state["total_events"] = table.parsed_lines
+    state["count_bounds"] = table.bounds()
     state["groups"] = sorted_groups
     return state
 
@@ -72,30 +103,87 @@ def group_events(state: LogAnalyzerState) -> LogAnalyzerState:
 def analyze_with_llm(state: LogAnalyzerState) -> LogAnalyzerState:
     """Send grouped logs to LLM for analysis using prompt files"""
     groups = state.get("groups", [])
-    total = sum(g["count"] for g in groups)
+    total = state.get("total_events") or sum(g["count"] for g in groups)
 
-    # Load prompts from src/core/prompts
-    PROMPTS_DIR = ROOT / "src" / "core" / "prompts"
-    system_prompt = (PROMPTS_DIR / "log_system.txt").read_text(encoding="utf-8")
-    user_template = (PROMPTS_DIR / "log_user.txt").read_text(encoding="utf-8")
+    # Prompts from src/core/prompts via the registry (read once per process)
+    system_prompt = get_prompt("log_system").text
+    budget = int(state.get("llm_token_budget") or LLM_TOKEN_BUDGET)
 
-    payload_json = json.dumps({"groups": groups[:3], "total_events": total}, indent=2)
-    user_prompt = user_template.format(payload_json=payload_json)
+    if state.get("llm_per_group", LLM_PER_GROUP):
+        # One request per ERROR group; groups analyzed on earlier runs come from the memo
+        user_prompt = get_prompt("log_user")
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
-    ]
+        def build_messages(group: dict) -> list:
+            payload = packing.payload_json([packing.compact_group(group)], total)
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt.render(payload_json=payload)},
+            ]
 
-    raw = chat(messages)
+        memo = default_memo()
+        try:
+            findings = analyze_error_groups(
+                groups,
+                total,
+                build_messages=build_messages,
+                chat_many=lambda batches: chat_many(batches, return_exceptions=True),
+                prompt_version=prompt_version("log_system", "log_user"),
+                memo=memo,
+            )
+        finally:
+            memo.close()
+        logger.info(f"🧩 Per-group analysis: {findings['summary']['llm_calls']} LLM call(s)")
+    elif budget > 0 and not packing.has_errors(groups):
+        # Nothing to file (e.g. an empty log): no batches, no LLM call, empty findings
+        logger.info("🫙 No ERROR groups; skipping the LLM call(s).")
+        findings = packing.empty_findings(total)
+    elif budget > 0:
+        # Pack as many ERROR-weighted groups as fit, spilling into concurrent calls
+        annotate_exceptions(groups)
+        overhead = packing.estimate_tokens(system_prompt) + packing.estimate_tokens(get_prompt("log_user").text)
+        batches = packing.pack_groups(groups, total, budget, overhead_tokens=overhead)
+        logger.info(f"🧮 Packed {len(groups)} groups into {len(batches)} LLM call(s) (budget={budget})")
+        raws = chat_many(
+            [
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": get_prompt("log_user").render(payload_json=packing.payload_json(b, total))},
+                ]
+                for b in batches
+            ],
+            return_exceptions=True,
+        )
+        parts = [packing.parse_findings(r) for r in raws if isinstance(r, str)]
+        parts = [p for p in parts if p is not None]
+        if parts:
+            findings = packing.merge_findings(parts, groups, total)
+        else:
+            logger.warning("⚠️ No LLM call returned valid JSON. Saving raw output.")
+            first = next((r for r in raws if isinstance(r, str)), "")
+            (OUT_DIR / "last_raw.json").write_text(first, encoding="utf-8")
+            findings = packing.empty_findings(total)
+    else:
+        payload = packing.prioritize(groups)[:3]
+        annotate_exceptions(payload)
+        payload_json = json.dumps({"groups": payload, "total_events": total}, indent=2)
+        user_prompt = get_prompt("log_user").render(payload_json=payload_json)
 
-    try:
-        findings = json.loads(raw)
-    except Exception:
-        logger.warning("⚠️ Could not parse LLM JSON. Saving raw output.")
-        (OUT_DIR / "last_raw.json").write_text(raw, encoding="utf-8")
-        findings = {"groups": [], "summary": {"total_events": total}}
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
 
+        raw = chat(messages)
+
+        try:
+            findings = json.loads(raw)
+        except Exception:
+            logger.warning("⚠️ Could not parse LLM JSON. Saving raw output.")
+            (OUT_DIR / "last_raw.json").write_text(raw, encoding="utf-8")
+            findings = {"groups": [], "summary": {"total_events": total}}
+
+    if state.get("count_bounds"):
+        findings.setdefault("summary", {})["count_bounds"] = state["count_bounds"]
     write_json(findings, OUT_JSON)
     OUT_MD.write_text("# Summary\n" + json.dumps(findings.get("summary", {}), indent=2), encoding="utf-8")
 
@@ -109,25 +197,36 @@ def create_jira_tickets(state: LogAnalyzerState) -> LogAnalyzerState:
     groups = findings.get("groups", [])
     total = findings.get("summary", {}).get("total_events", 0)
 
-    created: List[str] = []
+    # Template text widens across runs; its ID does not, so dedupe on the ID
+    ids = template_ids(state.get("groups", []))
+    pending = []
     for g in groups:
         errors = g.get("levels", {}).get("ERROR", 0)
         if errors <= 0:
             continue
         sig = g.get("signature", "unknown")
-        if seen_today(sig):
-            logger.info(f"↪️ Signature '{sig}' already reported today, skipping.")
+        ident = dedupe_key(g, ids)
+        if not claim(ident):  # atomic: concurrent pipelines never both file the same signature
+            logger.info(f"↪️ Signature '{sig}' already reported in the dedupe window, skipping.")
             continue
         summary = f"[Auto] {sig} ({errors} errors)"
         description = f"h2. Auto Log Analysis\n\nSignature: {sig}\nErrors: {errors} of {total}\nExamples:\n" + "\n".join(g.get("examples", []))
-        try:
-            jres = create_issue(summary=summary, description=description, issuetype="Bug")
-            key = jres.get("key") or "UNKNOWN"
-            created.append(str(key))
-            mark_today(sig, str(key))
-            logger.info(f"🐞 Created Jira issue {key} for '{sig}'")
-        except Exception as e:
-            logger.error(f"❌ Jira create failed for '{sig}': {e}")
+        pending.append((ident, sig, {"summary": summary, "description": description, "issuetype": "Bug"}))
+
+    created: List[str] = []
+    filed = []
+    with holding([ident for ident, _, _ in pending]):  # a slow batch must not look abandoned
+        results = create_issues([item for _, _, item in pending])
+    for (ident, sig, _), res in zip(pending, results):
+        if isinstance(res, Exception):
+            release(ident)
+            logger.error(f"❌ Jira create failed for '{sig}': {res}")
+            continue
+        key = str(res.get("key") or "UNKNOWN")
+        created.append(key)
+        filed.append((ident, key))
+        logger.info(f"🐞 Created Jira issue {key} for '{sig}'")
+    mark_many(filed)
     state["jira_issues"] = created
     return state
 
@@ -154,9 +253,9 @@ def send_slack_summary(state: LogAnalyzerState) -> LogAnalyzerState:
 
     text = "\n".join(lines)
     try:
-        post_message(text=text)
-        logger.info("📢 Slack summary posted")
-        state["slack_notifications"] = ["SENT"]
+        notify(text)  # queued: coalesced with other reports and rate limited per channel
+        logger.info("📢 Slack summary queued")
+        state["slack_notifications"] = ["QUEUED"]
     except Exception as e:
-        logger.error(f"❌ Slack post failed: {e}")
+        logger.error(f"❌ Slack enqueue failed: {e}")
     return state
@@ -17,8 +17,32 @@ class LogAnalyzerState(TypedDict, total=False):
     # Optional: one or more log file paths (CLI input)
     log_paths: List[str]
 
-    # Input: raw log lines
-    logs: List[str]
+    # Optional: prompt-token budget per LLM call (enables packing across calls)
+    llm_token_budget: int
+
+    # Optional: one LLM call per ERROR group, memoized across runs
+    llm_per_group: bool
+
+    # Optional: worker processes for grouping (0/None = one per CPU)
+    group_workers: int
+
+    # Optional: "template" (mined log templates) or "prefix" (first 4 words)
+    signature_mode: str
+
+    # Optional: "auto" (sniffed per file), "standard", "jsonl" or "logfmt"
+    log_format: str
+
+    # Optional: max approximate non-ERROR signatures (0/None = exact counts)
+    topk_capacity: int
+
+    # Lines read by the streaming group_events pass (raw lines are never kept in state)
+    total_lines: int
+
+    # Parsed events (exact even when group counts are approximate)
+    total_events: int
+
+    # Accuracy of the group counts (mode, capacity, max_count_error, ...)
+    count_bounds: Dict
 
     # Output: grouped log events (signatures, counts, examples)
     groups: List[Dict]
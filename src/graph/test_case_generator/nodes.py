@@ -70,7 +70,8 @@ def generate_tests_with_llm(state: TestCaseState) -> TestCaseState:
     for attempt in range(1, max_retries + 1):
         try:
             logger.info(f"🔄 Attempt {attempt}/{max_retries} to call LLM...")
-            raw = chat(messages)
+            # Retries must see a fresh sample, not the cached reply that failed to parse
+            raw = chat(messages, bypass_cache=attempt > 1)
             cases = parse_json_safely(raw, LAST_RAW_JSON)
             if cases:  # success
                 break
@@ -8,6 +8,7 @@ import xml.etree.ElementTree as ET
 
 from src.graph.ui_executor.state import UIExecState
 from src.core.llm_client import chat
+from src.core.prompt_registry import get_prompt
 import json
 
 from src.memory import memory_store
@@ -176,13 +177,9 @@ def llm_triage(state: UIExecState) -> UIExecState:
     if not failed_now:
         return s
 
-    # Resolve prompt files relative to repo layout: src/graph/ui_executor/nodes.py → parents[2] == src/
-    src_root = Path(__file__).resolve().parents[2]
-    sys_path = src_root / "core" / "prompts" / "ui_exec_system.txt"
-    usr_path = src_root / "core" / "prompts" / "ui_exec_user.txt"
-
+    # Prompts come from the shared registry (loaded once, not on every attempt)
     try:
-        system_prompt = sys_path.read_text(encoding="utf-8")
+        system_prompt = get_prompt("ui_exec_system").text
     except Exception:
         system_prompt = "You are a UI test failure triage assistant. Classify failures."
 
@@ -207,19 +204,16 @@ def llm_triage(state: UIExecState) -> UIExecState:
     }
 
     try:
-        user_template = ""
+        user_prompt = None
         try:
-            user_template = usr_path.read_text(encoding="utf-8")
+            user_prompt = get_prompt("ui_exec_user")
         except Exception:
             pass
 
-        if user_template.strip():
-            # Safe payload injection without str.format (which breaks on {} in the template)
+        if user_prompt is not None and user_prompt.text.strip():
+            # The registry substitutes only `{payload}`, so JSON braces in the template are safe
             payload_json = json.dumps(payload, ensure_ascii=False)
-            if "{payload}" in user_template:
-                user_content = user_template.replace("{payload}", payload_json)
-            else:
-                user_content = user_template + "\n\nPAYLOAD\n" + payload_json
+            user_content = user_prompt.render(payload=payload_json)
         else:
             # Simple fallback message
             user_content = (
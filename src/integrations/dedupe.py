@@ -1,23 +1,244 @@
+"""
+Jira dedupe store: "was this signature already filed recently?"
+
+Backed by SQLite in WAL mode (one indexed row per signature), so a lookup
+or a mark touches a single row instead of re-reading and rewriting a JSON
+file. Concurrent pipelines can share the store safely.
+
+- `claim(sig)` is an atomic check-and-set: it returns True for exactly one
+  caller per window. File the issue, then `mark_today(sig, key)`; on failure,
+  `release(sig)`. A claim left pending for longer than `DEDUPE_CLAIM_LEASE_S`
+  (its owner crashed between claim and mark/release) is taken over by the
+  next `claim`, with a warning. Wrap the Jira batch in `with holding(sigs):`
+  so live claims are refreshed and a slow batch never looks abandoned.
+- `seen_many(sigs)` / `mark_many(items)` batch the lookups and writes for a run.
+- `seen_today` / `mark_today` keep their original behavior and signatures.
+
+The dedupe window is `DEDUPE_WINDOW`: `day` (the UTC calendar day, the
+original behavior), or a rolling `<N>d` / `<N>h` (e.g. `12h`, `7d`). Rows that
+fall out of the window are deleted on write.
+
+Entries from the old `created_bugs.json` file are imported once.
+
+Environment configuration:
+- `DEDUPE_PATH` — SQLite store (default `outputs/log_analyzer/created_bugs.db`).
+- `DEDUPE_WINDOW` — `day` (default), `<N>d` or `<N>h`.
+- `DEDUPE_CLAIM_LEASE_S` — seconds before a pending claim counts as abandoned (default 300).
+"""
+
 from __future__ import annotations
-from pathlib import Path
+
 import json
-from datetime import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Set, Tuple
+
+DB_PATH = Path(os.getenv("DEDUPE_PATH") or Path("outputs") / "log_analyzer" / "created_bugs.db")
+LEGACY_JSON = Path("outputs") / "log_analyzer" / "created_bugs.json"
+DEDUPE_WINDOW = (os.getenv("DEDUPE_WINDOW") or "day").strip().lower()
+DEDUPE_CLAIM_LEASE_S = float(os.getenv("DEDUPE_CLAIM_LEASE_S") or "300")
+
+PENDING = "PENDING"  # issue key of a claim whose Jira create has not finished
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+_CONN: Optional[sqlite3.Connection] = None
+
+
+def window_start(now: Optional[float] = None, window: str = "") -> float:
+    """Epoch seconds where the current dedupe window begins."""
+    now = time.time() if now is None else now
+    window = window or DEDUPE_WINDOW
+    if window == "day":
+        day = datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        return day.timestamp()
+    unit = {"d": 86400, "h": 3600}.get(window[-1:])
+    try:
+        amount = float(window[:-1])
+    except ValueError:
+        amount = 0.0
+    if unit is None or amount <= 0:
+        raise ValueError(f"DEDUPE_WINDOW must be 'day', '<N>d' or '<N>h', got {window!r}")
+    return now - amount * unit
+
+
+def _import_legacy(conn: sqlite3.Connection) -> None:
+    if not LEGACY_JSON.exists():
+        return
+    try:
+        data = json.loads(LEGACY_JSON.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    rows = []
+    for key, issue_key in data.items():
+        day, _, signature = key.partition("|")
+        try:
+            marked = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+        rows.append((signature, str(issue_key), marked))
+    conn.executemany(
+        "INSERT INTO filed (signature, issue_key, marked) VALUES (?, ?, ?) "
+        "ON CONFLICT(signature) DO UPDATE SET issue_key = excluded.issue_key, marked = excluded.marked "
+        "WHERE excluded.marked > filed.marked",
+        rows,
+    )
+    LEGACY_JSON.rename(LEGACY_JSON.with_suffix(".json.imported"))
+
 
-CACHE = Path("outputs") / "log_analyzer" / "created_bugs.json"
-CACHE.parent.mkdir(parents=True, exist_ok=True)
+def _conn() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: transactions are explicit (BEGIN IMMEDIATE for check-and-set)
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS filed (
+                signature TEXT PRIMARY KEY,
+                issue_key TEXT NOT NULL,
+                marked REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_filed_marked ON filed(marked)")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _import_legacy(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        _CONN = conn
+    return _CONN
+
+
+def _write(conn: sqlite3.Connection, rows: Iterable[Tuple[str, str]], now: float) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO filed (signature, issue_key, marked) VALUES (?, ?, ?)",
+        [(sig, key, now) for sig, key in rows],
+    )
+    conn.execute("DELETE FROM filed WHERE marked < ?", (window_start(now),))  # expired windows
+
+
+def seen_many(signatures: Iterable[str]) -> Set[str]:
+    """The subset of `signatures` already filed in the current window."""
+    sigs = list(dict.fromkeys(signatures))
+    seen: Set[str] = set()
+    with _LOCK:
+        conn = _conn()
+        start = window_start()
+        for i in range(0, len(sigs), 500):  # stay under SQLite's bound-parameter limit
+            chunk = sigs[i : i + 500]
+            rows = conn.execute(
+                f"SELECT signature FROM filed WHERE marked >= ? AND signature IN ({','.join('?' * len(chunk))})",
+                [start, *chunk],
+            ).fetchall()
+            seen.update(r[0] for r in rows)
+    return seen
+
+
+def mark_many(items: Iterable[Tuple[str, str]]) -> None:
+    """Record (signature, issue_key) pairs as filed now, in one transaction."""
+    rows = list(items)
+    if not rows:
+        return
+    with _LOCK:
+        conn = _conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _write(conn, rows, time.time())
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def claim(signature: str, issue_key: str = PENDING) -> bool:
+    """Atomically mark `signature` unless it was filed in this window; True if we got it.
+
+    A pending claim older than `DEDUPE_CLAIM_LEASE_S` is taken over.
+    """
+    with _LOCK:
+        conn = _conn()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock: no other process can claim in between
+        try:
+            now = time.time()
+            # `marked` of a PENDING row is its claim time
+            row = conn.execute(
+                "SELECT issue_key, marked FROM filed WHERE signature = ? AND marked >= ?",
+                (signature, window_start(now)),
+            ).fetchone()
+            stale = row is not None and row[0] == PENDING and now - row[1] > DEDUPE_CLAIM_LEASE_S
+            if stale:
+                logger.warning(
+                    "Taking over the claim on %r: pending for %.0fs without being filed or released",
+                    signature, now - row[1],
+                )
+            if row is None or stale:
+                _write(conn, [(signature, issue_key)], now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return row is None or stale
+
+
+def release(signature: str) -> None:
+    """Drop a pending claim (e.g. the Jira create failed) so the next run retries."""
+    with _LOCK:
+        _conn().execute("DELETE FROM filed WHERE signature = ? AND issue_key = ?", (signature, PENDING))
+
+
+def refresh(signatures: Iterable[str]) -> None:
+    """Renew the lease of pending claims whose Jira create is still running."""
+    sigs = list(dict.fromkeys(signatures))
+    with _LOCK:
+        conn = _conn()
+        now = time.time()
+        for i in range(0, len(sigs), 500):
+            chunk = sigs[i : i + 500]
+            conn.execute(
+                f"UPDATE filed SET marked = ? WHERE issue_key = ? AND signature IN ({','.join('?' * len(chunk))})",
+                [now, PENDING, *chunk],
+            )
+
+
+@contextmanager
+def holding(signatures: Iterable[str]) -> Iterator[None]:
+    """Keep pending claims on `signatures` alive (refreshed every third of the lease) inside the block."""
+    sigs = list(signatures)
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(DEDUPE_CLAIM_LEASE_S / 3):
+            try:
+                refresh(sigs)
+            except Exception:
+                logger.exception("Could not refresh %d pending dedupe claim(s)", len(sigs))
+
+    thread = threading.Thread(target=beat, name="dedupe-lease", daemon=True) if sigs else None
+    if thread is not None:
+        thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        if thread is not None:
+            thread.join()
 
-def _today_key(signature: str) -> str:
-    day = datetime.utcnow().strftime("%Y-%m-%d")
-    return f"{day}|{signature}"
 
 def seen_today(signature: str) -> bool:
-    if not CACHE.exists(): return False
-    data = json.loads(CACHE.read_text(encoding="utf-8"))
-    return _today_key(signature) in data
+    return signature in seen_many([signature])
+
 
 def mark_today(signature: str, issue_key: str) -> None:
-    data = {}
-    if CACHE.exists():
-        data = json.loads(CACHE.read_text(encoding="utf-8"))
-    data[_today_key(signature)] = issue_key
-    CACHE.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    mark_many([(signature, issue_key)])
@@ -1,21 +1,279 @@
+"""
+Jira issue creation: one issue (`create_issue`) or many (`create_issues`).
+
+`create_issues` files a batch of issues concurrently, with a bounded worker
+pool, and returns one result per item in input order: the Jira response
+dict, or the exception for an item that failed.
+
+- Creates are retried, with jittered exponential backoff, only when Jira
+  cannot have acted on them: 429, 503, or an error while connecting. A
+  `Retry-After` header from Jira takes precedence over the computed delay.
+- A read timeout, a connection dropped after the request was sent, or a
+  502/504 may hide a created issue. Every issue therefore carries a one-off
+  `autocreate-<id>` label. The label is searched for before re-posting, and
+  a found issue is returned instead. If the search itself fails, the error is
+  raised rather than risking a duplicate.
+- When `JIRA_BULK` allows it, issues are sent in chunks of up to 50 to the
+  bulk endpoint (`POST /rest/api/3/issue/bulk`). If the server does not
+  have that endpoint (404/405/501), the batch falls back to one request per
+  issue, and later batches skip the bulk attempt.
+
+Environment configuration:
+- `JIRA_WORKERS` — concurrent create requests (default 4).
+- `JIRA_MAX_RETRIES` — retries per request after the first attempt (default 4).
+- `JIRA_BACKOFF_S` / `JIRA_BACKOFF_MAX_S` — backoff base and cap, in seconds (default 0.5 / 30).
+- `JIRA_TIMEOUT_S` — read timeout per request in seconds (default 30; the connect
+  timeout is `HTTP_CONNECT_TIMEOUT_S`, see `src.core.http_session`).
+- `JIRA_BULK` — `auto` (try the bulk endpoint, default), `1` (always) or `0` (never).
+"""
+
 from __future__ import annotations
 import os
-from typing import Any, Dict
-from src.core.utils import http_post_json
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+from urllib.parse import urlencode
+from src.core.http_session import get_json, post_json
 
 JIRA_BASE = os.getenv("JIRA_BASE", "http://localhost:4001")
 JIRA_PROJECT_KEY = os.getenv("JIRA_PROJECT_KEY", "QA")
 JIRA_BEARER = os.getenv("JIRA_BEARER") or "demo-token"
 
-def create_issue(summary: str, description: str, issuetype: str = "Bug") -> Dict[str, Any]:
-    url = f"{JIRA_BASE}/rest/api/3/issue"
-    payload = {
-        "fields": {
-            "project": {"key": JIRA_PROJECT_KEY},
-            "summary": summary,
-            "description": description,
-            "issuetype": {"name": issuetype},
-        }
+JIRA_WORKERS = int(os.getenv("JIRA_WORKERS") or "4")
+JIRA_MAX_RETRIES = int(os.getenv("JIRA_MAX_RETRIES") or "4")
+JIRA_BACKOFF_S = float(os.getenv("JIRA_BACKOFF_S") or "0.5")
+JIRA_BACKOFF_MAX_S = float(os.getenv("JIRA_BACKOFF_MAX_S") or "30")
+JIRA_TIMEOUT_S = float(os.getenv("JIRA_TIMEOUT_S") or "30")
+JIRA_BULK = os.getenv("JIRA_BULK", "auto").strip().lower()
+
+BULK_CHUNK = 50  # Jira Cloud's limit per bulk request
+LABEL_PREFIX = "autocreate-"  # one-off label used to find a create whose reply was lost
+
+_bulk_supported: Optional[bool] = None  # learned on the first bulk attempt in "auto" mode
+
+Result = Union[Dict[str, Any], Exception]
+
+
+class JiraCreateError(RuntimeError):
+    """One item of a bulk create was rejected by Jira."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def issue_fields(summary: str, description: str, issuetype: str = "Bug") -> Dict[str, Any]:
+    return {
+        "project": {"key": JIRA_PROJECT_KEY},
+        "summary": summary,
+        "description": description,
+        "issuetype": {"name": issuetype},
     }
+
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return int(status) if status else None
+
+
+def with_create_label(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """`fields` plus a unique label, so a create whose reply was lost can be found."""
+    return {**fields, "labels": [*fields.get("labels", []), f"{LABEL_PREFIX}{uuid.uuid4().hex[:16]}"]}
+
+
+def _create_label(fields: Dict[str, Any]) -> str:
+    return next((lb for lb in fields.get("labels") or [] if lb.startswith(LABEL_PREFIX)), "")
+
+
+def _is_connect_error(exc: BaseException) -> bool:
+    """True if the request failed before it was sent (refused, DNS, connect timeout)."""
+    seen = 0
+    todo: List[Any] = [exc]
+    while todo and seen < 8:
+        e = todo.pop()
+        seen += 1
+        if isinstance(e, ConnectionRefusedError):
+            return True
+        name = type(e).__name__
+        if name in ("ConnectTimeout", "ConnectTimeoutError", "NewConnectionError", "NameResolutionError"):
+            return True
+        # requests wraps urllib3's MaxRetryError, whose `reason` is the real cause
+        todo.extend(x for x in (getattr(e, "reason", None), e.__cause__, e.__context__, *getattr(e, "args", ())[:1])
+                    if isinstance(x, BaseException))
+    return False
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """True if Jira cannot have acted on the request, so sending it again is safe."""
+    status = _status_of(exc)
+    if status is not None:
+        return status in (429, 503)
+    return _is_connect_error(exc)
+
+
+def _maybe_sent(exc: BaseException) -> bool:
+    """True if the create may have landed although no reply arrived."""
+    status = _status_of(exc)
+    if status is not None:
+        return status in (502, 504)
+    name = type(exc).__name__
+    return isinstance(exc, (ConnectionError, TimeoutError)) or "ConnectionError" in name or "Timeout" in name
+
+
+def _retry_after_s(exc: BaseException) -> Optional[float]:
+    """Seconds from a `Retry-After` header (delta-seconds or HTTP date), if present."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, exc: Optional[BaseException] = None) -> float:
+    """Delay before retry number `attempt` (0-based): Retry-After, else full-jitter exponential."""
+    hinted = _retry_after_s(exc) if exc is not None else None
+    if hinted is not None:
+        return min(hinted, JIRA_BACKOFF_MAX_S)
+    return random.uniform(0, min(JIRA_BACKOFF_MAX_S, JIRA_BACKOFF_S * (2 ** attempt)))
+
+
+def _find_created(labels: Sequence[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Issues already carrying `labels` (label -> issue), or None if the search failed."""
+    jql = "labels in (%s)" % ", ".join(f'"{lb}"' for lb in labels)
+    query = urlencode({"jql": jql, "fields": "labels", "maxResults": len(labels)})
+    try:
+        res = get_json(f"{JIRA_BASE}/rest/api/3/search?{query}",
+                       headers={"Authorization": f"Bearer {JIRA_BEARER}"}, timeout=JIRA_TIMEOUT_S)
+    except Exception:
+        return None
+    wanted = set(labels)
+    found: Dict[str, Dict[str, Any]] = {}
+    for issue in res.get("issues") or []:
+        for lb in (issue.get("fields") or {}).get("labels") or []:
+            if lb in wanted:
+                found[lb] = {k: issue[k] for k in ("id", "key", "self") if k in issue}
+    return found
+
+
+def _as_reply(labels: Sequence[str], found: Dict[str, Dict[str, Any]], bulk: bool) -> Dict[str, Any]:
+    """The create reply for issues found after a lost one; missing bulk items come back as 503s."""
+    if not bulk:
+        return found[labels[0]]
+    return {
+        "issues": [found[lb] for lb in labels if lb in found],
+        "errors": [
+            {"status": 503, "failedElementNumber": i, "elementErrors": {"errors": {"create": "not found after a lost reply"}}}
+            for i, lb in enumerate(labels) if lb not in found
+        ],
+    }
+
+
+def _post(url: str, payload: Dict[str, Any], labels: Sequence[str] = (), bulk: bool = False) -> Dict[str, Any]:
+    """POST a create, re-sending only when Jira cannot have acted on the last attempt.
+
+    With `labels` (one per issue), a reply lost in flight is checked by searching
+    for them first; found issues are returned instead of creating duplicates.
+    """
     headers = {"Authorization": f"Bearer {JIRA_BEARER}"}
-    return http_post_json(url, payload, headers=headers)
\ No newline at end of file
+    for attempt in range(JIRA_MAX_RETRIES + 1):
+        try:
+            return post_json(url, payload, headers=headers, timeout=JIRA_TIMEOUT_S)
+        except Exception as e:
+            if attempt >= JIRA_MAX_RETRIES:
+                raise
+            if _is_transient(e):
+                time.sleep(backoff_delay(attempt, e))
+                continue
+            if not (labels and all(labels) and _maybe_sent(e)):
+                raise
+            time.sleep(backoff_delay(attempt, e))  # give a slow create time to become searchable
+            found = _find_created(labels)
+            if found is None:
+                raise  # cannot tell whether it was created: do not risk a duplicate
+            if found:
+                return _as_reply(labels, found, bulk)
+    raise AssertionError("unreachable")
+
+
+def create_issue(summary: str, description: str, issuetype: str = "Bug") -> Dict[str, Any]:
+    fields = with_create_label(issue_fields(summary, description, issuetype))
+    return _post(f"{JIRA_BASE}/rest/api/3/issue", {"fields": fields}, [_create_label(fields)])
+
+
+def _create_one(fields: Dict[str, Any]) -> Result:
+    try:
+        return _post(f"{JIRA_BASE}/rest/api/3/issue", {"fields": fields}, [_create_label(fields)])
+    except Exception as e:
+        return e
+
+
+def _create_chunk(fields: Sequence[Dict[str, Any]]) -> Optional[List[Result]]:
+    """Results for one bulk request, or None if the server has no bulk endpoint."""
+    global _bulk_supported
+    url = f"{JIRA_BASE}/rest/api/3/issue/bulk"
+    try:
+        res = _post(url, {"issueUpdates": [{"fields": f} for f in fields]}, [_create_label(f) for f in fields], bulk=True)
+    except Exception as e:
+        if _status_of(e) in (404, 405, 501):
+            _bulk_supported = False
+            return None
+        return [e] * len(fields)
+    _bulk_supported = True
+    failed: Dict[int, Exception] = {}
+    for err in res.get("errors") or []:
+        i = err.get("failedElementNumber")
+        if isinstance(i, int) and 0 <= i < len(fields):
+            detail = (err.get("elementErrors") or {}).get("errors") or err.get("elementErrors") or err
+            failed[i] = JiraCreateError(f"Jira bulk create rejected item {i}: {detail}", err.get("status"))
+    issues = iter(res.get("issues") or [])
+    out: List[Result] = []
+    for i in range(len(fields)):
+        if i in failed:
+            # a throttled or unavailable element is worth one more try on its own
+            out.append(_create_one(fields[i]) if _is_transient(failed[i]) else failed[i])
+        else:
+            out.append(next(issues, None) or JiraCreateError(f"Jira bulk create returned no issue for item {i}"))
+    return out
+
+
+def create_issues(
+    items: Sequence[Dict[str, Any]],
+    workers: int = 0,
+    bulk: str = "",
+) -> List[Result]:
+    """Create many issues; one response dict (or exception) per item, in input order.
+
+    Each item holds `create_issue`'s keyword arguments (`summary`,
+    `description`, optional `issuetype`). `workers` and `bulk` default to
+    `JIRA_WORKERS` and `JIRA_BULK`.
+    """
+    if not items:
+        return []
+    fields = [with_create_label(issue_fields(it["summary"], it["description"], it.get("issuetype", "Bug")))
+              for it in items]
+    workers = max(1, workers or JIRA_WORKERS)
+    bulk = bulk or JIRA_BULK
+
+    if bulk == "1" or (bulk == "auto" and _bulk_supported is not False):
+        chunks = [fields[i : i + BULK_CHUNK] for i in range(0, len(fields), BULK_CHUNK)]
+        first = _create_chunk(chunks[0])
+        if first is not None:
+            with ThreadPoolExecutor(max_workers=min(workers, max(1, len(chunks) - 1))) as pool:
+                rest = list(pool.map(_create_chunk, chunks[1:]))
+            out = list(first)
+            for chunk, part in zip(chunks[1:], rest):
+                out.extend(part if part is not None else [_create_one(f) for f in chunk])
+            return out
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(fields))) as pool:
+        return list(pool.map(_create_one, fields))
@@ -1,12 +1,66 @@
+"""
+Slack notifications: `post_message` (one direct post) and `notify` (queued).
+
+During an incident several pipelines post at once, which floods the channel
+and runs into Slack's rate limit (about one message per second per channel).
+`notify` hands the message to a `SlackDispatcher` instead:
+
+- Messages go into an outbound queue spooled in SQLite (WAL). A message
+  survives a Slack outage or a crash, and any later dispatcher flushes it
+  on recovery. Processes that share the spool also share the queue.
+- Per channel, messages that arrive within `SLACK_COALESCE_S` of the oldest
+  queued one are sent together as one digest.
+- Each channel gets at most `SLACK_RATE_PER_S` posts per second. A 429
+  pushes that channel's next post back by its `Retry-After`.
+- A digest is capped at `SLACK_MAX_CHARS`. Messages that do not fit wait
+  for the next digest; a single oversized message is truncated.
+- Failed posts (connection errors, 429, 5xx) stay queued and are retried
+  with exponential backoff. Other 4xx replies and `ok: false` errors
+  (e.g. an unknown channel) are dropped and logged.
+
+A background thread flushes due channels. At exit, `close()` sends what is
+still queued, without waiting for the coalescing window. It stops as soon as
+nothing left is claimable: messages leased by another process, backing off,
+or rate-limited past `SLACK_DRAIN_S` stay in the spool, as does anything it
+cannot deliver in time.
+
+Environment configuration:
+- `SLACK_SPOOL_PATH` — SQLite spool (default: `outputs/slack/outbox.db`).
+- `SLACK_COALESCE_S` — coalescing window in seconds (default 10; 0 sends each message on its own).
+- `SLACK_RATE_PER_S` — posts per second per channel (default 1).
+- `SLACK_MAX_CHARS` — message size cap (default 40000, Slack's `text` limit).
+- `SLACK_DRAIN_S` — how long `close()` keeps trying at exit (default 10).
+"""
+
 from __future__ import annotations
+import atexit
+import logging
 import os
-from typing import Any, Dict
-from src.core.utils import http_post_json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from src.core.http_session import post_json
+
+logger = logging.getLogger(__name__)
 
 SLACK_BASE = os.getenv("SLACK_BASE", "http://localhost:4003")
 SLACK_DEFAULT_CHANNEL = os.getenv("SLACK_DEFAULT_CHANNEL", "qa-reports")
 SLACK_BEARER = os.getenv("SLACK_BEARER") or "demo-token"
 
+SLACK_SPOOL_PATH = Path(os.getenv("SLACK_SPOOL_PATH") or Path("outputs") / "slack" / "outbox.db")
+SLACK_COALESCE_S = float(os.getenv("SLACK_COALESCE_S") or "10")
+SLACK_RATE_PER_S = float(os.getenv("SLACK_RATE_PER_S") or "1")
+SLACK_MAX_CHARS = int(os.getenv("SLACK_MAX_CHARS") or "40000")
+SLACK_DRAIN_S = float(os.getenv("SLACK_DRAIN_S") or "10")
+
+LEASE_S = 60.0  # a claimed digest whose sender died becomes claimable again after this
+MAX_BACKOFF_S = 60.0
+POLL_S = 0.25
+DIGEST_SEPARATOR = "\n\n———\n\n"
+
+
 def post_message(text: str, channel: str | None = None) -> Dict[str, Any]:
     url = f"{SLACK_BASE}/api/chat.postMessage"
     payload = {
@@ -14,4 +68,269 @@ def post_message(text: str, channel: str | None = None) -> Dict[str, Any]:
         "text": text,
     }
     headers = {"Authorization": f"Bearer {SLACK_BEARER}"}
-    return http_post_json(url, payload, headers=headers)
\ No newline at end of file
+    return post_json(url, payload, headers=headers)
+
+
+class SlackApiError(RuntimeError):
+    """Slack answered `ok: false`."""
+
+
+def truncate(text: str, max_chars: int = SLACK_MAX_CHARS) -> str:
+    """`text` cut to `max_chars`, with a note saying how much was dropped."""
+    if len(text) <= max_chars:
+        return text
+    # room for the note at its widest, so the result never exceeds max_chars
+    keep = max(0, max_chars - len(f"\n… (truncated {len(text)} chars)"))
+    return text[:keep] + f"\n… (truncated {len(text) - keep} chars)"
+
+
+def build_digest(texts: Sequence[str], max_chars: int = SLACK_MAX_CHARS) -> Tuple[str, int]:
+    """One message for the first messages of `texts` that fit; returns (text, count used).
+
+    At least one message is always used (truncated if it alone is too long).
+    """
+    if len(texts) == 1:
+        return truncate(texts[0], max_chars), 1
+    body: List[str] = []
+    size = 0
+    for text in texts:
+        added = len(text) + (len(DIGEST_SEPARATOR) if body else 0)
+        header = f":package: *{len(body) + 1} notifications*\n\n"
+        if body and len(header) + size + added > max_chars:
+            break
+        body.append(text)
+        size += added
+    if len(body) == 1:
+        return truncate(body[0], max_chars), 1
+    header = f":package: *{len(body)} notifications*\n\n"
+    return header + DIGEST_SEPARATOR.join(body), len(body)
+
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return int(status) if status else None
+
+
+def _retry_after_s(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After") or "")
+    except ValueError:
+        return None
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, SlackApiError):
+        return str(exc) == "ratelimited"
+    status = _status_of(exc)
+    return status is None or status == 429 or status >= 500
+
+
+class SlackDispatcher:
+    """Per-channel outbound queue (SQLite spool) with coalescing and rate limiting."""
+
+    def __init__(
+        self,
+        path: Path = SLACK_SPOOL_PATH,
+        coalesce_s: float = SLACK_COALESCE_S,
+        rate_per_s: float = SLACK_RATE_PER_S,
+        max_chars: int = SLACK_MAX_CHARS,
+        send: Optional[Callable[[str, str], Any]] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.coalesce_s = coalesce_s
+        self.interval_s = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        self.max_chars = max_chars
+        self.send = send or (lambda text, channel: post_message(text, channel))
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None: transactions are explicit (BEGIN IMMEDIATE to claim a digest)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    lease REAL NOT NULL DEFAULT 0,
+                    retry_at REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_channel ON outbox(channel, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS channels (channel TEXT PRIMARY KEY, next_send REAL NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, text: str, channel: Optional[str] = None) -> None:
+        """Spool `text` for `channel` (default: `SLACK_DEFAULT_CHANNEL`)."""
+        with self._lock:
+            self._db().execute(
+                "INSERT INTO outbox (channel, text, created) VALUES (?, ?, ?)",
+                (channel or SLACK_DEFAULT_CHANNEL, text, time.time()),
+            )
+        self._wake.set()
+
+    def pending(self) -> int:
+        """Messages still in the spool (any process, claimed or not)."""
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def ready(self, within_s: float = 0.0) -> int:
+        """Messages a flush can claim now (not leased by a sender, not backing off).
+
+        Channels held back by their rate limit count if it frees up within `within_s` seconds.
+        """
+        now = time.time()
+        with self._lock:
+            return self._db().execute(
+                "SELECT COUNT(*) FROM outbox o LEFT JOIN channels c ON c.channel = o.channel "
+                "WHERE o.lease <= ? AND o.retry_at <= ? AND COALESCE(c.next_send, 0) <= ?",
+                (now, now, now + within_s),
+            ).fetchone()[0]
+
+    def _claim(self, now: float, force: bool) -> List[Tuple[str, List[int], List[str]]]:
+        """Lease one digest's worth of messages for every channel that is due."""
+        batches = []
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")  # other processes' dispatchers claim from the same spool
+            try:
+                heads = conn.execute(
+                    "SELECT o.channel, MIN(o.created), COALESCE(c.next_send, 0) FROM outbox o "
+                    "LEFT JOIN channels c ON c.channel = o.channel "
+                    "WHERE o.lease <= ? AND o.retry_at <= ? GROUP BY o.channel",
+                    (now, now),
+                ).fetchall()
+                for channel, oldest, next_send in heads:
+                    if next_send > now or (not force and now - oldest < self.coalesce_s):
+                        continue
+                    rows = conn.execute(
+                        "SELECT id, text FROM outbox WHERE channel = ? AND lease <= ? AND retry_at <= ? "
+                        "ORDER BY id LIMIT 1000",
+                        (channel, now, now),
+                    ).fetchall()
+                    _, used = build_digest([t for _, t in rows], self.max_chars)
+                    ids = [i for i, _ in rows[:used]]
+                    conn.executemany("UPDATE outbox SET lease = ? WHERE id = ?", [(now + LEASE_S, i) for i in ids])
+                    conn.execute(
+                        "INSERT OR REPLACE INTO channels (channel, next_send) VALUES (?, ?)",
+                        (channel, now + self.interval_s),
+                    )
+                    batches.append((channel, ids, [t for _, t in rows[:used]]))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return batches
+
+    def _settle(self, channel: str, ids: List[int], exc: Optional[BaseException]) -> None:
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            conn = self._db()
+            now = time.time()
+            if exc is None:
+                conn.execute(f"DELETE FROM outbox WHERE id IN ({marks})", ids)
+                # Slack is reachable again: messages backing off from the outage can go now
+                conn.execute("UPDATE outbox SET retry_at = 0 WHERE retry_at > ?", (now,))
+                return
+            if not _is_transient(exc):
+                conn.execute(f"DELETE FROM outbox WHERE id IN ({marks})", ids)
+                return
+            backoff = min(MAX_BACKOFF_S, 2.0 ** min(self.failures, 16))
+            conn.execute(f"UPDATE outbox SET lease = 0, retry_at = ? WHERE id IN ({marks})", [now + backoff, *ids])
+            retry_after = _retry_after_s(exc)
+            if retry_after is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO channels (channel, next_send) VALUES (?, ?)", (channel, now + retry_after)
+                )
+
+    def flush(self, force: bool = False) -> int:
+        """Post every due digest; returns how many queued messages were delivered.
+
+        `force` ignores the coalescing window (the rate limit still applies).
+        """
+        delivered = 0
+        for channel, ids, texts in self._claim(time.time(), force):
+            text, _ = build_digest(texts, self.max_chars)
+            try:
+                res = self.send(text, channel)
+                if isinstance(res, dict) and res.get("ok") is False:
+                    raise SlackApiError(str(res.get("error") or "unknown_error"))
+            except Exception as e:
+                self._settle(channel, ids, e)
+                if _is_transient(e):
+                    self.failures += 1
+                    logger.warning("Slack post to #%s failed (%s); %d message(s) stay queued", channel, e, len(ids))
+                else:
+                    logger.error("Slack rejected a digest for #%s (%s); dropped %d message(s)", channel, e, len(ids))
+                continue
+            self._settle(channel, ids, None)
+            self.failures = 0
+            delivered += len(ids)
+        return delivered
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Slack dispatcher flush failed")
+            self._wake.wait(POLL_S)
+            self._wake.clear()
+
+    def start(self) -> "SlackDispatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="slack-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, drain_s: float = SLACK_DRAIN_S) -> None:
+        """Stop the background thread and send what is queued, for up to `drain_s` seconds."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        deadline = time.monotonic() + drain_s
+        # Messages leased by another process or backing off are left to their owner / the next run
+        while time.monotonic() < deadline and self.ready(deadline - time.monotonic()):
+            failures = self.failures
+            delivered = self.flush(force=True)
+            if self.failures > failures:
+                break  # Slack is unreachable: leave the rest in the spool for the next run
+            if not delivered:
+                time.sleep(min(POLL_S, max(0.0, deadline - time.monotonic())))
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_DISPATCHER: Optional[SlackDispatcher] = None
+_DISPATCHER_LOCK = threading.Lock()
+
+
+def get_dispatcher() -> SlackDispatcher:
+    """The process-wide dispatcher, started on first use and drained at exit."""
+    global _DISPATCHER
+    with _DISPATCHER_LOCK:
+        if _DISPATCHER is None:
+            _DISPATCHER = SlackDispatcher().start()
+            atexit.register(_DISPATCHER.close)
+        return _DISPATCHER
+
+
+def notify(text: str, channel: str | None = None) -> None:
+    """Queue `text` for `channel`; it is posted, possibly in a digest, by the dispatcher."""
+    get_dispatcher().enqueue(text, channel)
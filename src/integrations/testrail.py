@@ -1,7 +1,7 @@
 from __future__ import annotations
 import os
 from typing import Dict, Any, List
-from src.core.utils import http_post_json, http_get_json
+from src.core.http_session import get_json, post_json
 
 TESTRAIL_BASE = os.getenv("TESTRAIL_BASE", "http://localhost:4002")
 TESTRAIL_PROJECT_ID = int(os.getenv("TESTRAIL_PROJECT_ID", "1"))
@@ -33,12 +33,12 @@ def map_case_to_testrail_payload(case: Dict[str, Any]) -> Dict[str, Any]:
 def create_case(payload:Dict[str, Any], section_id: int | None = None) -> Dict[str, Any]:
     sid = section_id if section_id is not None else TESTRAIL_SECTION_ID
     url = f"{TESTRAIL_BASE}/api/v2/cases/{sid}"
-    return http_post_json(url, payload)
+    return post_json(url, payload)
 
 def list_cases(project_id: int | None = None) -> List[Dict[str, Any]]:
     pid = project_id if project_id is not None else TESTRAIL_PROJECT_ID
     url = f"{TESTRAIL_BASE}/api/v2/cases/{pid}"
-    data = http_get_json(url)
+    data = get_json(url)
     assert isinstance(data, list), "Expected list from /cases/{project_id}"
     return data
 
@@ -54,9 +54,9 @@ def add_result(
             payload["comment"] = comment
         if elapsed is not None:
             payload["elapsed"] = elapsed
-        return http_post_json(url, payload)
+        return post_json(url, payload)
 
 def get_stats(project_id: int | None = None) -> dict:
     pid = project_id if project_id is not None else TESTRAIL_PROJECT_ID
     url = f"{TESTRAIL_BASE}/api/v2/stats/{pid}"
-    return http_get_json(url)
\ No newline at end of file
+    return get_json(url)
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""Shared building blocks for the log analyzer agent and LangGraph pipeline.
+
+Both `src/agents/log_analyzer.py` and `src/graph/log_analyzer/nodes.py` use
+these modules, so the two entry points stay consistent:
+
+- `ingest` — stream lines from log files without loading them into memory.
+- `compressed` — magic-byte detection and streaming decompression (gzip, zstd, tar).
+- `patterns` — compiled line/exception patterns and the one-pass signature normalizer.
+- `formats` — format registry (standard, JSON lines, logfmt), sniffing and stack-trace joining.
+- `grouping` — single-pass aggregation of lines into signature groups.
+- `scanner` — mmap, bytes-level scanner for the standard line format.
+- `timeline` — per-group first/last seen, per-minute counts and EWMA burst detection.
+- `templates` — Drain-style template mining with masked variables and stable IDs.
+- `follow` — tail -F style incremental grouping with persisted per-file checkpoints.
+- `heavy_hitters` — bounded-memory Space-Saving grouping with exact ERROR counts.
+- `parallel` — multi-core grouping over byte ranges with mergeable partial tables.
+- `group_findings` — one LLM call per ERROR group with findings memoized across runs.
+- `packing` — fit log groups into the model's context window across one or
+  more LLM calls, and merge the per-call findings.
+"""
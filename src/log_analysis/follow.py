@@ -0,0 +1,293 @@
+"""
+Incremental (tail -F style) grouping of growing log files.
+
+`Follower` keeps one checkpoint per file:
+
+- `inode` / `dev` — identity of the file the offset belongs to
+- `size` — file size at the last poll
+- `offset` — byte position right after the last complete line consumed
+- `format` / `multiline` — the file's log format, resolved like the batch
+  path (`formats.resolve_format`) once the file has data
+- `table` — the rolling table of everything consumed so far, built by
+  `heavy_hitters.make_table` (a `SpaceSavingTable` when `capacity` > 0)
+
+Each `poll()` reads only the bytes appended since `offset`. Lines are consumed
+up to the last newline; a trailing partial line waits for the next poll. In a
+multiline file the last event is held back too (its stack trace may still be
+growing) until the next event starts or a poll finds the file unchanged.
+
+- Truncation (same inode, size < offset, e.g. `copytruncate`): restart at 0.
+- Rotation (the path now has a different inode): the old file's remaining
+  bytes are drained through the still-open handle, then the new file is read
+  from 0. After a restart, the rotated file is found as `<path>.1` when its
+  inode matches the checkpoint.
+
+Checkpoints are written atomically as JSON, so a restarted follower resumes
+where it stopped instead of re-reading gigabytes from byte 0. A checkpoint
+written with another signature mode, format or capacity is discarded.
+
+Compressed and tar inputs cannot be followed (there is no byte offset to
+resume from); `poll()` raises `ValueError` for them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional
+
+from .compressed import is_special
+from .formats import FORMATS, join_multiline, resolve_format
+from .grouping import GroupTable, ParseFn, SignatureFn, parse_line_stripped, prefix_signature
+from .heavy_hitters import load_table, make_table
+from .ingest import PathLike, decode_line
+from .scanner import add_block
+
+READ_BYTES = 8 * 1024 * 1024
+MAX_PARTIAL_BYTES = 1024 * 1024  # a "line" longer than this is consumed without its newline
+
+
+class FileCheckpoint:
+    """Follow position and rolling groups for one path."""
+
+    def __init__(
+        self,
+        table: GroupTable,
+        inode: int = 0,
+        dev: int = 0,
+        size: int = 0,
+        offset: int = 0,
+        fmt: str = "",
+        multiline: bool = False,
+    ) -> None:
+        self.inode = inode
+        self.dev = dev
+        self.size = size
+        self.offset = offset
+        self.fmt = fmt  # "" until the file has data to sniff
+        self.multiline = multiline
+        self.table = table
+
+    def to_dict(self) -> Dict:
+        return {"inode": self.inode, "dev": self.dev, "size": self.size, "offset": self.offset,
+                "format": self.fmt, "multiline": self.multiline, "table": self.table.to_dict()}
+
+
+class Follower:
+    """Groups only the appended bytes of each file across polls and restarts."""
+
+    def __init__(
+        self,
+        paths: Iterable[PathLike],
+        checkpoint_path: Optional[PathLike] = None,
+        signature_fn: SignatureFn = prefix_signature,
+        parse_fn: Optional[ParseFn] = None,
+        mode: str = "",
+        fmt: str = "auto",
+        capacity: int = 0,
+    ) -> None:
+        if fmt != "auto" and fmt not in FORMATS:
+            raise ValueError(f"Unknown log format {fmt!r}; expected auto or one of {sorted(FORMATS)}")
+        self.paths = [str(p) for p in paths]
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.signature_fn = signature_fn
+        self.parse_fn = parse_fn  # replaces the parser for `standard` files, like `group_logs`
+        self.mode = mode
+        self.fmt = fmt
+        self.capacity = capacity
+        self.files: Dict[str, FileCheckpoint] = {}
+        self._handles: Dict[str, BinaryIO] = {}
+        self._load()
+
+    # ---- checkpoint ----
+    def _identity(self) -> Dict:
+        """Settings a checkpoint's tables depend on; a mismatch discards them."""
+        return {"mode": self.mode, "format": self.fmt, "capacity": self.capacity}
+
+    def _parser(self, fmt: str) -> ParseFn:
+        if fmt == "standard" and self.parse_fn is not None:
+            return self.parse_fn
+        return FORMATS[fmt]
+
+    def _new(self) -> FileCheckpoint:
+        # The parser is set once the file's format is known (`_resolve`)
+        return FileCheckpoint(make_table(self.signature_fn, parse_line_stripped, self.capacity))
+
+    def _load(self) -> None:
+        data: Dict = {}
+        if self.checkpoint_path and self.checkpoint_path.exists():
+            try:
+                data = json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+        same = all(data.get(k, "" if k != "capacity" else 0) == v for k, v in self._identity().items())
+        saved = (data.get("files") or {}) if same else {}
+        for p in self.paths:
+            item = saved.get(p)
+            fmt = str((item or {}).get("format") or "")
+            if not item or (fmt and fmt not in FORMATS):
+                self.files[p] = self._new()
+                continue
+            parse_fn = self._parser(fmt) if fmt else parse_line_stripped
+            table = load_table(item.get("table") or {}, self.signature_fn, parse_fn, self.capacity)
+            self.files[p] = FileCheckpoint(
+                table, int(item.get("inode") or 0), int(item.get("dev") or 0),
+                int(item.get("size") or 0), int(item.get("offset") or 0),
+                fmt, bool(item.get("multiline")),
+            )
+
+    def save(self) -> None:
+        if self.checkpoint_path is None:
+            return
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.checkpoint_path.with_suffix(self.checkpoint_path.suffix + ".tmp")
+        payload = {"version": 2, **self._identity(), "files": {p: cp.to_dict() for p, cp in self.files.items()}}
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.checkpoint_path)
+
+    # ---- reading ----
+    def _resolve(self, path: str, cp: FileCheckpoint, size: int) -> bool:
+        """Pick the file's format on first data, like the batch path; False while it is empty."""
+        if cp.fmt:
+            return True
+        if size == 0:
+            return False
+        if is_special(path):
+            raise ValueError(f"Cannot follow compressed or archived log {path}; analyze it without --follow")
+        lf = resolve_format(path, self.fmt)
+        cp.fmt, cp.multiline = lf.name, lf.multiline
+        cp.table.parse_fn = self._parser(lf.name)
+        return True
+
+    def _add(self, cp: FileCheckpoint, block: bytes) -> None:
+        if cp.multiline:
+            lines = [decode_line(raw) for raw in block.split(b"\n")]
+            if lines[-1] == "":
+                lines.pop()  # the block ends with a newline
+            cp.table.add_all(join_multiline(lines, cp.table.parse_fn))
+        else:
+            add_block(cp.table, block)  # falls back to `table.add` for non-scannable parsers
+
+    def _event_end(self, cp: FileCheckpoint, data: bytes, cut: int) -> int:
+        """Where the last (possibly still growing) event in `data[:cut]` starts."""
+        start = cut
+        while start > 0:
+            prev = data.rfind(b"\n", 0, start - 1) + 1
+            line = decode_line(data[prev:start])
+            start = prev
+            if cp.table.parse_fn(line) is not None:
+                break
+        if cut - start > MAX_PARTIAL_BYTES:
+            return cut  # a runaway event is consumed rather than held forever
+        return start
+
+    def _read(self, fh: BinaryIO, cp: FileCheckpoint, final: bool = False, flush: bool = False) -> int:
+        """Consume complete lines from `cp.offset`.
+
+        In a multiline file the last event waits unless `flush` is set.
+        `final` also takes a trailing partial line (implies `flush`).
+        """
+        before = cp.table.total_lines
+        fh.seek(cp.offset)
+        pending = b""
+        while True:
+            chunk = fh.read(READ_BYTES)
+            if not chunk:
+                break
+            data = pending + chunk
+            cut = data.rfind(b"\n") + 1
+            if cut == 0 and len(data) > MAX_PARTIAL_BYTES:
+                cut = len(data)
+            if cut and cp.multiline:
+                cut = self._event_end(cp, data, cut)
+            if cut:
+                self._add(cp, data[:cut])
+                cp.offset += cut
+            pending = data[cut:]
+        if pending and (flush or final):
+            cut = len(pending) if final else pending.rfind(b"\n") + 1
+            if cut:
+                self._add(cp, pending[:cut])
+                cp.offset += cut
+        return cp.table.total_lines - before
+
+    def _close(self, path: str) -> None:
+        fh = self._handles.pop(path, None)
+        if fh is not None:
+            fh.close()
+
+    def _resume_rotated(self, path: str, cp: FileCheckpoint) -> int:
+        """After a restart: finish the checkpointed file if it was rotated to `<path>.1`."""
+        rotated = Path(path + ".1")
+        try:
+            st = rotated.stat()
+        except OSError:
+            return 0
+        if st.st_ino != cp.inode or st.st_dev != cp.dev or st.st_size < cp.offset:
+            return 0
+        with rotated.open("rb") as fh:
+            return self._read(fh, cp, final=True)
+
+    def poll(self) -> int:
+        """Consume newly appended lines of every path; returns how many were read."""
+        new_lines = 0
+        for path in self.paths:
+            cp = self.files[path]
+            try:
+                st = os.stat(path)
+            except OSError:
+                st = None
+            fh = self._handles.get(path)
+            if fh is not None and (st is None or st.st_ino != cp.inode or st.st_dev != cp.dev):
+                # Rotated (or removed): drain the old file through the open handle
+                new_lines += self._read(fh, cp, final=True)
+                self._close(path)
+                fh = None
+                cp.inode = cp.offset = 0
+            if st is None:
+                continue
+            if fh is None:
+                try:
+                    fh = open(path, "rb")
+                except OSError:
+                    continue
+                st = os.fstat(fh.fileno())  # the file we actually opened
+                if cp.inode and (st.st_ino != cp.inode or st.st_dev != cp.dev):
+                    new_lines += self._resume_rotated(path, cp)
+                    cp.offset = 0
+                self._handles[path] = fh
+                cp.inode, cp.dev = st.st_ino, st.st_dev
+            if st.st_size < cp.offset:
+                cp.offset = 0  # truncated in place
+            if not self._resolve(path, cp, st.st_size):
+                continue
+            # No growth since the last poll: a held-back multiline event is complete
+            idle = st.st_size == cp.size
+            cp.size = st.st_size
+            if st.st_size > cp.offset:
+                new_lines += self._read(fh, cp, flush=idle)
+        return new_lines
+
+    # ---- results ----
+    def table(self) -> GroupTable:
+        """All files' rolling tables merged in path order."""
+        merged = make_table(self.signature_fn, parse_line_stripped, self.capacity)
+        for path in self.paths:
+            merged.merge(self.files[path].table)
+        return merged
+
+    def close(self) -> None:
+        for path in list(self._handles):
+            self._close(path)
+
+    def __enter__(self) -> "Follower":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def follow_paths(paths: List[str]) -> List[str]:
+    """Normalize CLI paths once, so checkpoint keys are stable across runs."""
+    return [str(Path(p).resolve()) for p in paths]
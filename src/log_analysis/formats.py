@@ -0,0 +1,221 @@
+"""
+Pluggable log formats with auto-detection.
+
+A format is a name plus a module-level `ParseFn` (line -> (ts, level, msg) or
+None, picklable for worker processes). Three are registered:
+
+- `standard` — 'YYYY-MM-DD HH:MM:SS [LEVEL] message' (see `patterns.LOG_LINE_RE`),
+  grouped through the mmap scanner
+- `jsonl` — one JSON object per line; timestamp/level/message are read from
+  the usual keys (`ts`/`time`/`@timestamp`, `level`/`severity`, `msg`/`message`).
+  Decoded with `orjson` when it is installed, else the stdlib `json`.
+- `logfmt` — `key=value` pairs (`ts=... level=error msg="..."`)
+
+`register_format` adds more. `sniff_lines` picks the format that parses the
+most of the first `SNIFF_LINES` non-empty lines. It also notices stack
+traces: lines that no parser accepts, following an event line, and shaped
+like a trace (indented frames, `at ...`, `Traceback`, `Caused by`,
+`SomeError: ...`). Those must make up at least half of the unparsed lines,
+so a stray garbage line does not turn a file multiline (which forces serial
+grouping).
+
+For those files, `join_multiline` attaches each continuation line to the
+event before it (newline-joined). A stack trace then counts as part of its
+parent event instead of as unparsed lines, and it shows up in the group's
+examples. Parsers only read an event's first line.
+
+`group_logs` sniffs every input and groups each run of same-format files
+with `parallel.group_files_parallel`. Multi-line text is grouped serially,
+because byte ranges could split a trace.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .grouping import GroupTable, ParseFn, SignatureFn, parse_line_stripped, prefix_signature
+from .heavy_hitters import make_table
+from .ingest import PathLike, iter_lines
+from .parallel import group_files_parallel
+from .patterns import canonical_level
+
+try:  # optional: several times faster than the stdlib decoder
+    import orjson
+
+    _loads: Callable[[str], object] = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+SNIFF_LINES = 50
+# Lines that look like part of a stack trace rather than stray text
+CONTINUATION_RE = re.compile(
+    r"^(?:\s+\S|at\s|Traceback\b|Caused by\b|\.\.\.\s*\d+\s+more|[\w.$]*(?:Exception|Error|Throwable)\b)"
+)
+MIN_CONTINUATION_SHARE = 0.5  # trace-shaped share of unparsed lines needed to sniff multiline
+MAX_CONTINUATION_LINES = 200  # longer traces are cut; the rest count as unparsed lines
+
+_TS_KEYS = ("ts", "time", "timestamp", "@timestamp", "datetime", "asctime")
+_LEVEL_KEYS = ("level", "severity", "levelname", "lvl", "log.level")
+_MSG_KEYS = ("msg", "message", "event", "log")
+
+
+class LogFormat(NamedTuple):
+    name: str
+    parse_fn: ParseFn
+    multiline: bool = False
+
+
+FORMATS: Dict[str, ParseFn] = {}
+
+
+def register_format(name: str, parse_fn: ParseFn) -> ParseFn:
+    """Register (or replace) a format; earlier registrations win ties when sniffing."""
+    FORMATS[name] = parse_fn
+    return parse_fn
+
+
+def _first(record: Dict, keys: Tuple[str, ...]) -> str:
+    for key in keys:
+        value = record.get(key)
+        if value is not None and value != "":
+            return str(value)
+    return ""
+
+
+def _record_tuple(record: Dict) -> Optional[Tuple[str, str, str]]:
+    msg = _first(record, _MSG_KEYS)
+    level = _first(record, _LEVEL_KEYS)
+    if not msg and not level:
+        return None
+    # ISO 'T' timestamps stay as-is: timelines read minute fields by position
+    return _first(record, _TS_KEYS), canonical_level(level or "INFO"), msg.strip()
+
+
+def parse_json_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """Parse one JSON-lines record into (ts, level, msg); non-objects are rejected."""
+    line = line.partition("\n")[0].strip()
+    if not line.startswith("{"):
+        return None
+    try:
+        record = _loads(line)
+    except ValueError:  # orjson.JSONDecodeError is a ValueError too
+        return None
+    return _record_tuple(record) if isinstance(record, dict) else None
+
+
+_LOGFMT_RE = re.compile(r'([\w.@-]+)=("(?:[^"\\]|\\.)*"|\S*)')
+
+
+def parse_logfmt_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """Parse a logfmt line (`key=value`, values optionally double-quoted) into (ts, level, msg)."""
+    line = line.partition("\n")[0]
+    if "=" not in line:
+        return None
+    record: Dict[str, str] = {}
+    for key, value in _LOGFMT_RE.findall(line):
+        if value.startswith('"'):
+            value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+        record[key] = value
+    if not record.get("level") and not record.get("msg"):
+        return None
+    return _record_tuple(record)
+
+
+register_format("standard", parse_line_stripped)
+register_format("jsonl", parse_json_line)
+register_format("logfmt", parse_logfmt_line)
+
+
+def sniff_lines(lines: Iterable[str], sample: int = SNIFF_LINES) -> LogFormat:
+    """Best-matching registered format for the first `sample` non-empty lines.
+
+    Falls back to `standard` when nothing parses.
+    """
+    head = list(islice((line for line in lines if line.strip()), sample))
+    best, best_hits, best_hit_mask = "standard", 0, [False] * len(head)
+    for name, parse_fn in FORMATS.items():
+        mask = [parse_fn(line) is not None for line in head]
+        hits = sum(mask)
+        if hits > best_hits:
+            best, best_hits, best_hit_mask = name, hits, mask
+    # Unparsed lines after the first event are continuations when they look like stack traces
+    first = next((i for i, hit in enumerate(best_hit_mask) if hit), len(head))
+    unparsed = [line for line, hit in zip(head[first:], best_hit_mask[first:]) if not hit]
+    shaped = sum(1 for line in unparsed if CONTINUATION_RE.match(line))
+    multiline = best != "jsonl" and shaped > 0 and shaped >= MIN_CONTINUATION_SHARE * len(unparsed)
+    return LogFormat(best, FORMATS[best], multiline)
+
+
+def sniff_path(path: PathLike, sample: int = SNIFF_LINES) -> LogFormat:
+    lines = iter_lines([path])
+    try:
+        return sniff_lines(lines, sample)
+    finally:
+        lines.close()
+
+
+def join_multiline(lines: Iterable[str], parse_fn: ParseFn, max_lines: int = MAX_CONTINUATION_LINES) -> Iterator[str]:
+    """Yield events: each line that `parse_fn` accepts, plus the lines after it that it rejects."""
+    event: List[str] = []
+    for line in lines:
+        starts_event = parse_fn(line) is not None
+        if not starts_event and event and len(event) <= max_lines:
+            event.append(line)
+            continue
+        if event:
+            yield "\n".join(event)
+        if starts_event:
+            event = [line]
+        else:
+            event = []
+            yield line  # before the first event, or past the continuation cap
+    if event:
+        yield "\n".join(event)
+
+
+def resolve_format(path: PathLike, fmt: str = "auto") -> LogFormat:
+    """Format of `path`: sniffed for `auto`, else `fmt` (still checked for stack traces)."""
+    if fmt == "auto":
+        return sniff_path(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown log format {fmt!r}; expected auto or one of {sorted(FORMATS)}")
+    # An explicit format still checks for stack traces
+    sniffed = sniff_path(path)
+    multiline = fmt != "jsonl" and sniffed.name == fmt and sniffed.multiline
+    return LogFormat(fmt, FORMATS[fmt], multiline)
+
+
+def group_logs(
+    paths: Iterable[PathLike],
+    signature_fn: SignatureFn = prefix_signature,
+    fmt: str = "auto",
+    workers: Optional[int] = None,
+    capacity: int = 0,
+    parse_fn: Optional[ParseFn] = None,
+) -> GroupTable:
+    """Group `paths`, each parsed with its own (sniffed or given) format.
+
+    `parse_fn` replaces the parser for `standard` files (e.g. a text-path twin
+    that skips the mmap scanner). Results are merged in input order.
+    """
+    runs: List[Tuple[LogFormat, List[str]]] = []
+    for p in paths:
+        lf = resolve_format(p, fmt)
+        if lf.name == "standard" and parse_fn is not None:
+            lf = lf._replace(parse_fn=parse_fn)
+        if runs and runs[-1][0] == lf and not lf.multiline:
+            runs[-1][1].append(str(p))
+        else:
+            runs.append((lf, [str(p)]))
+    table = make_table(signature_fn, parse_fn or parse_line_stripped, capacity)
+    for lf, run in runs:
+        if lf.multiline:
+            part = make_table(signature_fn, lf.parse_fn, capacity)
+            part.add_all(join_multiline(iter_lines(run), lf.parse_fn))
+        else:
+            part = group_files_parallel(run, workers, signature_fn, lf.parse_fn, capacity=capacity)
+        table.merge(part)
+    return table
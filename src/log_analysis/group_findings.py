@@ -0,0 +1,207 @@
+"""
+Per-group LLM analysis with memoized findings.
+
+The single-call and packed modes send many groups per request: latency grows
+with the payload, and one malformed JSON reply loses every group in it.
+`analyze_error_groups` instead sends each ERROR group in its own request
+(fanned out concurrently by the caller's `chat_many`) and merges the
+replies into the usual `{"groups": [...], "summary": {...}}` findings.
+
+Each group's LLM-written fields (`probable_root_cause`, `recommendation`,
+...) are memoized in SQLite under a key of:
+
+- the template ID (or signature) of the group,
+- the set of exception names in its examples,
+- the prompt version (so editing a prompt invalidates old answers).
+
+A signature that recurs on later runs is served from the memo, and only
+new signatures reach the model. Counts, levels and examples always come from
+the current run, never from the memo. Failed or unparseable replies are not
+memoized; those groups are still reported, without an analysis.
+
+Environment configuration:
+- `LOG_FINDINGS_MEMO_PATH` — SQLite file (default: `outputs/log_analyzer/group_findings.db`).
+- `LOG_FINDINGS_MEMO_TTL_S` — entry lifetime in seconds (default: 30 days).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .packing import PAYLOAD_FIELDS, merge_findings, parse_findings, prioritize
+from .patterns import exceptions_in
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path("outputs") / "log_analyzer" / "group_findings.db"
+DEFAULT_TTL_S = 30 * 24 * 3600.0
+MAX_GROUPS = 20
+
+# Fields that describe this run's data; everything else in an LLM group is analysis
+LOCAL_FIELDS = ("signature", "template_id") + tuple(f for f in PAYLOAD_FIELDS if f != "signature")
+
+Messages = List[Dict[str, str]]
+
+
+def memo_key(group: Dict, prompt_version: str) -> str:
+    """Stable key for (template ID or signature, exception set, prompt version)."""
+    ident = group.get("template_id") or group.get("signature") or ""
+    exceptions = sorted(group.get("exceptions") or exceptions_in(group.get("examples") or []))
+    blob = json.dumps([ident, exceptions, prompt_version], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class FindingsMemo:
+    """SQLite (WAL) store of per-group analysis, keyed by `memo_key`."""
+
+    def __init__(self, path: Optional[Path] = DEFAULT_PATH, ttl_s: float = DEFAULT_TTL_S) -> None:
+        self.path = Path(path) if path else None
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS group_findings (
+                    key TEXT PRIMARY KEY,
+                    signature TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict]:
+        """Unexpired entries for `keys` (missing keys are left out)."""
+        out: Dict[str, Dict] = {}
+        if not keys:
+            return out
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return out
+            for i in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+                chunk = keys[i : i + 500]
+                rows = db.execute(
+                    f"SELECT key, value, created FROM group_findings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, value, created in rows:
+                    if now - created <= self.ttl_s:
+                        out[key] = json.loads(value)
+        return out
+
+    def put_many(self, items: List[Tuple[str, str, Dict]]) -> None:
+        """Store (key, signature, analysis) rows and drop expired ones."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return
+            db.executemany(
+                "INSERT OR REPLACE INTO group_findings (key, signature, value, created) VALUES (?, ?, ?, ?)",
+                [(key, sig, json.dumps(value, ensure_ascii=False), now) for key, sig, value in items],
+            )
+            db.execute("DELETE FROM group_findings WHERE created < ?", (now - self.ttl_s,))
+            db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def default_memo() -> FindingsMemo:
+    return FindingsMemo(
+        path=Path(os.getenv("LOG_FINDINGS_MEMO_PATH") or DEFAULT_PATH),
+        ttl_s=float(os.getenv("LOG_FINDINGS_MEMO_TTL_S") or DEFAULT_TTL_S),
+    )
+
+
+def _analysis_of(reply: Any, group: Dict) -> Optional[Dict]:
+    """The LLM-written fields for `group` from one reply, or None if unusable."""
+    if not isinstance(reply, str):
+        return None
+    part = parse_findings(reply)
+    llm_groups = [g for g in (part or {}).get("groups") or [] if isinstance(g, dict)]
+    if not llm_groups:
+        return None
+    match = next((g for g in llm_groups if g.get("signature") == group.get("signature")), llm_groups[0])
+    analysis = {k: v for k, v in match.items() if k not in LOCAL_FIELDS}
+    return analysis or None
+
+
+def analyze_error_groups(
+    groups: List[Dict],
+    total_events: int,
+    build_messages: Callable[[Dict], Messages],
+    chat_many: Callable[[List[Messages]], List[Any]],
+    prompt_version: str,
+    memo: Optional[FindingsMemo] = None,
+    max_groups: int = MAX_GROUPS,
+) -> Dict:
+    """One LLM request per ERROR group (memo misses only), merged into findings.
+
+    `build_messages(group)` returns the chat messages for one group, and
+    `chat_many(batches)` runs them concurrently, returning a reply string or
+    an exception per batch in input order.
+    """
+    error_groups = [g for g in prioritize(groups) if int((g.get("levels") or {}).get("ERROR", 0) or 0) > 0]
+    error_groups = error_groups[:max_groups]
+    for g in error_groups:
+        exs = exceptions_in(g.get("examples") or [])
+        if exs:
+            g["exceptions"] = exs
+    keys = [memo_key(g, prompt_version) for g in error_groups]
+    cached = memo.get_many(keys) if memo is not None else {}
+
+    todo = [i for i, key in enumerate(keys) if key not in cached]
+    replies = chat_many([build_messages(error_groups[i]) for i in todo]) if todo else []
+    fresh: Dict[int, Dict] = {}
+    for i, reply in zip(todo, replies):
+        analysis = _analysis_of(reply, error_groups[i])
+        if analysis is None:
+            logger.warning("No usable LLM analysis for group %r", error_groups[i].get("signature"))
+            continue
+        fresh[i] = analysis
+    if memo is not None:
+        memo.put_many([(keys[i], str(error_groups[i].get("signature", "")), a) for i, a in fresh.items()])
+
+    parts = []
+    for i, g in enumerate(error_groups):
+        analysis = cached.get(keys[i]) or fresh.get(i) or {}
+        merged = {k: g[k] for k in LOCAL_FIELDS if k in g}
+        merged.update(analysis)
+        parts.append({"groups": [merged],
+                      "summary": {"top_signatures": [g.get("signature")]}})
+    findings = merge_findings(parts, groups, total_events)
+    hits = len(error_groups) - len(todo)
+    findings["summary"]["short_summary"] = (
+        f"{len(error_groups)} error signature(s) analyzed: {hits} from memo, "
+        f"{len(fresh)} by the model, {len(todo) - len(fresh)} without a usable reply."
+    )
+    findings["summary"]["llm_calls"] = len(todo)
+    logger.info("Per-group analysis: %d group(s), %d memo hit(s), %d LLM call(s)", len(error_groups), hits, len(todo))
+    return findings
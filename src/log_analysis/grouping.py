@@ -0,0 +1,168 @@
+"""
+Single-pass grouping of log lines into signatures.
+
+`GroupTable` consumes lines one at a time (from a generator) and keeps only
+the aggregate per signature: total count, per-level counts and the first 3
+example lines. This is the only per-run state that needs to live in the
+LangGraph state, regardless of how large the input logs are.
+
+Each signature also has a `timeline.Timeline` (first/last seen and per-minute
+counts). `to_list()` turns it into `first_seen`, `last_seen`, `peak_per_min`
+and `bursts` fields on the group.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .patterns import LEVELS, LOG_LINE_RE
+from .timeline import Timeline, annotate
+
+MAX_EXAMPLES = 3
+
+ParseFn = Callable[[str], Optional[Tuple[str, str, str]]]
+SignatureFn = Callable[[str], str]
+
+
+def parse_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """Parse 'YYYY-MM-DD HH:MM:SS [LEVEL] message' into (ts, canonical level, msg)."""
+    m = LOG_LINE_RE.match(line)
+    if not m:
+        return None
+    return m.group("ts"), LEVELS[m.group("level")], m.group("msg")
+
+
+def parse_line_stripped(line: str) -> Optional[Tuple[str, str, str]]:
+    """Like `parse_line`, with surrounding whitespace stripped from the message."""
+    parsed = parse_line(line)
+    if parsed is None:
+        return None
+    return parsed[0], parsed[1], parsed[2].strip()
+
+
+def prefix_signature(msg: str, max_tokens: int = 4) -> str:
+    """First `max_tokens` lowercase words of the message (graph pipeline signature)."""
+    tokens = msg.lower().split()[:max_tokens]
+    return " ".join(tokens) if tokens else msg[:32]
+
+
+class GroupTable:
+    """Streaming aggregate of log lines keyed by signature."""
+
+    # Group dicts live for the whole run, so scanners may cache them per message
+    MEMO_SAFE = True
+
+    def __init__(self, signature_fn: SignatureFn = prefix_signature, parse_fn: ParseFn = parse_line) -> None:
+        self.signature_fn = signature_fn
+        self.parse_fn = parse_fn
+        self.groups: Dict[str, Dict] = {}
+        self.timelines: Dict[str, Timeline] = {}
+        self.total_lines = 0
+        self.parsed_lines = 0
+
+    def add(self, line: str) -> None:
+        self.total_lines += 1
+        parsed = self.parse_fn(line)
+        if not parsed:
+            return
+        ts, level, msg = parsed
+        self.add_record(level, msg, line, ts)
+
+    def add_record(self, level: str, msg: str, line: Union[str, bytes], ts: str = "") -> None:
+        """Count one already-parsed line (the caller has counted it in `total_lines`).
+
+        `line` may be the raw bytes line: it is decoded only if it becomes one
+        of the group's examples.
+        """
+        self.parsed_lines += 1
+        sig = self.signature_fn(msg)
+        g = self.group_for(sig)
+        if ts:
+            self.timeline_for(sig).add(ts)
+        g["count"] += 1
+        g["levels"][level] = g["levels"].get(level, 0) + 1
+        if len(g["examples"]) < MAX_EXAMPLES:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8", "replace")
+            g["examples"].append(line)
+
+    def group_for(self, sig: str) -> Dict:
+        """The group dict for `sig`, created empty on first use."""
+        g = self.groups.get(sig)
+        if g is None:
+            g = {"signature": sig, "count": 0, "levels": {"INFO": 0, "WARN": 0, "ERROR": 0}, "examples": []}
+            self.groups[sig] = g
+        return g
+
+    def timeline_for(self, sig: str) -> Timeline:
+        tl = self.timelines.get(sig)
+        if tl is None:
+            tl = self.timelines[sig] = Timeline()
+        return tl
+
+    def add_all(self, lines: Iterable[str]) -> "GroupTable":
+        for line in lines:
+            self.add(line)
+        return self
+
+    def merge(self, other: "GroupTable") -> "GroupTable":
+        """Fold `other` (the table for input that comes *after* this one) into self.
+
+        Counts and level counts are summed and examples are topped up to 3 in
+        order, and signatures first seen in `other` are appended after ours.
+        Merging partial tables left to right therefore reproduces the serial
+        result exactly, including tie order in `to_list()`.
+        """
+        for sig, og in other.groups.items():
+            g = self.groups.get(sig)
+            if g is None:
+                self.groups[sig] = {
+                    "signature": og["signature"],
+                    "count": og["count"],
+                    "levels": dict(og["levels"]),
+                    "examples": list(og["examples"]),
+                }
+                continue
+            g["count"] += og["count"]
+            for level, n in og["levels"].items():
+                g["levels"][level] = g["levels"].get(level, 0) + n
+            room = MAX_EXAMPLES - len(g["examples"])
+            if room > 0:
+                g["examples"].extend(og["examples"][:room])
+        for sig, otl in other.timelines.items():
+            self.timeline_for(sig).merge(otl)
+        self.total_lines += other.total_lines
+        self.parsed_lines += other.parsed_lines
+        return self
+
+    def count_error(self, sig: str) -> int:
+        """How much the count of `sig` may be overestimated (always 0: counts are exact)."""
+        return 0
+
+    def bounds(self) -> Dict:
+        """Accuracy of the counts, for the findings summary."""
+        return {"mode": "exact", "max_count_error": 0}
+
+    def to_dict(self) -> Dict:
+        """JSON-friendly state (for checkpoints); signature/parse functions are not included."""
+        return {
+            "groups": self.groups,
+            "timelines": {sig: tl.to_dict() for sig, tl in self.timelines.items()},
+            "total_lines": self.total_lines,
+            "parsed_lines": self.parsed_lines,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, signature_fn: SignatureFn = prefix_signature, parse_fn: ParseFn = parse_line) -> "GroupTable":
+        table = cls(signature_fn, parse_fn)
+        table.groups = {str(sig): g for sig, g in (data.get("groups") or {}).items()}
+        table.timelines = {str(sig): Timeline.from_dict(t) for sig, t in (data.get("timelines") or {}).items()}
+        table.total_lines = int(data.get("total_lines") or 0)
+        table.parsed_lines = int(data.get("parsed_lines") or 0)
+        return table
+
+    def to_list(self) -> List[Dict]:
+        """Groups sorted by count, highest first (stable for ties: first seen first)."""
+        for sig, g in self.groups.items():
+            annotate(g, self.timelines.get(sig))
+        return sorted(self.groups.values(), key=lambda x: x["count"], reverse=True)
@@ -0,0 +1,279 @@
+"""
+Bounded-memory heavy-hitter grouping (Space-Saving).
+
+With noisy logs the number of distinct signatures grows without limit, and an
+exact `GroupTable` keeps a group (examples, levels, timeline) for every one.
+`SpaceSavingTable` is a drop-in `GroupTable` whose non-ERROR signatures live
+in a Space-Saving summary of at most `capacity` groups:
+
+- A new signature that arrives while the summary is full evicts the group
+  with the smallest count `m`. The newcomer starts at `m + 1` with
+  `count_error = m` (its count may be overestimated by at most that much).
+- Any signature seen at ERROR level is pinned: from then on it is never
+  evicted and every line is counted, so its ERROR count (what Jira tickets
+  are filed on) is exact. If the signature was not in the summary when it
+  was pinned (evicted earlier, or dropped by a merge), it inherits
+  `unlisted_max()` as both count and `count_error`, exactly like a newcomer
+  to the summary, so `count` stays an upper bound on its total.
+- Pinning frees summary slots, so the summary can stop being full after it
+  has evicted. `unlisted_max()` therefore also keeps the highest count ever
+  evicted (or dropped by a merge), and newcomers inherit it too.
+
+Guarantees for the summary part (N = non-ERROR lines, k = capacity): every
+reported count is an upper bound within `count_error <= N / k` of the true
+count, and every signature with a true count above N / k is present.
+
+Counts are kept in a stream-summary layout (count -> insertion-ordered
+signatures), so increments and evictions are O(1) and eviction order is
+deterministic. Partial tables merge with the mergeable-summary rule: a key
+missing from one side is charged that side's minimum count.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Union
+
+from .grouping import MAX_EXAMPLES, GroupTable, ParseFn, SignatureFn, parse_line, prefix_signature
+
+
+class SpaceSavingTable(GroupTable):
+    """`GroupTable` with at most `capacity` approximate (non-ERROR) groups."""
+
+    # Groups can be evicted, so scanners must not cache group dicts across lines
+    MEMO_SAFE = False
+
+    def __init__(
+        self,
+        signature_fn: SignatureFn = prefix_signature,
+        parse_fn: ParseFn = parse_line,
+        capacity: int = 1000,
+    ) -> None:
+        super().__init__(signature_fn, parse_fn)
+        self.capacity = max(1, int(capacity))
+        self.exact: Dict[str, None] = {}  # signatures pinned by an ERROR line
+        self.errors: Dict[str, int] = {}  # signature -> max overestimate of its count
+        self._buckets: Dict[int, Dict[str, None]] = {}  # count -> summary signatures (ordered)
+        self._min = 0
+        self._merged_floor = 0  # unlisted bound carried over from merged tables
+        self._evicted_max = 0  # highest count evicted or dropped so far
+        self.evictions = 0
+
+    # ---- stream summary ----
+    def _tracked(self) -> int:
+        return len(self.groups) - len(self.exact)
+
+    def _bucket_add(self, sig: str, count: int) -> None:
+        self._buckets.setdefault(count, {})[sig] = None
+        if self._min == 0 or count < self._min:
+            self._min = count
+
+    def _bucket_remove(self, sig: str, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[sig]
+        if not bucket:
+            del self._buckets[count]
+            if count == self._min:
+                self._min = min(self._buckets) if self._buckets else 0
+
+    def _bump(self, sig: str, count: int) -> None:
+        """Move `sig` from the `count` bucket to `count + 1` (O(1), unlike remove + add)."""
+        bucket = self._buckets[count]
+        del bucket[sig]
+        self._buckets.setdefault(count + 1, {})[sig] = None
+        if not bucket:
+            del self._buckets[count]
+            if count == self._min:
+                self._min = count + 1
+
+    def _evict(self) -> int:
+        """Drop the oldest group with the minimum count; returns that count.
+
+        The caller re-inserts at `count + 1`, which is then the minimum if the
+        bucket emptied.
+        """
+        floor = self._min
+        bucket = self._buckets[floor]
+        victim = next(iter(bucket))
+        del bucket[victim]
+        if not bucket:
+            del self._buckets[floor]
+            self._min = floor + 1
+        del self.groups[victim]
+        self.timelines.pop(victim, None)
+        self.errors.pop(victim, None)
+        self.evictions += 1
+        self._evicted_max = max(self._evicted_max, floor)
+        return floor
+
+    def floor(self) -> int:
+        """Smallest count in a full summary (0 while not full): the current error bound."""
+        return self._min if self._tracked() >= self.capacity else 0
+
+    def unlisted_max(self) -> int:
+        """Upper bound on the count of any signature this table does not list."""
+        return max(self.floor(), self._merged_floor, self._evicted_max)
+
+    # ---- GroupTable API ----
+    def add_record(self, level: str, msg: str, line: Union[str, bytes], ts: str = "") -> None:
+        sig = self.signature_fn(msg)
+        g = self.groups.get(sig)
+        if sig in self.exact:
+            pass  # pinned: counted exactly below
+        elif level == "ERROR":
+            if g is not None:
+                self._bucket_remove(sig, g["count"])  # pin: leaves the summary, keeps its error
+            else:
+                # Earlier non-ERROR lines may have been evicted: charge the unlisted bound
+                inherited = self.unlisted_max()
+                g = self.group_for(sig)
+                g["count"] = inherited
+                if inherited:
+                    self.errors[sig] = inherited
+            self.exact[sig] = None
+        elif g is not None:
+            self._bump(sig, g["count"])
+        else:
+            if self._tracked() >= self.capacity:
+                self._evict()
+            # It may have been evicted before, while the summary was fuller
+            inherited = self.unlisted_max()
+            g = self.group_for(sig)
+            g["count"] = inherited
+            if inherited:
+                self.errors[sig] = inherited
+            self._bucket_add(sig, inherited + 1)
+        # From here on, exactly like `GroupTable.add_record`
+        self.parsed_lines += 1
+        g = self.group_for(sig)
+        if ts:
+            self.timeline_for(sig).add(ts)
+        g["count"] += 1
+        g["levels"][level] = g["levels"].get(level, 0) + 1
+        if len(g["examples"]) < MAX_EXAMPLES:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8", "replace")
+            g["examples"].append(line)
+
+    def merge(self, other: "GroupTable") -> "GroupTable":
+        """Mergeable Space-Saving: a signature missing on one side is charged that side's floor.
+
+        A side only drops signatures whose count was at most its floor, so the
+        merged count stays an upper bound and `count_error` grows by the charge.
+        """
+        mine, my_floor = set(self.groups), self.unlisted_max()
+        if isinstance(other, SpaceSavingTable):
+            theirs, their_floor = set(other.groups), other.unlisted_max()
+            other_errors, other_exact = other.errors, other.exact
+            self.evictions += other.evictions
+        else:  # an exact table never dropped anything
+            theirs, their_floor, other_errors = set(other.groups), 0, {}
+            other_exact = {sig: None for sig, g in other.groups.items() if g["levels"].get("ERROR")}
+        super().merge(other)
+        self.exact.update(other_exact)
+        for sig, g in self.groups.items():
+            err = self.errors.get(sig, 0) + other_errors.get(sig, 0)
+            if sig not in mine:
+                err += my_floor
+            if sig not in theirs:
+                err += their_floor
+            g["count"] += err - self.errors.get(sig, 0) - other_errors.get(sig, 0)
+            if err:
+                self.errors[sig] = err
+        self._merged_floor = my_floor + their_floor  # dropped on both sides
+        self._rebuild()
+        return self
+
+    def _rebuild(self) -> None:
+        """Re-bucket the summary after a merge, keeping its `capacity` largest groups."""
+        self._buckets.clear()
+        self._min = 0
+        summary = [sig for sig in self.groups if sig not in self.exact]
+        # Stable sort: first-seen order breaks ties, like `to_list`
+        ranked = sorted(summary, key=lambda sig: self.groups[sig]["count"], reverse=True)
+        for sig in ranked[self.capacity:]:
+            self._evicted_max = max(self._evicted_max, self.groups[sig]["count"])
+            del self.groups[sig]
+            self.timelines.pop(sig, None)
+            self.errors.pop(sig, None)
+            self.evictions += 1
+        for sig in summary:
+            if sig in self.groups:
+                self._bucket_add(sig, self.groups[sig]["count"])
+
+    def to_dict(self) -> Dict:
+        """`GroupTable.to_dict` plus the summary state (for follow-mode checkpoints)."""
+        data = super().to_dict()
+        data["space_saving"] = {
+            "capacity": self.capacity,
+            "exact": list(self.exact),
+            "errors": self.errors,
+            "merged_floor": self._merged_floor,
+            "evicted_max": self._evicted_max,
+            "evictions": self.evictions,
+        }
+        return data
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Dict,
+        signature_fn: SignatureFn = prefix_signature,
+        parse_fn: ParseFn = parse_line,
+        capacity: int = 0,
+    ) -> "SpaceSavingTable":
+        state = data.get("space_saving") or {}
+        base = GroupTable.from_dict(data, signature_fn, parse_fn)
+        table = cls(signature_fn, parse_fn, capacity or int(state.get("capacity") or 1000))
+        table.groups, table.timelines = base.groups, base.timelines
+        table.total_lines, table.parsed_lines = base.total_lines, base.parsed_lines
+        table.exact = {str(sig): None for sig in state.get("exact") or []}
+        table.errors = {str(sig): int(n) for sig, n in (state.get("errors") or {}).items()}
+        table._merged_floor = int(state.get("merged_floor") or 0)
+        table._evicted_max = int(state.get("evicted_max") or 0)
+        table.evictions = int(state.get("evictions") or 0)
+        table._rebuild()
+        return table
+
+    def count_error(self, sig: str) -> int:
+        return self.errors.get(sig, 0)
+
+    def to_list(self) -> List[Dict]:
+        """Groups sorted by count; approximate ones carry `count_error`."""
+        groups = super().to_list()
+        for g in groups:
+            err = self.errors.get(g["signature"], 0)
+            if err:
+                g["count_error"] = err
+        return groups
+
+    def bounds(self) -> Dict:
+        """Error bounds for the findings summary."""
+        return {
+            "mode": "space-saving",
+            "capacity": self.capacity,
+            "tracked_signatures": self._tracked(),
+            "exact_signatures": len(self.exact),
+            "evictions": self.evictions,
+            "max_count_error": max([0] + list(self.errors.values())),
+            "unlisted_max_count": self.unlisted_max(),  # any signature not listed occurred at most this often
+            "exact_levels": ["ERROR"],
+        }
+
+
+def make_table(signature_fn: SignatureFn = prefix_signature, parse_fn: ParseFn = parse_line, capacity: int = 0) -> GroupTable:
+    """Exact `GroupTable`, or a `SpaceSavingTable` when `capacity` > 0."""
+    if capacity > 0:
+        return SpaceSavingTable(signature_fn, parse_fn, capacity)
+    return GroupTable(signature_fn, parse_fn)
+
+
+def load_table(
+    data: Dict,
+    signature_fn: SignatureFn = prefix_signature,
+    parse_fn: ParseFn = parse_line,
+    capacity: int = 0,
+) -> GroupTable:
+    """`make_table`'s counterpart for a saved `to_dict()`."""
+    if capacity > 0:
+        return SpaceSavingTable.from_dict(data, signature_fn, parse_fn, capacity)
+    return GroupTable.from_dict(data, signature_fn, parse_fn)
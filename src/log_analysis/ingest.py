@@ -0,0 +1,69 @@
+"""
+Streaming log ingestion.
+
+Log files are read lazily, one line at a time, so memory use does not grow
+with input size. Only aggregated groups (see `grouping`) are kept.
+Compressed (.gz/.zst) and tar inputs are decompressed on the fly (see
+`compressed`).
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Iterable, Iterator, List, Union
+
+from .compressed import open_lines
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+def existing_paths(paths: Iterable[PathLike]) -> List[Path]:
+    """Resolve `paths` to Paths, dropping (and warning about) missing files."""
+    out: List[Path] = []
+    for p in paths:
+        path = Path(p)
+        if not path.exists():
+            logger.warning(f"⚠️ Log file not found: {path}")
+            continue
+        out.append(path)
+    return out
+
+
+def decode_line(raw: bytes) -> str:
+    """Bytes line -> str without the line terminator (invalid UTF-8 is replaced)."""
+    return raw.decode("utf-8", "replace").rstrip("\r\n")
+
+
+def iter_lines(paths: Iterable[PathLike]) -> Iterator[str]:
+    """Yield lines (without trailing newline) from each file in order.
+
+    Files are read in binary and split on `\\n` only, so line boundaries are
+    the same as for byte-range readers (see `parallel`). Compressed files and
+    tar archives are detected by their magic bytes and streamed.
+    """
+    for p in paths:
+        for raw in open_lines(p):
+            yield decode_line(raw)
+
+
+class CountingIterator:
+    """Wrap a line iterator, counting lines and keeping the first few for debug logs."""
+
+    def __init__(self, lines: Iterable[str], keep: int = 3) -> None:
+        self._it = iter(lines)
+        self.count = 0
+        self.head: List[str] = []
+        self._keep = keep
+
+    def __iter__(self) -> "CountingIterator":
+        return self
+
+    def __next__(self) -> str:
+        line = next(self._it)
+        self.count += 1
+        if len(self.head) < self._keep:
+            self.head.append(line)
+        return line
@@ -0,0 +1,169 @@
+"""
+Context-budget packing for log groups.
+
+Sending `groups[:top_n]` as pretty-printed JSON wastes tokens on whitespace
+and silently drops groups past `top_n`. `pack_groups` instead:
+
+1. serializes each group compactly (no indentation) with long example lines
+   truncated,
+2. orders groups by weight (bursting groups first, then ERROR count, then
+   total count),
+3. greedily fills a first batch up to the token budget (first-fit: a group
+   that does not fit is skipped, smaller ones after it may still fit),
+4. spills the remaining groups into additional batches, up to `max_batches`.
+
+Each batch becomes one LLM call (run them concurrently with `chat_many`), and
+`merge_findings` folds the per-call results back into a single findings dict
+with the usual `groups` + `summary` shape.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+PAYLOAD_FIELDS = (
+    "signature", "count", "count_error", "levels", "first_seen", "last_seen", "peak_per_min", "bursts", "examples", "exceptions",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def compact_group(group: Dict, max_example_chars: int = 240, max_examples: int = 3) -> Dict:
+    """Copy of `group` with only the fields the LLM needs and truncated examples."""
+    out = {k: group[k] for k in PAYLOAD_FIELDS if k in group}
+    examples = []
+    for ex in (group.get("examples") or [])[:max_examples]:
+        ex = str(ex)
+        examples.append(ex if len(ex) <= max_example_chars else ex[: max_example_chars - 1] + "…")
+    out["examples"] = examples
+    return out
+
+
+def group_weight(group: Dict) -> tuple:
+    """Sort key: bursting groups first, then more ERRORs, more events, and signature for stability."""
+    errors = int((group.get("levels") or {}).get("ERROR", 0) or 0)
+    return (not group.get("bursts"), -errors, -int(group.get("count", 0) or 0), str(group.get("signature", "")))
+
+
+def has_errors(groups: List[Dict]) -> bool:
+    """True if any group logged at ERROR level; otherwise packed calls have nothing to analyze."""
+    return any(int((g.get("levels") or {}).get("ERROR", 0) or 0) for g in groups)
+
+
+def empty_findings(total_events: int) -> Dict:
+    return {"groups": [], "summary": {"total_events": total_events}}
+
+
+def prioritize(groups: List[Dict]) -> List[Dict]:
+    """Groups with a rate burst first, otherwise in the given (count) order."""
+    return sorted(groups, key=lambda g: not g.get("bursts"))
+
+
+def payload_json(groups: List[Dict], total_events: int) -> str:
+    return json.dumps({"groups": groups, "total_events": total_events}, separators=(",", ":"), ensure_ascii=False)
+
+
+def pack_groups(
+    groups: List[Dict],
+    total_events: int,
+    budget_tokens: int,
+    overhead_tokens: int = 0,
+    max_batches: int = 4,
+    max_example_chars: int = 240,
+) -> List[List[Dict]]:
+    """Split `groups` into batches whose compact payload fits `budget_tokens`.
+
+    Args:
+        groups: Aggregated groups (any order).
+        total_events: Event total included in every payload.
+        budget_tokens: Token budget per LLM call (prompt side).
+        overhead_tokens: Tokens already used by the system/user templates.
+        max_batches: Cap on LLM calls; groups that still do not fit are dropped
+            (the lowest-weight ones, logged at INFO).
+        max_example_chars: Per-example truncation length.
+
+    Returns:
+        List of batches (lists of compact groups), highest-weight batch first.
+        A group larger than the whole budget on its own gets a batch to itself.
+    """
+    available = max(1, budget_tokens - overhead_tokens - estimate_tokens(payload_json([], total_events)))
+    items = []
+    for g in sorted(groups, key=group_weight):
+        cg = compact_group(g, max_example_chars=max_example_chars)
+        # +1 for the separating comma
+        items.append((cg, estimate_tokens(json.dumps(cg, separators=(",", ":"), ensure_ascii=False)) + 1))
+
+    batches: List[List[Dict]] = []
+    used: List[int] = []
+    dropped = 0
+    for cg, cost in items:
+        for i, u in enumerate(used):
+            if u + cost <= available:
+                batches[i].append(cg)
+                used[i] += cost
+                break
+        else:
+            if len(batches) < max_batches:
+                batches.append([cg])
+                used.append(cost)
+            else:
+                dropped += 1
+    if dropped:
+        logger.info("Context budget: %d low-weight group(s) did not fit in %d call(s)", dropped, max_batches)
+    return batches
+
+
+def merge_findings(parts: List[Dict], groups: List[Dict], total_events: int) -> Dict:
+    """Merge per-batch findings into one `{"groups": [...], "summary": {...}}` dict.
+
+    Groups keep batch order (highest weight first) and are de-duplicated by
+    signature. `total_events` and `error_rate` are recomputed from the local
+    `groups`, since each call only saw part of the data.
+    """
+    merged_groups: List[Dict] = []
+    seen = set()
+    top: List[str] = []
+    summaries: List[str] = []
+    for part in parts:
+        if not isinstance(part, dict):
+            continue
+        for g in part.get("groups") or []:
+            sig = g.get("signature")
+            if sig in seen:
+                continue
+            seen.add(sig)
+            merged_groups.append(g)
+        summary = part.get("summary") or {}
+        for sig in summary.get("top_signatures") or []:
+            if sig not in top:
+                top.append(sig)
+        text = (summary.get("short_summary") or "").strip()
+        if text and text not in summaries:
+            summaries.append(text)
+
+    errors = sum(int((g.get("levels") or {}).get("ERROR", 0) or 0) for g in groups)
+    return {
+        "groups": merged_groups,
+        "summary": {
+            "total_events": total_events,
+            "error_rate": round(errors / max(1, total_events), 3),
+            "top_signatures": top[:5],
+            "short_summary": " ".join(summaries),
+        },
+    }
+
+
+def parse_findings(raw: str) -> Optional[Dict]:
+    """Parse one call's JSON findings, or None if the reply is not valid JSON."""
+    try:
+        data = json.loads(raw)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
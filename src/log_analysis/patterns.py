@@ -0,0 +1,78 @@
+"""
+Compiled patterns shared by the agent and the graph nodes.
+
+Everything here is compiled once at import, so per-line code never passes a
+pattern string to `re` (which would mean a cache lookup on every call):
+
+- `LOG_LINE_RE` — 'YYYY-MM-DD HH:MM:SS [LEVEL] message' (also ISO 'T',
+  fractional seconds, a UTC offset and unbracketed levels)
+- `LEVELS` / `canonical_level` — level spellings folded onto DEBUG, INFO,
+  WARN and ERROR (WARNING -> WARN, FATAL/CRITICAL -> ERROR, ...)
+- `normalize_signature` — the agent's short signature (lowercase, no paths,
+  numbers or punctuation, first 4 words) in one regex pass instead of four
+- `EXCEPTION_RE` / `exceptions_in` — exception class names found in example
+  lines. Results are memoized per line: the same examples are scanned for
+  the LLM payload and again when post-processing the findings.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+# Spelling -> canonical level. ERROR also covers FATAL/CRITICAL, so error
+# rates and Jira tickets include them.
+LEVELS: Dict[str, str] = {
+    "TRACE": "DEBUG", "DEBUG": "DEBUG",
+    "INFO": "INFO", "NOTICE": "INFO",
+    "WARN": "WARN", "WARNING": "WARN",
+    "ERROR": "ERROR", "ERR": "ERROR", "FATAL": "ERROR", "CRITICAL": "ERROR", "SEVERE": "ERROR",
+}
+# Longest spelling first, so WARNING is not cut at WARN
+LEVEL_ALTERNATION = "|".join(sorted(LEVELS, key=len, reverse=True))
+TIMESTAMP_PATTERN = r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+
+LOG_LINE_RE = re.compile(
+    rf"(?P<ts>{TIMESTAMP_PATTERN})\s+\[?(?P<level>{LEVEL_ALTERNATION})\]?\s+(?P<msg>.*)"
+)
+
+EXCEPTION_RE = re.compile(r"([A-Za-z_]+(?:Error|Exception))")
+
+# A path (tried first at every "/"), or a run of anything that is not a-z or
+# whitespace. Same result as stripping paths, then digits, then punctuation.
+_NORMALIZE_RE = re.compile(r"/[-\w./]+|[^a-z\s/]+|/")
+
+
+def canonical_level(name: str) -> str:
+    """DEBUG, INFO, WARN or ERROR for a known spelling (any case); other names upper-cased."""
+    name = name.strip().upper()
+    return LEVELS.get(name, name)
+
+
+def normalize_signature(msg: str, max_tokens: int = 4) -> str:
+    """First `max_tokens` words of `msg` after dropping paths, numbers and punctuation."""
+    tokens = _NORMALIZE_RE.sub(" ", msg.lower()).split()
+    return " ".join(tokens[:max_tokens]) if tokens else msg[:32]
+
+
+@lru_cache(maxsize=4096)
+def _exceptions_of(line: str) -> Tuple[str, ...]:
+    return tuple(EXCEPTION_RE.findall(line))
+
+
+def exceptions_in(lines: Iterable[str]) -> List[str]:
+    """Distinct exception names in `lines`, in first-seen order."""
+    found: Dict[str, None] = {}
+    for line in lines:
+        for name in _exceptions_of(str(line)):
+            found[name] = None
+    return list(found)
+
+
+def annotate_exceptions(groups: Iterable[Dict]) -> None:
+    """Set `g["exceptions"]` from each group's examples (left unset when none are found)."""
+    for g in groups:
+        exs = exceptions_in(g.get("examples") or [])
+        if exs:
+            g["exceptions"] = exs
@@ -0,0 +1,159 @@
+"""
+Memory-mapped, bytes-level scanner for `YYYY-MM-DD HH:MM:SS [LEVEL] message` logs.
+
+The text path decodes every line, strips it and runs a str regex on it. This
+scanner instead:
+
+- `mmap`s the file and walks it in newline-aligned blocks,
+- runs one precompiled multi-line bytes regex over each block with
+  `finditer`, so unparseable lines never reach Python code and the level tag
+  comes back as an interned str,
+- counts lines with `bytes.count(b"\\n")`,
+- decodes only the message (needed for the signature), once per distinct
+  message in a block. The whole line is decoded only when it becomes a
+  group example.
+
+The output contract matches `grouping.parse_line` / `parse_line_stripped` for
+ASCII timestamps and whitespace. `parse_bytes_line` returns the same
+(ts, level, msg) tuple, and `scan_file` fills a `GroupTable` exactly like
+`GroupTable().add_all(iter_lines(...))`.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+from typing import Dict, Optional, Tuple, Union
+
+from .grouping import MAX_EXAMPLES, GroupTable, ParseFn, parse_line, parse_line_stripped
+from .patterns import LEVEL_ALTERNATION, LEVELS, TIMESTAMP_PATTERN
+from .timeline import Timeline, minute_of
+
+# `\s` of the str regex, restricted to one line: a trailing run of "\r" is part
+# of the line ending (stripped by `ingest.decode_line`), so it is not whitespace.
+_WS = rb"(?:[ \t\x0b\x0c\x1c-\x1f]|\r(?!\r*(?:\n|\Z)))"
+_LINE_BRE = re.compile(
+    b"^(" + TIMESTAMP_PATTERN.encode() + b")" + _WS + rb"+\[?(" + LEVEL_ALTERNATION.encode() + rb")\]?" + _WS + rb"+(.*)",
+    re.MULTILINE,
+)
+_LEVELS: Dict[bytes, str] = {name.encode(): level for name, level in LEVELS.items()}
+
+BLOCK_BYTES = 16 * 1024 * 1024
+MEMO_ENTRIES = 65536  # distinct messages remembered per block
+
+Buffer = Union[bytes, mmap.mmap]
+
+# Parse functions this scanner reproduces exactly -> `strip_msg` flag
+SCANNABLE: Dict[ParseFn, bool] = {parse_line: False, parse_line_stripped: True}
+
+
+def parse_bytes_line(line: bytes, strip_msg: bool = False) -> Optional[Tuple[str, str, str]]:
+    """Bytes twin of `grouping.parse_line` (or `parse_line_stripped` with `strip_msg`)."""
+    m = _LINE_BRE.match(line.rstrip(b"\r\n"))
+    if m is None:
+        return None
+    msg = m.group(3).decode("utf-8", "replace")
+    return m.group(1).decode("ascii"), _LEVELS[m.group(2)], msg.strip() if strip_msg else msg
+
+
+def scan_block(block: bytes, table: GroupTable, strip_msg: bool = False) -> GroupTable:
+    """Group the lines of `block` (a whole number of lines) into `table`."""
+    if not block:
+        return table
+    table.total_lines += block.count(b"\n") + (not block.endswith(b"\n"))
+    if not table.MEMO_SAFE:
+        return _scan_block_records(block, table, strip_msg)
+    signature_fn = table.signature_fn
+    group_for = table.group_for
+    timeline_for = table.timeline_for
+    levels = _LEVELS
+    minutes: Dict[bytes, int] = {}  # "YYYY-MM-DD HH:MM" -> minute, for this block
+    # Repeated messages skip decoding and the signature function entirely
+    memo: Dict[bytes, Tuple[Dict, Timeline]] = {}
+    parsed = 0
+    for m in _LINE_BRE.finditer(block):
+        parsed += 1
+        ts_b, level_b, msg_b = m.group(1, 2, 3)
+        hit = memo.get(msg_b)
+        if hit is None:
+            msg = msg_b.rstrip(b"\r").decode("utf-8", "replace")
+            sig = signature_fn(msg.strip() if strip_msg else msg)
+            hit = (group_for(sig), timeline_for(sig))
+            if len(memo) < MEMO_ENTRIES:
+                memo[msg_b] = hit
+        g, tl = hit
+        g["count"] += 1
+        level_counts = g["levels"]
+        level = levels[level_b]
+        level_counts[level] = level_counts.get(level, 0) + 1
+        # Timeline.add, inlined (this loop runs once per line)
+        ts = ts_b.decode("ascii")
+        if ts > tl.last_seen:
+            tl.last_seen = ts
+            if not tl.first_seen:
+                tl.first_seen = ts
+        elif ts < tl.first_seen:
+            tl.first_seen = ts
+        key = ts_b[:16]
+        minute = minutes.get(key)
+        if minute is None:
+            minute = minutes[key] = minute_of(ts)
+        idx = minute - tl.base
+        if 0 <= idx < len(tl.counts):
+            tl.counts[idx] += 1
+        elif minute >= 0:
+            tl.add_minute(minute)
+        if len(g["examples"]) < MAX_EXAMPLES:
+            # m.group(0) runs to the end of the line; only kept examples are decoded
+            g["examples"].append(m.group(0).rstrip(b"\r").decode("utf-8", "replace"))
+    table.parsed_lines += parsed
+    return table
+
+
+def _scan_block_records(block: bytes, table: GroupTable, strip_msg: bool) -> GroupTable:
+    """`scan_block` for tables that may drop groups: every line goes through `add_record`."""
+    add_record = table.add_record
+    levels = _LEVELS
+    for m in _LINE_BRE.finditer(block):
+        ts_b, level_b, msg_b = m.group(1, 2, 3)
+        msg = msg_b.rstrip(b"\r").decode("utf-8", "replace")
+        add_record(levels[level_b], msg.strip() if strip_msg else msg, m.group(0).rstrip(b"\r"), ts_b.decode("ascii"))
+    return table
+
+
+def add_block(table: GroupTable, block: bytes) -> GroupTable:
+    """Add whole lines in `block` to `table`, via the scanner when its parse function allows."""
+    strip_msg = SCANNABLE.get(table.parse_fn)
+    if strip_msg is not None:
+        return scan_block(block, table, strip_msg)
+    n = block.count(b"\n") + (not block.endswith(b"\n"))
+    for raw in block.split(b"\n")[:n]:
+        table.add(raw.decode("utf-8", "replace").rstrip("\r"))
+    return table
+
+
+def scan_buffer(buf: Buffer, start: int, end: int, table: GroupTable, strip_msg: bool = False,
+                block_bytes: int = BLOCK_BYTES) -> GroupTable:
+    """Group `buf[start:end]` into `table`; `start` must be the start of a line."""
+    pos = start
+    while pos < end:
+        stop = min(end, pos + block_bytes)
+        if stop < end:
+            nl = buf.rfind(b"\n", pos, stop)
+            stop = nl + 1 if nl >= 0 else (buf.find(b"\n", stop, end) + 1 or end)
+        scan_block(buf[pos:stop], table, strip_msg)
+        pos = stop
+    return table
+
+
+def scan_file(path: Union[str, os.PathLike], table: GroupTable, strip_msg: bool = False,
+              start: int = 0, end: Optional[int] = None) -> GroupTable:
+    """mmap `path` and scan bytes `[start, end)` (default: whole file) into `table`."""
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        end = size if end is None else min(end, size)
+        if start >= end:
+            return table
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return scan_buffer(mm, start, end, table, strip_msg)
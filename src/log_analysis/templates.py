@@ -0,0 +1,305 @@
+"""
+Online log-template mining (Drain-style) for signature grouping.
+
+The prefix heuristics (`prefix_signature`, the agent's `compute_signature`)
+keep the first 4 words of a message. Unrelated errors that share a prefix
+("failed to ...") collapse into one group, and the same error under a
+different prefix splits into many. This module groups by *template* instead:
+
+1. `mask_message` replaces variable fields (emails, IPs, UUIDs/IDs, hex,
+   paths, durations, numbers) with placeholders like `<IP>` in one regex pass.
+   It is stateless and picklable, so it works as a `GroupTable` signature
+   function in worker processes and with the mmap scanner.
+2. `TemplateMiner` clusters the distinct masked messages with a fixed-depth
+   parse tree (Drain): route by token count, then by the first `prefix_depth`
+   tokens, then compare against the clusters in that leaf. Similarity is the
+   share of positions where the template has the same literal token (a `<*>`
+   never counts as a match, so templates cannot widen themselves into
+   catch-alls). Above `sim_threshold` the message joins the cluster and the
+   differing positions turn into `<*>`; otherwise a new cluster starts.
+3. `mine_groups` merges the masked-message groups of a `GroupTable` by
+   cluster, so each output group's `signature` is the template text and
+   `template_id` names its cluster.
+
+Per line, the work is one regex pass plus a dict lookup. The miner runs once
+per distinct masked message, and leaves and node fan-out are bounded, so the
+amortized cost per line is O(1).
+
+Template IDs are a short hash of the first message that created the cluster,
+and the miner state can be saved and loaded as JSON. Once a template has
+generalized, later runs keep reporting it under the same ID. The template
+*text* keeps widening as new variants arrive, so anything that must recognize
+a recurring group across runs (e.g. Jira dedupe, `dedupe_key`) uses the ID.
+`group_by_template` holds an exclusive lock on `<path>.lock` while it loads,
+mines and saves, so concurrent pipelines do not overwrite each other's clusters.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .grouping import MAX_EXAMPLES, GroupTable
+from .timeline import Timeline, annotate
+
+WILDCARD = "<*>"
+
+# One alternation, most specific first; the group name is the placeholder
+_MASK_RE = re.compile(
+    r"(?P<EMAIL>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    r"|(?P<IP>(?<![\w.])\d{1,3}(?:\.\d{1,3}){3}(?::\d{1,5})?(?![\w.]))"
+    r"|(?P<UUID>\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)"
+    r"|(?P<HEX>\b0[xX][0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*[a-fA-F])(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{6,}\b)"
+    r"|(?P<PATH>(?<![\w.:/])(?:/[\w.@%+~-]+)+/?)"
+    r"|(?P<DUR>(?<![\w.])\d+(?:\.\d+)?\s?(?:ns|us|µs|ms|s|sec|secs|seconds|m|min|mins|minutes|h|hr|hrs|hours)\b)"
+    r"|(?P<ID>\b(?=\w*\d)(?=\w*[A-Za-z])\w{6,}\b)"
+    r"|(?P<NUM>(?<![\w.])[-+]?\d+(?:\.\d+)?\b)"
+)
+_PLACEHOLDERS = {name: f"<{name}>" for name in _MASK_RE.groupindex}
+_PLACEHOLDERS["UUID"] = "<ID>"
+
+
+def _placeholder(m: "re.Match[str]") -> str:
+    return _PLACEHOLDERS[m.lastgroup or "ID"]
+
+
+def mask_message(msg: str) -> str:
+    """Replace variable fields with placeholders and collapse whitespace."""
+    return " ".join(_MASK_RE.sub(_placeholder, msg).split())
+
+
+def _is_variable(token: str) -> bool:
+    return token.startswith("<") and token.endswith(">") or any(c.isdigit() for c in token)
+
+
+def _template_id(tokens: List[str]) -> str:
+    return "T" + hashlib.sha256(" ".join(tokens).encode("utf-8")).hexdigest()[:10]
+
+
+class Cluster:
+    """One template: its tokens (with `<*>` at variable positions) and usage count."""
+
+    __slots__ = ("id", "tokens", "size", "path")
+
+    def __init__(self, cid: str, tokens: List[str], size: int, path: Tuple[str, ...]) -> None:
+        self.id = cid
+        self.tokens = tokens
+        self.size = size
+        self.path = path  # route through the tree (length, prefix tokens)
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def similarity(self, tokens: List[str]) -> float:
+        # Literal matches only: "Failed to <*> <*>" must not absorb every "Failed to x y"
+        same = sum(1 for a, b in zip(self.tokens, tokens) if a == b and a != WILDCARD)
+        return same / max(1, len(tokens))
+
+
+class TemplateMiner:
+    """Fixed-depth parse tree of log templates (Drain)."""
+
+    def __init__(
+        self,
+        prefix_depth: int = 2,
+        sim_threshold: float = 0.7,
+        max_children: int = 64,
+        max_leaf_clusters: int = 64,
+        cache_entries: int = 100_000,
+    ) -> None:
+        self.prefix_depth = prefix_depth
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_leaf_clusters = max_leaf_clusters
+        self.cache_entries = cache_entries
+        self.clusters: Dict[str, Cluster] = {}
+        self._leaves: Dict[Tuple[str, ...], List[Cluster]] = {}
+        self._children: Dict[Tuple[str, ...], set] = {}
+        self._cache: Dict[str, Cluster] = {}
+
+    # ---- tree ----
+    def _route(self, tokens: List[str]) -> Tuple[str, ...]:
+        path: Tuple[str, ...] = (str(len(tokens)),)
+        for token in tokens[: self.prefix_depth]:
+            key = WILDCARD if _is_variable(token) else token
+            children = self._children.setdefault(path, set())
+            if key not in children:
+                if len(children) >= self.max_children:
+                    key = WILDCARD  # bounded fan-out: overflow shares one branch
+                children.add(key)
+            path += (key,)
+        return path
+
+    def _attach(self, cluster: Cluster) -> None:
+        self.clusters[cluster.id] = cluster
+        self._leaves.setdefault(cluster.path, []).append(cluster)
+        for depth in range(1, len(cluster.path)):
+            self._children.setdefault(cluster.path[:depth], set()).add(cluster.path[depth])
+
+    def add(self, masked: str) -> Cluster:
+        """Cluster one masked message, updating the matched template."""
+        cluster = self._cache.get(masked)
+        if cluster is not None:
+            cluster.size += 1
+            return cluster
+        tokens = masked.split()
+        path = self._route(tokens)
+        leaf = self._leaves.get(path, [])
+        best: Optional[Cluster] = None
+        best_sim = -1.0
+        for c in leaf:
+            sim = c.similarity(tokens)
+            if sim > best_sim:
+                best, best_sim = c, sim
+        if best is not None and (best_sim > self.sim_threshold or len(leaf) >= self.max_leaf_clusters):
+            # A full leaf absorbs into its closest template to keep the scan bounded
+            best.tokens = [a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)]
+            best.size += 1
+            cluster = best
+        else:
+            cid = _template_id(tokens)
+            while cid in self.clusters:
+                cid = _template_id([cid] + tokens)
+            cluster = Cluster(cid, tokens, 1, path)
+            self._attach(cluster)
+        if len(self._cache) < self.cache_entries:
+            self._cache[masked] = cluster
+        return cluster
+
+    # ---- persistence ----
+    def to_dict(self) -> Dict:
+        return {
+            "version": 1,
+            "config": {
+                "prefix_depth": self.prefix_depth,
+                "sim_threshold": self.sim_threshold,
+                "max_children": self.max_children,
+                "max_leaf_clusters": self.max_leaf_clusters,
+            },
+            "clusters": [
+                {"id": c.id, "template": c.template, "size": c.size, "path": list(c.path)}
+                for c in self.clusters.values()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TemplateMiner":
+        miner = cls(**(data.get("config") or {}))
+        for item in data.get("clusters") or []:
+            tokens = str(item["template"]).split()
+            path = tuple(item.get("path") or ()) or miner._route(tokens)
+            miner._attach(Cluster(str(item["id"]), tokens, int(item.get("size") or 0), path))
+        return miner
+
+    @classmethod
+    def load(cls, path: Optional[Path]) -> "TemplateMiner":
+        """Miner saved at `path`, or a fresh one if the file is missing or unreadable."""
+        if path is not None and Path(path).exists():
+            try:
+                return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        return cls()
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def mine_groups(table: GroupTable, miner: TemplateMiner) -> List[Dict]:
+    """Merge a table grouped by `mask_message` into template groups (sorted by count).
+
+    Groups are visited in first-seen order, so each template keeps the
+    earliest examples and a deterministic order for ties.
+    """
+    merged: Dict[str, Dict] = {}
+    timelines: Dict[str, Timeline] = {}
+    for sig, g in table.groups.items():
+        cluster = miner.add(g["signature"])
+        cluster.size += g["count"] - 1  # `add` counted the masked message once
+        m = merged.get(cluster.id)
+        if m is None:
+            m = {"signature": "", "template_id": cluster.id, "count": 0,
+                 "levels": {"INFO": 0, "WARN": 0, "ERROR": 0}, "examples": []}
+            merged[cluster.id] = m
+        m["count"] += g["count"]
+        err = table.count_error(sig)
+        if err:
+            m["count_error"] = m.get("count_error", 0) + err
+        for level, n in g["levels"].items():
+            m["levels"][level] = m["levels"].get(level, 0) + n
+        room = MAX_EXAMPLES - len(m["examples"])
+        if room > 0:
+            m["examples"].extend(g["examples"][:room])
+        tl = table.timelines.get(sig)
+        if tl is not None:
+            timelines.setdefault(cluster.id, Timeline()).merge(tl)
+    for cid, m in merged.items():
+        m["signature"] = miner.clusters[cid].template
+        annotate(m, timelines.get(cid))
+    return sorted(merged.values(), key=lambda x: x["count"], reverse=True)
+
+
+def default_templates_path() -> Path:
+    return Path(os.getenv("LOG_TEMPLATES_PATH") or Path("outputs") / "log_analyzer" / "templates.json")
+
+
+def group_by_template(table: GroupTable, path: Optional[Path] = None) -> List[Dict]:
+    """`mine_groups` with the miner loaded from and saved back to `path` (under its lock)."""
+    path = Path(path or default_templates_path())
+    with _locked(path):
+        miner = TemplateMiner.load(path)
+        groups = mine_groups(table, miner)
+        miner.save(path)
+    return groups
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Exclusive inter-process lock on `<path>.lock` (blocks until it is free)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(path.suffix + ".lock"), "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)  # retries for ~10s, then raises
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def template_ids(groups: List[Dict]) -> Dict[str, str]:
+    """signature -> template ID of mined groups (LLM findings echo only the signature)."""
+    return {str(g["signature"]): str(g["template_id"]) for g in groups if g.get("template_id")}
+
+
+def dedupe_key(group: Dict, ids: Optional[Dict[str, str]] = None) -> str:
+    """Identity of a group across runs: its template ID if known, else its signature."""
+    sig = str(group.get("signature") or "unknown")
+    return str(group.get("template_id") or (ids or {}).get(sig) or sig)
+
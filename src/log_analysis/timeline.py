@@ -0,0 +1,205 @@
+"""
+Per-group time windows and burst detection.
+
+Every group gets a `Timeline`: `first_seen` / `last_seen` timestamps plus
+per-minute counts in a compact `array('I')` (4 bytes per minute, one array
+per group rather than a dict per minute). The array covers at most
+`MAX_MINUTES` minutes; older buckets are dropped as the window slides forward.
+
+`EwmaBurstDetector` walks a count series once, keeping an exponentially
+weighted mean and variance. A minute whose z-score is at least `z_threshold`
+(with at least `min_count` events) is a burst. Consecutive burst minutes are
+reported as one window, so the LLM sees when an error started and whether it
+is spiking, without the whole series.
+"""
+
+from __future__ import annotations
+
+import math
+import operator
+from array import array
+from datetime import date
+from typing import Dict, List, Optional
+
+MAX_MINUTES = 7 * 24 * 60
+MAX_BURSTS = 3
+
+_MINUTES: Dict[str, int] = {}
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def minute_of(ts: str) -> int:
+    """Minutes since 1970-01-01 for a 'YYYY-MM-DD HH:MM[:SS]' timestamp (-1 if invalid)."""
+    key = ts[:16]
+    m = _MINUTES.get(key)
+    if m is None:
+        try:
+            day = date(int(key[0:4]), int(key[5:7]), int(key[8:10])).toordinal() - _EPOCH
+            m = day * 1440 + int(key[11:13]) * 60 + int(key[14:16])
+        except ValueError:
+            m = -1
+        if len(_MINUTES) < 100_000:
+            _MINUTES[key] = m
+    return m
+
+
+def format_minute(m: int) -> str:
+    day, rest = divmod(m, 1440)
+    d = date.fromordinal(_EPOCH + day)
+    return f"{d.isoformat()} {rest // 60:02d}:{rest % 60:02d}"
+
+
+class Timeline:
+    """first/last timestamps and a sliding per-minute count array for one group."""
+
+    __slots__ = ("first_seen", "last_seen", "base", "counts")
+
+    def __init__(self) -> None:
+        self.first_seen = ""
+        self.last_seen = ""
+        self.base = 0  # minute of counts[0]
+        self.counts = array("I")
+
+    def add(self, ts: str, n: int = 1) -> None:
+        # Called once per line: keep the in-order, in-window case cheap
+        if ts > self.last_seen:
+            self.last_seen = ts
+            if not self.first_seen:
+                self.first_seen = ts
+        elif ts < self.first_seen:
+            self.first_seen = ts
+        minute = _MINUTES.get(ts[:16])
+        if minute is None:
+            minute = minute_of(ts)
+        if minute < 0:
+            return
+        idx = minute - self.base
+        if 0 <= idx < len(self.counts):
+            self.counts[idx] += n
+        else:
+            self.add_minute(minute, n)
+
+    def add_minute(self, minute: int, n: int = 1) -> None:
+        counts = self.counts
+        if not counts:
+            self.base = minute
+            counts.append(n)
+            return
+        idx = minute - self.base
+        if idx < 0:
+            if len(counts) - idx > MAX_MINUTES:
+                return  # older than the window: only totals/first_seen keep it
+            self.counts = counts = array("I", bytes(4 * -idx)) + counts
+            self.base = minute
+            idx = 0
+        elif idx >= len(counts):
+            counts.extend(array("I", bytes(4 * (idx + 1 - len(counts)))))
+            if len(counts) > MAX_MINUTES:
+                drop = len(counts) - MAX_MINUTES
+                del counts[:drop]
+                self.base += drop
+                idx -= drop
+        counts[idx] += n
+
+    def merge(self, other: "Timeline") -> "Timeline":
+        if other.first_seen and (not self.first_seen or other.first_seen < self.first_seen):
+            self.first_seen = other.first_seen
+        if other.last_seen > self.last_seen:
+            self.last_seen = other.last_seen
+        if not other.counts:
+            return self
+        if not self.counts:
+            self.base, self.counts = other.base, array("I", other.counts)
+            return self
+        # Widen to cover both ranges, then add element-wise
+        self.add_minute(other.base, 0)
+        self.add_minute(other.base + len(other.counts) - 1, 0)
+        start = max(0, other.base - self.base)
+        skip = start - (other.base - self.base)  # minutes of `other` that fell out of the window
+        src = other.counts[skip:]
+        end = start + len(src)
+        self.counts[start:end] = array("I", map(operator.add, self.counts[start:end], src))
+        return self
+
+    def to_dict(self) -> Dict:
+        return {"first_seen": self.first_seen, "last_seen": self.last_seen, "base": self.base, "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Timeline":
+        tl = cls()
+        tl.first_seen = str(data.get("first_seen") or "")
+        tl.last_seen = str(data.get("last_seen") or "")
+        tl.base = int(data.get("base") or 0)
+        tl.counts = array("I", data.get("counts") or [])
+        return tl
+
+
+class EwmaBurstDetector:
+    """Streaming z-score of a per-minute count against its EWMA mean/variance."""
+
+    def __init__(self, alpha: float = 0.3, z_threshold: float = 3.0, min_count: int = 5, warmup: int = 3) -> None:
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.warmup = warmup
+        self.mean = 0.0
+        self.var = 0.0
+        self.n = 0
+
+    def update(self, x: float) -> float:
+        """Feed the next minute's count; returns its z-score against the history so far."""
+        z = 0.0
+        if self.n >= self.warmup:
+            z = (x - self.mean) / max(1.0, math.sqrt(self.var))
+        elif self.n == 0:
+            self.mean = float(x)
+        diff = x - self.mean
+        incr = self.alpha * diff
+        self.mean += incr
+        self.var = (1 - self.alpha) * (self.var + diff * incr)
+        self.n += 1
+        return z
+
+    def is_burst(self, x: float, z: float) -> bool:
+        return z >= self.z_threshold and x >= self.min_count
+
+
+def detect_bursts(tl: Timeline, detector: Optional[EwmaBurstDetector] = None) -> List[Dict]:
+    """Burst windows of a timeline, strongest first (at most `MAX_BURSTS`)."""
+    det = detector or EwmaBurstDetector()
+    windows: List[Dict] = []
+    current: Optional[Dict] = None
+    for i, x in enumerate(tl.counts):
+        z = det.update(x)
+        if det.is_burst(x, z):
+            minute = tl.base + i
+            if current is not None and current["_end"] == minute - 1:
+                current["_end"] = minute
+                current["peak_per_min"] = max(current["peak_per_min"], x)
+                current["z"] = max(current["z"], round(z, 1))
+            else:
+                current = {"_start": minute, "_end": minute, "peak_per_min": x, "z": round(z, 1)}
+                windows.append(current)
+    windows.sort(key=lambda w: w["z"], reverse=True)
+    out = []
+    for w in windows[:MAX_BURSTS]:
+        out.append({"start": format_minute(w["_start"]), "end": format_minute(w["_end"]),
+                    "peak_per_min": w["peak_per_min"], "z": w["z"]})
+    return out
+
+
+def annotate(group: Dict, tl: Optional[Timeline]) -> Dict:
+    """Add first_seen/last_seen, peak rate and burst windows to a group dict."""
+    if tl is None or not tl.first_seen:
+        return group
+    group["first_seen"] = tl.first_seen
+    group["last_seen"] = tl.last_seen
+    group["peak_per_min"] = max(tl.counts) if tl.counts else 0
+    # A burst needs at least `min_count` events in one minute
+    bursts = detect_bursts(tl) if group["peak_per_min"] >= EwmaBurstDetector().min_count else []
+    if bursts:
+        group["bursts"] = bursts
+    else:
+        group.pop("bursts", None)
+    return group
+